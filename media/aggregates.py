@@ -0,0 +1,124 @@
+from decimal import Decimal
+from typing import Iterable, Optional
+
+from django.db.models import Case, Count, F, FloatField, Sum, When
+from django.db.models.functions import Cast
+from django.db.models.lookups import GreaterThan
+
+from media.cache import bump_version
+from media.models import (
+    WEIGHTED_SCORE_PRIOR_MEAN,
+    WEIGHTED_SCORE_PRIOR_RATINGS,
+    Media,
+    UserMediaRating,
+)
+
+
+def rating_contribution(
+        rating: Optional[Decimal],
+        is_hidden: bool
+) -> tuple[int, int, Decimal]:
+    """Return what a single rating adds to the media aggregates.
+
+    The tuple holds the number of visible reviews, the number of visible
+    reviews that carry a score and the sum of those scores.
+    """
+    if is_hidden:
+        return 0, 0, Decimal(0)
+    if rating is None:
+        return 1, 0, Decimal(0)
+    return 1, 1, Decimal(rating)
+
+
+def weighted_score(ratings_num, ratings_sum):
+    """The Bayesian average of the scores; works on numbers and on
+    expressions of the stored aggregates alike."""
+    prior_total = WEIGHTED_SCORE_PRIOR_RATINGS * WEIGHTED_SCORE_PRIOR_MEAN
+    return (
+        (ratings_sum + prior_total)
+        / (ratings_num + WEIGHTED_SCORE_PRIOR_RATINGS)
+    )
+
+
+def apply_rating_delta(
+        media_id: int,
+        reviews: int,
+        ratings: int,
+        total: Decimal,
+        using: str = "default"
+) -> None:
+    if not (reviews or ratings or total):
+        return
+
+    ratings_num = F("ratings_num") + ratings
+    ratings_sum = F("ratings_sum") + Decimal(total)
+    Media.objects.using(using).filter(pk=media_id).update(
+        reviews_num=F("reviews_num") + reviews,
+        ratings_num=ratings_num,
+        ratings_sum=ratings_sum,
+        reviews_avg=Case(
+            When(
+                GreaterThan(ratings_num, 0),
+                then=Cast(ratings_sum, FloatField()) / ratings_num
+            ),
+            default=None,
+            output_field=FloatField()
+        ),
+        weighted_score=weighted_score(
+            ratings_num, Cast(ratings_sum, FloatField())
+        ),
+        **Media.change_fields()
+    )
+    bump_version("media")
+
+
+def recompute_rating_aggregates(media_ids: Iterable[int]) -> int:
+    """Recompute stored aggregates of the given media from their ratings.
+
+    Returns the number of media rows that were updated.
+    """
+    media_ids = list(media_ids)
+    totals = {
+        row["media_id"]: row
+        for row in UserMediaRating.objects
+        .filter(media_id__in=media_ids, is_hidden=False)
+        .order_by()
+        .values("media_id")
+        .annotate(
+            reviews=Count("id"),
+            ratings=Count("rating"),
+            total=Sum("rating")
+        )
+    }
+
+    media_list = list(
+        Media.objects
+        .filter(pk__in=media_ids)
+        .only(
+            "reviews_num", "ratings_num", "ratings_sum", "reviews_avg",
+            "weighted_score"
+        )
+    )
+    changes = Media.change_fields()
+    for media in media_list:
+        row = totals.get(media.pk, {})
+        media.reviews_num = row.get("reviews", 0)
+        media.ratings_num = row.get("ratings", 0)
+        media.ratings_sum = row.get("total") or Decimal(0)
+        media.reviews_avg = (
+            float(media.ratings_sum) / media.ratings_num
+            if media.ratings_num
+            else None
+        )
+        media.weighted_score = weighted_score(
+            media.ratings_num, float(media.ratings_sum)
+        )
+        for field, value in changes.items():
+            setattr(media, field, value)
+
+    bump_version("media")
+    return Media.objects.bulk_update(
+        media_list,
+        ["reviews_num", "ratings_num", "ratings_sum", "reviews_avg",
+         "weighted_score", *changes]
+    )
@@ -0,0 +1,90 @@
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from media.routers import replica_reads
+
+USER_KEY = "media:user:{pk}"
+USER_TIMEOUT = 60 * 15
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend that loads the user of a session from the cache.
+
+    ``AuthenticationMiddleware`` asks the backend for the session's user
+    on every authenticated request, so the lookup is only free with an
+    in-memory cache such as the Redis cache of production. Cached rows
+    are dropped by signals when a user is saved or deleted or their
+    permissions change, and Django still compares the session auth hash
+    with the auth hash of the cached row, so a password change ends other
+    sessions as before. The password hash itself is not cached, only the
+    session auth hash derived from it. Both the cache and, on a miss, the
+    user row are read with replica reads off: a lagging replica could
+    return the row a signal just dropped, from a database backed cache or
+    from the user table.
+    """
+
+    def get_user(self, user_id):
+        key = USER_KEY.format(pk=user_id)
+        with replica_reads(False):
+            entry = cache.get(key)
+            if entry is not None:
+                return user_from_entry(entry)
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user_entry(user), USER_TIMEOUT)
+        return user
+
+    async def aget_user(self, user_id):
+        key = USER_KEY.format(pk=user_id)
+        with replica_reads(False):
+            entry = await cache.aget(key)
+            if entry is not None:
+                return user_from_entry(entry)
+            user = await super().aget_user(user_id)
+            if user is not None:
+                await cache.aset(key, user_entry(user), USER_TIMEOUT)
+        return user
+
+
+def user_entry(user) -> dict:
+    return {
+        "fields": {
+            field.attname: getattr(user, field.attname)
+            for field in user._meta.concrete_fields
+            if field.attname != "password"
+        },
+        "session_auth_hash": user.get_session_auth_hash(),
+    }
+
+
+def user_from_entry(entry: dict):
+    """Rebuild a cached user. Its password is deferred, so it is only
+    read from the database if something like ``check_password`` needs
+    it."""
+    model = get_user_model()
+    fields = entry["fields"]
+    user = model.from_db(
+        DEFAULT_DB_ALIAS, list(fields), list(fields.values())
+    )
+
+    def get_session_auth_hash():
+        # Once the password is loaded or set, the hash follows it.
+        if "password" in user.__dict__:
+            return model.get_session_auth_hash(user)
+        return entry["session_auth_hash"]
+
+    user.get_session_auth_hash = get_session_auth_hash
+    return user
+
+
+def forget_users(user_ids, using: str = DEFAULT_DB_ALIAS) -> None:
+    """Drop cached users right away, so the writing request reads fresh
+    rows, and once more on commit, so rows other requests cached from the
+    pre-commit state are dropped as well."""
+    keys = [USER_KEY.format(pk=pk) for pk in user_ids]
+    cache.delete_many(keys)
+    transaction.on_commit(partial(cache.delete_many, keys), using=using)
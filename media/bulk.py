@@ -0,0 +1,111 @@
+from typing import Iterable
+
+from django.db import connections, transaction
+
+from media.cache import bump_version
+from media.models import Creator, Genre, Media, MediaUser
+from media.search.trigram import index_objects, uses_side_table
+from media.statistics import reconcile_statistics
+
+
+def bulk_create_media(
+        model: type[Media],
+        objects: list[Media],
+        batch_size: int = 1000,
+        using: str = "default"
+) -> list[Media]:
+    """Insert objects of a Media subclass with a few statements per batch.
+
+    ``bulk_create`` does not support multi-table inheritance, so the
+    parent rows go through ``bulk_create`` (which returns their ids) and
+    the child rows through a single ``executemany``. Model signals are
+    not sent; call ``sync_derived_data`` once the import is done.
+    """
+    connection = connections[using]
+    parent_fields = [
+        field for field in Media._meta.local_concrete_fields
+        if not field.primary_key and not field.generated
+    ]
+    child_fields = model._meta.local_concrete_fields
+    sql = "INSERT INTO {} ({}) VALUES ({})".format(
+        connection.ops.quote_name(model._meta.db_table),
+        ", ".join(
+            connection.ops.quote_name(field.column) for field in child_fields
+        ),
+        ", ".join(["%s"] * len(child_fields))
+    )
+
+    for start in range(0, len(objects), batch_size):
+        batch = objects[start:start + batch_size]
+        parents = []
+        for obj in batch:
+            obj.media_type = obj.media_type or model.__name__
+            parents.append(Media(**{
+                field.attname: getattr(obj, field.attname)
+                for field in parent_fields
+            }))
+
+        with transaction.atomic(using=using):
+            Media.objects.using(using).bulk_create(parents)
+            for obj, parent in zip(batch, parents):
+                obj.pk = obj.media_ptr_id = parent.pk
+                obj._state.adding = False
+                obj._state.db = using
+
+            with connection.cursor() as cursor:
+                cursor.executemany(sql, [
+                    [
+                        field.get_db_prep_save(
+                            getattr(obj, field.attname), connection
+                        )
+                        for field in child_fields
+                    ]
+                    for obj in batch
+                ])
+    return objects
+
+
+def bulk_link_media(
+        field_name: str,
+        pairs: Iterable[tuple[int, int]],
+        batch_size: int = 1000,
+        using: str = "default"
+) -> None:
+    """Insert ``(media_id, related_id)`` rows into a Media M2M table."""
+    field = Media._meta.get_field(field_name)
+    through = field.remote_field.through
+    source = through._meta.get_field(field.m2m_field_name()).attname
+    target = through._meta.get_field(field.m2m_reverse_field_name()).attname
+    through.objects.using(using).bulk_create(
+        (
+            through(**{source: media_id, target: related_id})
+            for media_id, related_id in pairs
+        ),
+        batch_size=batch_size,
+        ignore_conflicts=True
+    )
+
+
+def sync_derived_data(
+        creators: Iterable[Creator] = (),
+        genres: Iterable[Genre] = (),
+        users: Iterable[MediaUser] = (),
+        using: str = "default"
+) -> None:
+    """Bring data normally kept up to date by signals in line after bulk
+    inserts: trigram search rows, collection versions (and with them
+    cached choice lists and ETags) and site statistics.
+
+    Rating aggregates are left to ``recompute_rating_aggregates``, which
+    works through the media in batches.
+    """
+    if uses_side_table(using):
+        index_objects("creator", creators, using)
+        index_objects("genre", genres, using)
+        index_objects("user", users, using)
+    bump_version("media")
+    bump_version("creators")
+    bump_version("genres")
+    if users:
+        bump_version("users")
+    reconcile_statistics(using)
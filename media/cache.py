@@ -0,0 +1,107 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+from django.core.cache import cache
+from django.db import transaction
+
+from media.routers import may_be_stale
+
+VERSION_KEY = "media:version:{name}"
+VALUE_KEY = "media:cached:{name}:{version}"
+
+
+def new_version() -> int:
+    """Return a version number that was never handed out before.
+
+    Nanoseconds since the epoch keep growing across processes and
+    restarts, so no read-modify-write of the previous version is needed.
+    """
+    return time.time_ns()
+
+
+def version_time(version: int) -> datetime:
+    """Return when a version handed out by ``new_version`` was created."""
+    return datetime.fromtimestamp(version / 1e9, tz=timezone.utc)
+
+
+def get_version(name: str) -> int:
+    """Return the current version of a named data set.
+
+    Versions live in the shared Django cache so every worker sees the
+    same value. A missing counter restarts from the current time instead
+    of zero, so a value cached under an old version is never reused.
+    """
+    key = VERSION_KEY.format(name=name)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, new_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(name: str) -> None:
+    """Invalidate everything cached under the current version of ``name``.
+
+    The version is bumped right away, so the writing request reads fresh
+    data, and once more on commit, so other workers that cached the
+    pre-commit state in between drop it as well. The new version is a
+    fresh ``new_version()``, so it also tells when the data last changed.
+    """
+
+    def bump():
+        cache.set(VERSION_KEY.format(name=name), new_version(), timeout=None)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+class VersionedCache:
+    """Two-level cache of values keyed by ``(name, version)``.
+
+    A bounded process-local LRU answers most reads after a single
+    version lookup. Misses go to the shared cache and only then to the
+    loader. Entries of an outdated version are evicted as soon as a newer
+    one is stored.
+    """
+
+    def __init__(self, maxsize: int = 32, timeout: int = 60 * 60):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_set(self, name: str, loader: Callable[[], Any]) -> Any:
+        version = get_version(name)
+        key = (name, version)
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        shared_key = VALUE_KEY.format(name=name, version=version)
+        value = cache.get(shared_key)
+        if value is None:
+            value = loader()
+            if may_be_stale(version_time(version)):
+                # A lagging replica may not show this version yet.
+                return value
+            cache.set(shared_key, value, self.timeout)
+
+        with self._lock:
+            for stale_key in [k for k in self._entries if k[0] == name]:
+                del self._entries[stale_key]
+            self._entries[key] = value
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+choice_cache = VersionedCache()
@@ -0,0 +1,366 @@
+import json
+import re
+from pathlib import Path
+from typing import Iterable, NamedTuple, Optional
+
+from django.apps import apps
+from django.db import connections
+from django.test import Client
+
+from media.query_budget import fingerprint
+
+_SQLITE_SCAN = re.compile(r"^SCAN (\w+)(?: AS (\w+))?$")
+_SQLITE_SORT = re.compile(r"^USE TEMP B-TREE FOR (?:RIGHT PART OF )?ORDER BY")
+_POSTGRES_SCAN = re.compile(r"Seq Scan on (\w+)(?: (\w+))?")
+_POSTGRES_SORT = re.compile(r"^\s*(?:->\s*)?(?:Incremental )?Sort\b")
+_TABLE_ALIAS = re.compile(r'(?:FROM|JOIN) "(\w+)"(?: (?:AS )?"?(\w+)"?)?')
+_ORDER_BY = re.compile(r"ORDER BY (.+?)(?: LIMIT | OFFSET |\)|$)")
+_QUALIFIED_COLUMN = r'"?(?:{alias})"?\."(\w+)"'
+
+SNAPSHOT_DIR = Path(__file__).resolve().parent / "plan_snapshots"
+
+
+class CapturedQuery(NamedTuple):
+    endpoint: str
+    sql: str
+    params: tuple
+
+    @property
+    def shape(self) -> str:
+        return fingerprint(self.sql.replace("%s", "?"))
+
+
+class PlanIssue(NamedTuple):
+    kind: str
+    table: str
+    detail: str
+
+    def __str__(self):
+        return f"{self.kind} on {self.table}: {self.detail}"
+
+
+class IndexSuggestion(NamedTuple):
+    table: str
+    columns: tuple[str, ...]
+    condition: Optional[tuple[str, bool]] = None
+
+    def as_code(self) -> str:
+        """Render the suggestion as a ``Meta.indexes`` entry."""
+        model = table_model(self.table)
+        fields = [
+            field_name(model, column) for column in self.columns
+        ]
+        arguments = [f"fields={tuple(fields)!r}"]
+        if self.condition:
+            column, value = self.condition
+            arguments.append(
+                f"condition=Q({field_name(model, column)}={value!r})"
+            )
+        # Index names are limited to 30 characters.
+        name = "_".join((self.table, *self.columns))[:26] + "_idx"
+        arguments.append(f"name={name!r}")
+        owner = model.__name__ if model else self.table
+        return f"{owner}: models.Index({', '.join(arguments)})"
+
+
+def table_model(table: str):
+    for model in apps.get_models(include_auto_created=True):
+        if model._meta.db_table == table:
+            return model
+    return None
+
+
+def field_name(model, column: str) -> str:
+    if model is None:
+        return column
+    for field in model._meta.concrete_fields:
+        if field.column == column:
+            return field.name
+    return column
+
+
+def capture_workload(
+        client: Client,
+        endpoints: Iterable[tuple[str, str]],
+        using: str = "default"
+) -> list[CapturedQuery]:
+    """Request every endpoint and record the SELECTs it runs, once per
+    distinct query shape, with the parameters needed to EXPLAIN them."""
+    captured = []
+    seen = set()
+
+    for endpoint, url in endpoints:
+        def record(execute, sql, params, many, context):
+            query = CapturedQuery(endpoint, sql, tuple(params or ()))
+            key = (endpoint, query.shape)
+            if sql.lstrip().upper().startswith("SELECT") and key not in seen:
+                seen.add(key)
+                captured.append(query)
+            return execute(sql, params, many, context)
+
+        with connections[using].execute_wrapper(record):
+            client.get(url)
+    return captured
+
+
+def explain(sql: str, params=(), using: str = "default") -> list[str]:
+    """Return the query plan of ``sql`` as a list of lines."""
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            rows = cursor.fetchall()
+            parents = {}
+            lines = []
+            for node, parent, _, detail in rows:
+                parents[node] = parents.get(parent, -1) + 1
+                lines.append(f"{'  ' * parents[node]}{detail}")
+            return lines
+
+        cursor.execute(f"EXPLAIN {sql}", params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def table_aliases(sql: str) -> dict[str, str]:
+    aliases = {}
+    for table, alias in _TABLE_ALIAS.findall(sql):
+        aliases[table] = table
+        if alias and alias not in ("ON", "WHERE", "INNER", "LEFT"):
+            aliases[alias] = table
+    return aliases
+
+
+def order_by_columns(sql: str) -> list[tuple[str, str]]:
+    """``(table, column)`` pairs of the outermost ORDER BY clause."""
+    matches = _ORDER_BY.findall(sql)
+    if not matches:
+        return []
+    aliases = table_aliases(sql)
+    columns = []
+    for term in matches[-1].split(","):
+        match = re.search(r'"?(\w+)"?\."(\w+)"', term)
+        if match and match.group(1) in aliases:
+            columns.append((aliases[match.group(1)], match.group(2)))
+    return columns
+
+
+def find_issues(
+        plan: list[str], sql: str, vendor: str
+) -> list[PlanIssue]:
+    """Flag full table scans and sorts that could not use an index."""
+    aliases = table_aliases(sql)
+    issues = []
+    for line in plan:
+        detail = line.strip()
+        if vendor == "sqlite":
+            scan = _SQLITE_SCAN.match(detail)
+            sort = _SQLITE_SORT.match(detail)
+        else:
+            scan = _POSTGRES_SCAN.search(detail)
+            sort = _POSTGRES_SORT.match(line)
+
+        if scan and scan.group(1) in aliases:
+            issues.append(PlanIssue(
+                "sequential scan", aliases[scan.group(1)], detail
+            ))
+        elif sort:
+            order = order_by_columns(sql)
+            issues.append(PlanIssue(
+                "sort", order[0][0] if order else "?", detail
+            ))
+    return issues
+
+
+def interpolate(sql: str, params) -> str:
+    """Inline ``params`` into ``sql`` for reading, not for executing."""
+    parts = sql.split("%s")
+    if len(parts) != len(params) + 1:
+        return sql
+
+    def literal(value):
+        if isinstance(value, bool):
+            return str(value).lower()
+        if value is None:
+            return "NULL"
+        if isinstance(value, (int, float)):
+            return str(value)
+        return "'{}'".format(str(value).replace("'", "''"))
+
+    return "".join(
+        part + (literal(params[index]) if index < len(params) else "")
+        for index, part in enumerate(parts)
+    )
+
+
+def suggest_index(
+        issue: PlanIssue, sql: str, params=()
+) -> Optional[IndexSuggestion]:
+    """Propose an index that serves the predicates and ordering ``sql``
+    applies to the table of ``issue``.
+
+    Equality columns go first, then join columns (for scans), then the
+    ORDER BY columns of the same table. An equality test against a
+    boolean literal becomes the condition of a partial index instead.
+    """
+    sql = interpolate(sql, params)
+    names = [
+        re.escape(alias)
+        for alias, table in table_aliases(sql).items()
+        if table == issue.table
+    ]
+    if not names:
+        return None
+    column = _QUALIFIED_COLUMN.format(alias="|".join(names))
+
+    primary_key = table_model(issue.table)
+    primary_key = primary_key._meta.pk.column if primary_key else "id"
+    equal, joins, condition = [], [], None
+    for match in re.finditer(
+            rf'{column} (=|IN) ("?\w+"?\."?)?(\w+|\'|\()', sql
+    ):
+        name, _, qualified, value = match.groups()
+        if qualified:
+            if name != primary_key:
+                joins.append(name)
+        elif value.lower() in ("true", "false"):
+            condition = (name, value.lower() == "true")
+        else:
+            equal.append(name)
+
+    # Booleans are compared as bare columns: WHERE NOT "t"."is_hidden".
+    for match in re.finditer(
+            rf'(WHERE|AND|\(|NOT) {column}(?= AND| OR|\)|$)', sql
+    ):
+        condition = (match.group(2), match.group(1) != "NOT")
+
+    order = [
+        name for table, name in order_by_columns(sql)
+        if table == issue.table
+    ]
+    columns = equal + (joins if issue.kind == "sequential scan" else [])
+    columns += order
+    columns = tuple(
+        name for name in dict.fromkeys(columns)
+        if not condition or name != condition[0]
+    )
+    if not columns:
+        return None
+    return IndexSuggestion(issue.table, columns, condition)
+
+
+def existing_indexes(table: str, using: str = "default") -> list[tuple]:
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, table)
+    return [
+        tuple(constraint["columns"])
+        for constraint in constraints.values()
+        if constraint["index"] or constraint["unique"]
+        or constraint["primary_key"]
+    ]
+
+
+def is_covered(suggestion: IndexSuggestion, using: str = "default") -> bool:
+    """Whether an existing index already starts with the suggested
+    columns. Partial suggestions are never covered, since introspection
+    does not report index conditions."""
+    if suggestion.condition:
+        return False
+    size = len(suggestion.columns)
+    return any(
+        columns[:size] == suggestion.columns
+        for columns in existing_indexes(suggestion.table, using)
+    )
+
+
+def merge_suggestions(suggestions: Iterable[IndexSuggestion]) -> dict:
+    """Fold suggestions whose columns are a prefix of another suggestion
+    with the same table and condition into the longer one.
+
+    Takes a mapping of suggestion to the endpoints using it.
+    """
+    merged = {}
+    ordered = sorted(suggestions, key=lambda item: -len(item.columns))
+    for suggestion in ordered:
+        target = next(
+            (
+                longer for longer in merged
+                if longer.table == suggestion.table
+                and longer.condition == suggestion.condition
+                and longer.columns[:len(suggestion.columns)]
+                == suggestion.columns
+            ),
+            suggestion
+        )
+        merged.setdefault(target, set()).update(suggestions[suggestion])
+    return merged
+
+
+def snapshot_path(vendor: str) -> Path:
+    return SNAPSHOT_DIR / f"{vendor}.json"
+
+
+def take_snapshot(
+        queries: Iterable[CapturedQuery], using: str = "default"
+) -> list[dict]:
+    """Plans and issues of the distinct catalog queries in ``queries``,
+    in the format stored under ``plan_snapshots/``.
+
+    Queries that only touch tables of other apps (sessions, for one) are
+    left out.
+    """
+    vendor = connections[using].vendor
+    entries = {}
+    for query in queries:
+        if query.shape in entries:
+            entries[query.shape]["endpoints"].append(query.endpoint)
+            continue
+        models = map(table_model, set(table_aliases(query.sql).values()))
+        if not any(
+                model and model._meta.app_label == "media"
+                for model in models
+        ):
+            continue
+
+        plan = explain(query.sql, query.params, using)
+        entries[query.shape] = {
+            "query": query.shape,
+            "endpoints": [query.endpoint],
+            "plan": plan,
+            "issues": [
+                str(issue) for issue in find_issues(plan, query.sql, vendor)
+            ],
+        }
+    return list(entries.values())
+
+
+def write_snapshot(snapshot: list[dict], path: Path) -> None:
+    path.parent.mkdir(exist_ok=True)
+    path.write_text(json.dumps(snapshot, indent=2) + "\n")
+
+
+def compare_snapshots(stored: list[dict], current: list[dict]) -> list[str]:
+    """Describe every stored query whose plan gained a scan or sort, or
+    which the workload no longer runs."""
+    current_by_query = {entry["query"]: entry for entry in current}
+    problems = []
+    for entry in stored:
+        now = current_by_query.get(entry["query"])
+        if now is None:
+            problems.append(
+                f"{', '.join(entry['endpoints'])} no longer run "
+                f"{entry['query']}"
+            )
+            continue
+
+        new_issues = set(now["issues"]) - set(entry["issues"])
+        if new_issues:
+            problems.append("\n".join((
+                f"{', '.join(entry['endpoints'])}: {entry['query']}",
+                *(f"  new: {issue}" for issue in sorted(new_issues)),
+                "  stored plan:",
+                *(f"    {line}" for line in entry["plan"]),
+                "  current plan:",
+                *(f"    {line}" for line in now["plan"]),
+            )))
+    return problems
@@ -0,0 +1,74 @@
+import csv
+import json
+from typing import Iterable, Iterator
+
+from django.db.models import Prefetch, QuerySet
+
+from media.models import Genre
+
+RATING_EXPORT_FIELDS = (
+    "media_id", "title", "media_type", "genres",
+    "rating", "review", "status", "is_hidden",
+)
+
+
+class Echo:
+    """File-like object whose ``write`` returns what it was given, so
+    ``csv.writer`` can produce lines for a streaming response."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def rating_export_rows(
+        queryset: QuerySet,
+        chunk_size: int = 2000
+) -> Iterator[dict]:
+    """Yield export rows of ``queryset`` ratings joined with their media.
+
+    Rows are fetched ``chunk_size`` at a time through a server-side
+    cursor where the database supports one, and genres are prefetched per
+    chunk, so memory does not grow with the number of ratings.
+    """
+    ratings = (
+        queryset
+        .select_related("media")
+        .only(
+            "media__title", "media__media_type", "rating", "review",
+            "status", "is_hidden"
+        )
+        .prefetch_related(
+            Prefetch("media__genres", queryset=Genre.objects.only("name"))
+        )
+        .order_by("pk")
+        .iterator(chunk_size=chunk_size)
+    )
+    for rating in ratings:
+        yield {
+            "media_id": rating.media_id,
+            "title": rating.media.title,
+            "media_type": rating.media.media_type,
+            "genres": [genre.name for genre in rating.media.genres.all()],
+            "rating": (
+                str(rating.rating) if rating.rating is not None else None
+            ),
+            "review": rating.review,
+            "status": rating.get_status_display() if rating.status else None,
+            "is_hidden": rating.is_hidden,
+        }
+
+
+def stream_csv(rows: Iterable[dict], fields: tuple[str, ...]) -> Iterator:
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([
+            "|".join(row[field]) if isinstance(row[field], list)
+            else row[field]
+            for field in fields
+        ])
+
+
+def stream_jsonl(rows: Iterable[dict]) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + "\n"
@@ -0,0 +1,73 @@
+from typing import Sequence
+
+from django.db.models import (
+    Case, Count, IntegerField, QuerySet, Value, When
+)
+
+from media.models import Media
+
+
+def _media_ids(queryset: QuerySet) -> QuerySet:
+    return queryset.order_by().values("pk")
+
+
+def field_facet(queryset: QuerySet, field: str) -> dict[str, int]:
+    """Count the rows of ``queryset`` per value of ``field``."""
+    rows = (
+        queryset
+        .order_by()
+        .values(field)
+        .annotate(count=Count("pk"))
+        .values_list(field, "count")
+    )
+    return dict(rows)
+
+
+def genre_facet(queryset: QuerySet) -> dict[str, int]:
+    """Count the media of ``queryset`` per genre name."""
+    rows = (
+        Media.genres.through.objects
+        .filter(media_id__in=_media_ids(queryset))
+        .values("genre__name")
+        .annotate(count=Count("media_id", distinct=True))
+        .values_list("genre__name", "count")
+    )
+    return dict(rows)
+
+
+def creator_facet(
+        queryset: QuerySet,
+        query: str = "",
+        pinned: Sequence[str] = (),
+        offset: int = 0,
+        limit: int | None = None
+) -> list[tuple[str, int]]:
+    """Count the media of ``queryset`` per creator name, largest first.
+
+    ``query`` narrows the creators by a substring of their name. Names in
+    ``pinned`` (usually the selected ones) are listed before the others
+    and do not count towards ``limit``.
+    """
+    rows = Media.creators.through.objects.filter(
+        media_id__in=_media_ids(queryset)
+    )
+    if query:
+        rows = rows.filter(creator__first_name__icontains=query)
+
+    rows = (
+        rows
+        .values("creator__first_name")
+        .annotate(
+            count=Count("media_id", distinct=True),
+            pinned=Case(
+                When(creator__first_name__in=pinned, then=Value(1)),
+                default=Value(0),
+                output_field=IntegerField()
+            )
+        )
+        .order_by("-pinned", "-count", "creator__first_name")
+        .values_list("creator__first_name", "count")
+    )
+    if limit is not None:
+        rows = rows[offset:offset + limit + len(pinned)]
+    return list(rows)
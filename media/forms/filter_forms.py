@@ -1,14 +1,43 @@
 from django import forms
+from django.core.exceptions import ValidationError
 
+from media.cache import choice_cache
 from media.models import Genre, Creator
 
 
+def genre_choices() -> list[tuple[str, str]]:
+    return choice_cache.get_or_set("genres", lambda: [
+        (name, name)
+        for name in Genre.objects.values_list("name", flat=True)
+    ])
+
+
+class CreatorNameField(forms.MultipleChoiceField):
+    """Creator first names, checked with one lookup of the submitted
+    names instead of against a list of every creator."""
+
+    def validate(self, value):
+        if self.required and not value:
+            raise ValidationError(
+                self.error_messages["required"], code="required"
+            )
+        known = set(
+            Creator.objects.filter(first_name__in=value)
+            .values_list("first_name", flat=True)
+        )
+        for name in value:
+            if name not in known:
+                raise ValidationError(
+                    self.error_messages["invalid_choice"],
+                    code="invalid_choice",
+                    params={"value": name},
+                )
+
+
 class GenreFilterForm(forms.Form):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.fields["genres"].choices = [
-            (genre.name, genre.name) for genre in Genre.objects.all()
-        ]
+        self.fields["genres"].choices = genre_choices()
 
     genres = forms.MultipleChoiceField(
         widget=forms.CheckboxSelectMultiple(
@@ -20,14 +49,7 @@ class GenreFilterForm(forms.Form):
 
 
 class CreatorFilterForm(forms.Form):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.fields["creators"].choices = [
-            (creator.first_name, creator.first_name)
-            for creator in Creator.objects.all()
-        ]
-
-    creators = forms.MultipleChoiceField(
+    creators = CreatorNameField(
         widget=forms.CheckboxSelectMultiple(
             attrs={
                 "class": "d-flex flex-wrap gap-2"
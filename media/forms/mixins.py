@@ -1,5 +1,7 @@
 from django import forms
+from django.urls import reverse_lazy
 
+from media.forms.widgets import AutocompleteSelectMultiple
 from media.models import Creator, Genre
 
 
@@ -23,12 +25,16 @@ class MediaFormMixin(forms.ModelForm):
     creators = forms.ModelMultipleChoiceField(
         queryset=Creator.objects.all(),
         required=False,
-        widget=forms.CheckboxSelectMultiple()
+        widget=AutocompleteSelectMultiple(
+            reverse_lazy("media:creator_autocomplete")
+        )
     )
 
     genres = forms.ModelMultipleChoiceField(
         queryset=Genre.objects.all(),
-        widget=forms.CheckboxSelectMultiple()
+        widget=AutocompleteSelectMultiple(
+            reverse_lazy("media:genre_autocomplete")
+        )
     )
 
 
@@ -41,6 +47,7 @@ class CustomErrorMessageMixin:
                      .capitalize()
                      )
             field.error_messages = {
+                **field.error_messages,
                 'required':
                     f'The field {label} is required'
             }
@@ -0,0 +1,31 @@
+from django import forms
+
+
+class AutocompleteSelectMultiple(forms.SelectMultiple):
+    """A multiple select holding only the chosen objects; the media form
+    script adds a search box that fetches matches from ``url``.
+
+    The choices of the field are never iterated, so rendering costs one
+    query for the labels of the selected ids however many objects exist.
+    """
+
+    def __init__(self, url, attrs=None):
+        super().__init__(attrs)
+        self.url = url
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context["widget"]["attrs"]["data-autocomplete-url"] = str(self.url)
+        return context
+
+    def optgroups(self, name, value, attrs=None):
+        selected = [pk for pk in value if str(pk).isdigit()]
+        if not selected:
+            return []
+        objects = self.choices.queryset.filter(pk__in=selected)
+        return [
+            (None, [self.create_option(
+                name, obj.pk, str(obj), True, index, attrs=attrs
+            )], index)
+            for index, obj in enumerate(objects)
+        ]
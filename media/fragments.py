@@ -0,0 +1,115 @@
+import hashlib
+import threading
+from collections import Counter
+from typing import Callable, Iterable, Optional
+
+from django.core.cache import cache
+from django.http import HttpRequest
+
+from media.cache import get_version, version_time
+from media.models import Media
+from media.routers import may_be_stale
+
+FRAGMENT_KEY = "media:fragment:{name}:{digest}"
+FRAGMENT_TIMEOUT = 60 * 60 * 24
+# Collection version of the fragments cached by ``{% fragment_cache %}``.
+FRAGMENTS_VERSION = "fragments"
+
+
+class FragmentStats:
+    """Hit and miss counts of cached fragments in this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = Counter()
+        self.misses = Counter()
+
+    def record(self, name: str, hit: bool) -> None:
+        with self._lock:
+            (self.hits if hit else self.misses)[name] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            names = sorted({*self.hits, *self.misses})
+            return {
+                name: {
+                    "hits": self.hits[name],
+                    "misses": self.misses[name],
+                    "hit_ratio": round(
+                        self.hits[name]
+                        / (self.hits[name] + self.misses[name]),
+                        3
+                    ),
+                }
+                for name in names
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.hits.clear()
+            self.misses.clear()
+
+
+fragment_stats = FragmentStats()
+
+
+def fragment_key(name: str, *vary_on) -> str:
+    digest = hashlib.md5(
+        ":".join(str(value) for value in vary_on).encode(),
+        usedforsecurity=False
+    ).hexdigest()
+    return FRAGMENT_KEY.format(name=name, digest=digest)
+
+
+def card_key(media: Media, request: HttpRequest) -> str:
+    """Cache key of a media card.
+
+    Besides the media version it varies on the creator and genre
+    versions, which change on renames, and on the query string, which the
+    genre links of the card extend.
+    """
+    if not hasattr(request, "_card_versions"):
+        request._card_versions = (
+            get_version("creators"), get_version("genres")
+        )
+    query = request.GET.copy()
+    query.pop("cursor", None)
+    return fragment_key(
+        "card",
+        media._meta.model_name,
+        media.pk,
+        media.version,
+        *request._card_versions,
+        query.urlencode()
+    )
+
+
+def cards_may_be_stale(request: HttpRequest) -> bool:
+    """Whether the creators and genres of the cards were read from a
+    replica that may lag behind their versions. ``card_key`` must have
+    been called first."""
+    return may_be_stale(version_time(max(request._card_versions)))
+
+
+def prefetch_cards(request: HttpRequest, media_list: Iterable[Media]) -> None:
+    """Read the cached cards of a page with a single cache round trip."""
+    keys = [card_key(media, request) for media in media_list]
+    found = cache.get_many(keys)
+    request._fragments = {key: found.get(key) for key in keys}
+
+
+def render_fragment(
+        name: str,
+        key: str,
+        render: Callable[[], str],
+        request: Optional[HttpRequest] = None,
+        store: bool = True
+) -> str:
+    prefetched = getattr(request, "_fragments", {})
+    html = prefetched[key] if key in prefetched else cache.get(key)
+    fragment_stats.record(name, html is not None)
+    if html is None:
+        html = render()
+        if store:
+            cache.set(key, html, FRAGMENT_TIMEOUT)
+    return html
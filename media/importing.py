@@ -0,0 +1,221 @@
+import datetime
+from collections import defaultdict
+from typing import Iterable, NamedTuple
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from media.bulk import bulk_create_media, bulk_link_media
+from media.models import Book, Creator, Film, Genre, Media, Series
+
+MEDIA_MODELS = {
+    "book": Book,
+    "film": Film,
+    "series": Series,
+}
+
+LIST_SEPARATOR = "|"
+CREATOR_FIELD_SEPARATOR = ";"
+
+CreatorKey = tuple[str, str, datetime.date]
+
+
+class InvalidRecord(ValueError):
+    pass
+
+
+class MediaRecord(NamedTuple):
+    model: type[Media]
+    fields: dict
+    creators: list[CreatorKey]
+    genres: list[str]
+
+
+def _split(value) -> list:
+    if isinstance(value, str):
+        return [item.strip() for item in value.split(LIST_SEPARATOR)
+                if item.strip()]
+    return list(value or [])
+
+
+def _creator_key(value) -> CreatorKey:
+    if isinstance(value, str):
+        parts = [part.strip() for part in value.split(
+            CREATOR_FIELD_SEPARATOR
+        )]
+        if len(parts) != 3:
+            raise InvalidRecord(
+                f"Creator {value!r} is not 'first name;last name;birth date'"
+            )
+        value = dict(zip(("first_name", "last_name", "birth_date"), parts))
+
+    try:
+        return (
+            Creator._meta.get_field("first_name").clean(
+                value.get("first_name"), None
+            ),
+            Creator._meta.get_field("last_name").clean(
+                value.get("last_name"), None
+            ),
+            Creator._meta.get_field("birth_date").clean(
+                value.get("birth_date"), None
+            ),
+        )
+    except (AttributeError, ValidationError) as error:
+        raise InvalidRecord(f"Invalid creator {value!r}: {error}")
+
+
+def _choice_value(field, value):
+    if field.choices and isinstance(value, str):
+        labels = {str(label).lower(): key for key, label in field.choices}
+        return labels.get(value.lower(), value)
+    return value
+
+
+def parse_record(record: dict) -> MediaRecord:
+    """Validate a raw JSONL/CSV record and convert it to model values.
+
+    Choice fields accept stored values as well as labels, so ``type`` may
+    be either ``"CS"`` or ``"Comics"``.
+    """
+    media_type = str(record.get("media_type", "")).strip().lower()
+    model = MEDIA_MODELS.get(media_type)
+    if model is None:
+        raise InvalidRecord(f"Unknown media_type {media_type!r}")
+
+    fields = {}
+    errors = []
+    for field in (
+            *Media._meta.local_concrete_fields,
+            *model._meta.local_concrete_fields,
+    ):
+        if field.primary_key or not field.editable or field.is_relation:
+            continue
+
+        value = record.get(field.name)
+        if value in (None, ""):
+            if field.has_default():
+                continue
+            value = None
+        try:
+            fields[field.attname] = field.clean(
+                _choice_value(field, value), None
+            )
+        except ValidationError as error:
+            errors.append(f"{field.name}: {'; '.join(error.messages)}")
+
+    if errors:
+        raise InvalidRecord(", ".join(errors))
+
+    return MediaRecord(
+        model=model,
+        fields=fields,
+        creators=[_creator_key(creator)
+                  for creator in _split(record.get("creators"))],
+        genres=_split(record.get("genres")),
+    )
+
+
+class MediaImporter:
+    """Write batches of parsed records with a handful of bulk statements.
+
+    Creators and genres are resolved through in-memory maps loaded once,
+    so a batch only inserts the ones it sees for the first time.
+    """
+
+    created_by = "import_media"
+
+    def __init__(self, batch_size: int = 1000, using: str = "default"):
+        self.batch_size = batch_size
+        self.using = using
+        self.creator_ids = {
+            (first_name, last_name, birth_date): pk
+            for pk, first_name, last_name, birth_date
+            in Creator.objects.using(using).values_list(
+                "pk", "first_name", "last_name", "birth_date"
+            ).iterator()
+        }
+        self.genre_ids = dict(
+            Genre.objects.using(using).values_list("name", "pk")
+        )
+        self.new_creators = []
+        self.new_genres = []
+
+    def import_batch(self, records: Iterable[MediaRecord]) -> int:
+        records = list(records)
+        with transaction.atomic(using=self.using):
+            creators = self._create_creators(records)
+            genres = self._create_genres(records)
+            creator_ids = {
+                **self.creator_ids,
+                **{(c.first_name, c.last_name, c.birth_date): c.pk
+                   for c in creators},
+            }
+            genre_ids = {
+                **self.genre_ids,
+                **{genre.name: genre.pk for genre in genres},
+            }
+
+            by_model = defaultdict(list)
+            for record in records:
+                by_model[record.model].append(record)
+
+            creator_links = []
+            genre_links = []
+            for model, model_records in by_model.items():
+                objects = [
+                    model(created_by=self.created_by, **record.fields)
+                    for record in model_records
+                ]
+                bulk_create_media(
+                    model, objects, self.batch_size, self.using
+                )
+                for obj, record in zip(objects, model_records):
+                    creator_links.extend(
+                        (obj.pk, creator_ids[key])
+                        for key in record.creators
+                    )
+                    genre_links.extend(
+                        (obj.pk, genre_ids[name]) for name in record.genres
+                    )
+
+            bulk_link_media(
+                "creators", creator_links, self.batch_size, self.using
+            )
+            bulk_link_media(
+                "genres", genre_links, self.batch_size, self.using
+            )
+
+        self.creator_ids = creator_ids
+        self.genre_ids = genre_ids
+        self.new_creators.extend(creators)
+        self.new_genres.extend(genres)
+        return len(records)
+
+    def _create_creators(self, records) -> list[Creator]:
+        missing = {
+            key
+            for record in records
+            for key in record.creators
+            if key not in self.creator_ids
+        }
+        return Creator.objects.using(self.using).bulk_create(
+            [
+                Creator(first_name=first_name, last_name=last_name,
+                        birth_date=birth_date)
+                for first_name, last_name, birth_date in missing
+            ],
+            batch_size=self.batch_size
+        )
+
+    def _create_genres(self, records) -> list[Genre]:
+        missing = {
+            name
+            for record in records
+            for name in record.genres
+            if name not in self.genre_ids
+        }
+        return Genre.objects.using(self.using).bulk_create(
+            [Genre(name=name) for name in missing],
+            batch_size=self.batch_size
+        )
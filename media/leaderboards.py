@@ -0,0 +1,132 @@
+from typing import Iterable
+
+from django.db import transaction
+from django.db.models import Count
+
+from media.cache import bump_version
+from media.models import (
+    Media, MediaLeaderboardEntry, MediaUser, RaterLeaderboardEntry,
+    UserMediaRating
+)
+
+# Media with fewer scored ratings are left off the media leaderboards.
+MIN_RATINGS = 3
+
+
+def _store_media_entries(media_ids: list[int], using: str) -> int:
+    links = (
+        Media.genres.through.objects.using(using)
+        .filter(
+            media_id__in=media_ids,
+            media__ratings_num__gte=MIN_RATINGS
+        )
+        .values_list(
+            "media_id", "genre_id", "media__media_type",
+            "media__weighted_score", "media__ratings_num"
+        )
+    )
+    with transaction.atomic(using):
+        MediaLeaderboardEntry.objects.using(using).filter(
+            media_id__in=media_ids
+        ).delete()
+        return len(MediaLeaderboardEntry.objects.using(using).bulk_create(
+            [
+                MediaLeaderboardEntry(
+                    media_id=media_id,
+                    genre_id=genre_id,
+                    media_type=media_type,
+                    score=score,
+                    ratings_num=ratings_num
+                )
+                for media_id, genre_id, media_type, score, ratings_num
+                in links
+            ],
+            batch_size=1000
+        ))
+
+
+def _store_rater_entries(user_ids: list[int], using: str) -> int:
+    counts = (
+        UserMediaRating.objects.using(using)
+        .filter(user_id__in=user_ids, is_hidden=False)
+        .order_by()
+        .values_list("user_id")
+        .annotate(reviews_num=Count("id"))
+    )
+    with transaction.atomic(using):
+        RaterLeaderboardEntry.objects.using(using).filter(
+            user_id__in=user_ids
+        ).delete()
+        return len(RaterLeaderboardEntry.objects.using(using).bulk_create(
+            [
+                RaterLeaderboardEntry(
+                    user_id=user_id, reviews_num=reviews_num
+                )
+                for user_id, reviews_num in counts
+            ],
+            batch_size=1000
+        ))
+
+
+def refresh_media_leaderboards(
+        media_ids: Iterable[int], using: str = "default"
+) -> int:
+    """Re-rank the given media on the leaderboards of their genres from
+    their stored rating aggregates.
+
+    Only the rows of these media are rewritten, so the cost does not
+    depend on the size of the catalog. Returns the number of rows.
+    """
+    media_ids = list(set(media_ids))
+    if not media_ids:
+        return 0
+    stored = _store_media_entries(media_ids, using)
+    bump_version("leaderboards")
+    return stored
+
+
+def refresh_rater_leaderboard(
+        user_ids: Iterable[int], using: str = "default"
+) -> int:
+    """Recount the visible reviews of the given users."""
+    user_ids = list(set(user_ids))
+    if not user_ids:
+        return 0
+    stored = _store_rater_entries(user_ids, using)
+    bump_version("leaderboards")
+    return stored
+
+
+def _id_batches(queryset, batch_size: int):
+    last_pk = 0
+    while True:
+        ids = list(
+            queryset.filter(pk__gt=last_pk)
+            .order_by("pk")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not ids:
+            return
+        yield ids
+        last_pk = ids[-1]
+
+
+def rebuild_leaderboards(
+        batch_size: int = 1000, using: str = "default"
+) -> tuple[int, int]:
+    """Rebuild every leaderboard batch by batch, for bulk imports and
+    scheduled runs. Returns the number of media and rater rows."""
+    media_rows = sum(
+        _store_media_entries(media_ids, using)
+        for media_ids in _id_batches(
+            Media.objects.using(using), batch_size
+        )
+    )
+    rater_rows = sum(
+        _store_rater_entries(user_ids, using)
+        for user_ids in _id_batches(
+            MediaUser.objects.using(using), batch_size
+        )
+    )
+    bump_version("leaderboards")
+    return media_rows, rater_rows
@@ -0,0 +1,98 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from media.explain import (
+    capture_workload, explain, find_issues, is_covered, merge_suggestions,
+    snapshot_path, suggest_index, take_snapshot, write_snapshot
+)
+from media.workload import get_workload_client, get_workload_endpoints
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay the queries of every list, detail, search and filter page, "
+        "EXPLAIN them, flag sequential scans and sorts and propose "
+        "composite or partial indexes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--username",
+            help="User to log in as (defaults to the first user)"
+        )
+        parser.add_argument(
+            "--only",
+            nargs="*",
+            default=None,
+            help="Replay only the endpoints with these names"
+        )
+        parser.add_argument(
+            "--update-snapshot",
+            action="store_true",
+            help=(
+                "Store the plans of all replayed queries as the snapshot "
+                "the plan regression test compares against"
+            )
+        )
+        parser.add_argument(
+            "--plans",
+            action="store_true",
+            help="Print the plan of every flagged query"
+        )
+
+    def handle(self, *args, **options):
+        client = get_workload_client(options["username"])
+        if client is None:
+            raise CommandError(
+                "No user to log in as; run generate_catalog first"
+            )
+        endpoints = get_workload_endpoints()
+        if options["only"]:
+            endpoints = [
+                endpoint for endpoint in endpoints
+                if endpoint[0] in options["only"]
+            ]
+
+        queries = capture_workload(client, endpoints)
+        if options["update_snapshot"]:
+            path = snapshot_path(connection.vendor)
+            write_snapshot(take_snapshot(queries), path)
+            self.stdout.write(f"Plan snapshot written to {path}")
+
+        suggestions = defaultdict(set)
+        flagged = 0
+        for query in queries:
+            plan = explain(query.sql, query.params)
+            issues = find_issues(plan, query.sql, connection.vendor)
+            if not issues:
+                continue
+
+            flagged += 1
+            self.stdout.write(f"{query.endpoint}: {query.sql[:160]}")
+            for issue in issues:
+                self.stdout.write(f"  {issue}")
+                suggestion = suggest_index(issue, query.sql, query.params)
+                if suggestion and not is_covered(suggestion):
+                    suggestions[suggestion].add(query.endpoint)
+            if options["plans"]:
+                self.stdout.write("\n".join(f"    {line}" for line in plan))
+
+        self.stdout.write(
+            f"\n{flagged} of {len(queries)} queries scan or sort without "
+            f"an index."
+        )
+        if not suggestions:
+            self.stdout.write(self.style.SUCCESS("No indexes to propose."))
+            return
+
+        self.stdout.write("Proposed indexes, most used first:")
+        for suggestion, used_by in sorted(
+                merge_suggestions(suggestions).items(),
+                key=lambda item: -len(item[1])
+        ):
+            self.stdout.write(
+                f"  {suggestion.as_code()}\n"
+                f"    used by {', '.join(sorted(used_by))}"
+            )
@@ -0,0 +1,220 @@
+import json
+import math
+import platform
+import statistics
+import time
+import tracemalloc
+
+import django
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import AsyncClient, Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from media.fragments import fragment_stats
+from media.pool import pool_stats, pool_usage
+from media.statistics import get_statistics
+from media.workload import (
+    WorkloadAsyncClient, get_workload_client, get_workload_endpoints
+)
+
+
+def percentile(samples: list[float], percent: float) -> float:
+    """Nearest-rank percentile of ``samples``."""
+    ordered = sorted(samples)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Request every list, detail, search and filter page through the "
+        "test client and report latency percentiles, query counts and "
+        "peak memory as JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=20,
+            help="Timed requests per endpoint"
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=2,
+            help="Untimed requests per endpoint before measuring"
+        )
+        parser.add_argument(
+            "--username",
+            help="User to log in as (defaults to the first user)"
+        )
+        parser.add_argument(
+            "--only",
+            nargs="*",
+            default=None,
+            help="Benchmark only the endpoints with these names"
+        )
+        parser.add_argument(
+            "--asgi",
+            action="store_true",
+            help=(
+                "Send the requests through the ASGI handler; set "
+                "ASYNC_VIEWS=1 to benchmark the async list views"
+            )
+        )
+        parser.add_argument(
+            "--output",
+            help="Write the JSON report to this file instead of stdout"
+        )
+
+    def handle(self, *args, **options):
+        if options["requests"] < 1:
+            raise CommandError("--requests must be at least 1")
+
+        client = get_workload_client(
+            options["username"],
+            WorkloadAsyncClient if options["asgi"] else Client
+        )
+        if client is None:
+            raise CommandError(
+                "No user to log in as; run generate_catalog first"
+            )
+        endpoints = get_workload_endpoints()
+        if options["only"]:
+            endpoints = [
+                endpoint for endpoint in endpoints
+                if endpoint[0] in options["only"]
+            ]
+
+        report = {
+            "meta": self.get_meta(options),
+            "results": [
+                self.benchmark(client, name, url, options)
+                for name, url in endpoints
+            ],
+        }
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(output)
+            self.stderr.write(f"Report written to {options['output']}")
+        else:
+            self.stdout.write(output)
+
+        failed = [
+            f"{result['name']} ({result['status']})"
+            for result in report["results"] if result["status"] != 200
+        ]
+        if failed:
+            raise CommandError(
+                "These endpoints did not answer 200, so their numbers "
+                f"are not comparable: {', '.join(failed)}"
+            )
+
+    def get_meta(self, options) -> dict:
+        stats = get_statistics()
+        return {
+            "timestamp": timezone.now().isoformat(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "pool": connection.settings_dict["OPTIONS"].get("pool"),
+            "conn_max_age": connection.settings_dict["CONN_MAX_AGE"],
+            "handler": "asgi" if options["asgi"] else "wsgi",
+            "async_views": settings.ASYNC_VIEWS,
+            "requests": options["requests"],
+            "warmup": options["warmup"],
+            "catalog": {
+                "users": stats.users_count,
+                "media": stats.media_count,
+                "books": stats.books_count,
+                "films": stats.films_count,
+                "series": stats.series_count,
+                "ratings": stats.ratings_count,
+            },
+        }
+
+    def benchmark(self, client, name, url, options) -> dict:
+        get = client.get
+        if isinstance(client, AsyncClient):
+            # Queries that async views run concurrently on other
+            # connections are not counted.
+            get = async_to_sync(client.get)
+
+        for _ in range(options["warmup"]):
+            get(url)
+
+        latencies = []
+        queries = []
+        status = None
+        fragments_before = fragment_stats.snapshot()
+        pool_before = pool_stats()
+        for _ in range(options["requests"]):
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                response = get(url)
+                latencies.append((time.perf_counter() - started) * 1000)
+            queries.append(len(context.captured_queries))
+            # The first failure is kept, so one bad response fails the
+            # endpoint.
+            if status in (None, 200):
+                status = response.status_code
+        fragments = self.fragment_counts(
+            fragments_before, fragment_stats.snapshot()
+        )
+        pool = pool_usage(pool_before, pool_stats())
+
+        # Memory is traced in a separate request, since tracemalloc
+        # slows down every allocation and would skew the latencies.
+        tracemalloc.start()
+        try:
+            baseline = tracemalloc.get_traced_memory()[0]
+            get(url)
+            peak = tracemalloc.get_traced_memory()[1] - baseline
+        finally:
+            tracemalloc.stop()
+
+        self.stderr.write(
+            f"{name}: p50 {percentile(latencies, 50):.1f} ms, "
+            f"{max(queries, default=0)} queries"
+        )
+        return {
+            "name": name,
+            "url": url,
+            "status": status,
+            "latency_ms": {
+                "p50": round(percentile(latencies, 50), 3),
+                "p95": round(percentile(latencies, 95), 3),
+                "p99": round(percentile(latencies, 99), 3),
+                "mean": round(statistics.fmean(latencies), 3),
+                "min": round(min(latencies), 3),
+                "max": round(max(latencies), 3),
+            },
+            "queries": {
+                "min": min(queries),
+                "max": max(queries),
+            },
+            "peak_memory_kb": round(peak / 1024, 1),
+            "fragment_cache": fragments,
+            "pool": pool,
+        }
+
+    def fragment_counts(self, before: dict, after: dict) -> dict:
+        """Fragment cache hits and misses between two stats snapshots."""
+        counts = {}
+        for name, stats in after.items():
+            hits = stats["hits"] - before.get(name, {}).get("hits", 0)
+            misses = stats["misses"] - before.get(name, {}).get("misses", 0)
+            if hits or misses:
+                counts[name] = {
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_ratio": round(hits / (hits + misses), 3),
+                }
+        return counts
@@ -0,0 +1,63 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from media.similarity import WEIGHTS, build_similar_media
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the most similar titles of every media from shared "
+        "genres, creators and ratings, for the detail pages"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--neighbours",
+            type=int,
+            default=10,
+            help="Similar titles kept per media"
+        )
+        parser.add_argument(
+            "--block-size",
+            type=int,
+            default=512,
+            help=(
+                "Media whose similarities a worker computes at once; "
+                "memory grows with it"
+            )
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Worker processes (defaults to the number of CPUs)"
+        )
+        for name, weight in WEIGHTS.items():
+            parser.add_argument(
+                f"--{name}-weight",
+                type=float,
+                default=weight,
+                help=f"Weight of the {name} similarity"
+            )
+
+    def handle(self, *args, **options):
+        for name in ("neighbours", "block_size", "workers"):
+            if options[name] is not None and options[name] < 1:
+                raise CommandError(
+                    f"--{name.replace('_', '-')} must be at least 1"
+                )
+
+        started = time.perf_counter()
+        media, stored = build_similar_media(
+            k=options["neighbours"],
+            block_size=options["block_size"],
+            workers=options["workers"],
+            weights={
+                name: options[f"{name}_weight"] for name in WEIGHTS
+            },
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored {stored} similar titles of {media} media in "
+            f"{time.perf_counter() - started:.1f} s"
+        ))
@@ -0,0 +1,277 @@
+import datetime
+import itertools
+import random
+import time
+import uuid
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+
+from media.cache import bump_version
+from media.bulk import bulk_create_media, bulk_link_media, sync_derived_data
+from media.models import (
+    Book, Creator, Film, Genre, MediaUser, Series, StatusChoices,
+    UserMediaRating
+)
+
+WORDS = (
+    "shadow", "river", "empire", "silent", "crimson", "garden", "machine",
+    "winter", "ocean", "forgotten", "star", "iron", "glass", "dragon",
+    "city", "storm", "golden", "last", "hidden", "kingdom", "night",
+    "journey", "broken", "light", "echo", "wild", "northern", "secret",
+    "moon", "house", "fire", "paper", "lost", "signal", "stone", "dream",
+    "midnight", "harbor", "frontier", "orchid", "clockwork", "velvet",
+)
+FIRST_NAMES = (
+    "Isaac", "Joanne", "Christopher", "Hayao", "Ursula", "Stephen", "Agatha",
+    "Akira", "Margaret", "Neil", "Octavia", "Haruki", "Terry", "Mary",
+    "Arthur", "Frank", "Naoki", "Greta", "Denis", "Sofia", "Kazuo", "Ann",
+)
+LAST_NAMES = (
+    "Asimov", "Rowling", "Nolan", "Miyazaki", "Le Guin", "King", "Christie",
+    "Kurosawa", "Atwood", "Gaiman", "Butler", "Murakami", "Pratchett",
+    "Shelley", "Clarke", "Herbert", "Urasawa", "Gerwig", "Villeneuve",
+)
+GENRE_NAMES = (
+    "Fantasy", "Science Fiction", "Drama", "Mystery", "Comedy", "Action",
+    "Detective", "Adventure", "Horror", "Romance", "Thriller", "Historical",
+    "Documentary", "Western", "Satire", "Cyberpunk", "Slice of Life",
+)
+COUNTRIES = ("UK", "USA", "Japan", "France", "Korea", "Canada", "Spain")
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a synthetic catalog of creators, genres, media, users "
+        "and ratings with bulk inserts, for load testing and benchmarks"
+    )
+
+    def add_arguments(self, parser):
+        for name, default in (
+                ("creators", 1000),
+                ("genres", 30),
+                ("books", 5000),
+                ("films", 5000),
+                ("series", 2000),
+                ("users", 500),
+                ("ratings", 50000),
+        ):
+            parser.add_argument(
+                f"--{name}",
+                type=int,
+                default=default,
+                help=f"Number of {name} to create (default {default})"
+            )
+        parser.add_argument(
+            "--skew",
+            type=float,
+            default=1.1,
+            help=(
+                "Zipf exponent of the rating distribution: higher values "
+                "concentrate ratings on fewer media and users"
+            )
+        )
+        parser.add_argument("--seed", type=int, default=None)
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        # Keeps unique names unique across repeated runs.
+        self.run_tag = uuid.uuid4().hex[:6]
+        started = time.perf_counter()
+
+        creators = self.create_creators(options["creators"])
+        genres = self.create_genres(options["genres"])
+        users = self.create_users(options["users"])
+        media_ids = [
+            *self.create_media(Book, options["books"], self.book_fields),
+            *self.create_media(Film, options["films"], self.film_fields),
+            *self.create_media(Series, options["series"], self.series_fields),
+        ]
+        self.link_media(media_ids, creators, genres)
+        ratings = self.create_ratings(
+            media_ids, users, options["ratings"], options["skew"]
+        )
+
+        sync_derived_data(creators, genres, users)
+        # Bulk inserted ratings send no signals to do this.
+        bump_version("ratings")
+        call_command(
+            "recompute_rating_aggregates",
+            batch_size=self.batch_size,
+            stdout=self.stdout
+        )
+        call_command(
+            "refresh_leaderboards",
+            batch_size=self.batch_size,
+            stdout=self.stdout
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(creators)} creators, {len(genres)} genres, "
+            f"{len(media_ids)} media, {len(users)} users and {ratings} "
+            f"ratings in {time.perf_counter() - started:.1f}s"
+        ))
+
+    def title(self, words: int = 3) -> str:
+        return " ".join(self.random.sample(WORDS, words)).capitalize()
+
+    def description(self) -> str:
+        sentences = (
+            f"A {' '.join(self.random.sample(WORDS, 4))} story."
+            for _ in range(self.random.randint(3, 8))
+        )
+        return " ".join(sentences)
+
+    def create_creators(self, count: int) -> list[Creator]:
+        creators = [
+            Creator(
+                first_name=self.random.choice(FIRST_NAMES),
+                last_name=f"{self.random.choice(LAST_NAMES)} "
+                          f"{self.run_tag}-{index}",
+                birth_date=datetime.date(1900, 1, 1) + datetime.timedelta(
+                    days=self.random.randint(0, 36500)
+                )
+            )
+            for index in range(count)
+        ]
+        return Creator.objects.bulk_create(
+            creators, batch_size=self.batch_size
+        )
+
+    def create_genres(self, count: int) -> list[Genre]:
+        genres = [
+            Genre(name=f"{GENRE_NAMES[index % len(GENRE_NAMES)]} "
+                       f"{self.run_tag}-{index}")
+            for index in range(count)
+        ]
+        return Genre.objects.bulk_create(genres, batch_size=self.batch_size)
+
+    def create_users(self, count: int) -> list[MediaUser]:
+        password = make_password("password")
+        users = [
+            MediaUser(
+                username=f"user_{self.run_tag}_{index}",
+                password=password
+            )
+            for index in range(count)
+        ]
+        return MediaUser.objects.bulk_create(
+            users, batch_size=self.batch_size
+        )
+
+    def common_fields(self) -> dict:
+        return {
+            "title": self.title(self.random.randint(1, 4)),
+            "description": self.description(),
+            "created_at": datetime.date(1950, 1, 1) + datetime.timedelta(
+                days=self.random.randint(0, 27000)
+            ),
+            "created_by": "generate_catalog",
+        }
+
+    def book_fields(self) -> dict:
+        return {
+            "chapters": self.random.randint(1, 300),
+            "type": self.random.choice(Book.BookTypeChoices.values),
+        }
+
+    def film_fields(self) -> dict:
+        return {
+            "country": self.random.choice(COUNTRIES),
+            "duration": datetime.time(
+                self.random.randint(1, 3), self.random.randint(0, 59)
+            ),
+        }
+
+    def series_fields(self) -> dict:
+        return {
+            "country": self.random.choice(COUNTRIES),
+            "status": self.random.choice(StatusChoices.values),
+            "seasons": self.random.randint(1, 12),
+            "series_number": self.random.randint(1, 500),
+            "type": self.random.choice(Series.SeriesChoices.values),
+        }
+
+    def create_media(self, model, count: int, extra_fields) -> list[int]:
+        objects = [
+            model(**self.common_fields(), **extra_fields())
+            for _ in range(count)
+        ]
+        bulk_create_media(model, objects, batch_size=self.batch_size)
+        return [obj.pk for obj in objects]
+
+    def link_media(self, media_ids, creators, genres) -> None:
+        if creators:
+            bulk_link_media("creators", (
+                (media_id, creator.pk)
+                for media_id in media_ids
+                for creator in self.random.sample(
+                    creators, min(len(creators), self.random.randint(1, 3))
+                )
+            ), batch_size=self.batch_size)
+        if genres:
+            bulk_link_media("genres", (
+                (media_id, genre.pk)
+                for media_id in media_ids
+                for genre in self.random.sample(
+                    genres, min(len(genres), self.random.randint(1, 4))
+                )
+            ), batch_size=self.batch_size)
+
+    def skewed_weights(self, count: int, skew: float) -> list[float]:
+        return list(itertools.accumulate(
+            1 / (rank ** skew) for rank in range(1, count + 1)
+        ))
+
+    def create_ratings(self, media_ids, users, count, skew) -> int:
+        if not media_ids or not users:
+            return 0
+
+        count = min(count, len(media_ids) * len(users))
+        media_ids = self.random.sample(media_ids, len(media_ids))
+        user_ids = self.random.sample(
+            [user.pk for user in users], len(users)
+        )
+        media_weights = self.skewed_weights(len(media_ids), skew)
+        user_weights = self.skewed_weights(len(user_ids), skew)
+
+        pairs = set()
+        created = 0
+        # Give up on the skewed draw once it keeps hitting taken pairs.
+        attempts = count * 20
+        while created < count and attempts > 0:
+            size = min(self.batch_size, count - created)
+            batch = []
+            for media_id, user_id in zip(
+                self.random.choices(media_ids, cum_weights=media_weights,
+                                    k=size),
+                self.random.choices(user_ids, cum_weights=user_weights,
+                                    k=size),
+            ):
+                attempts -= 1
+                if (media_id, user_id) in pairs:
+                    continue
+                pairs.add((media_id, user_id))
+                batch.append(self.rating(media_id, user_id))
+
+            UserMediaRating.objects.bulk_create(batch)
+            created += len(batch)
+        return created
+
+    def rating(self, media_id: int, user_id: int) -> UserMediaRating:
+        has_score = self.random.random() < 0.8
+        return UserMediaRating(
+            media_id=media_id,
+            user_id=user_id,
+            rating=(
+                Decimal(self.random.randint(0, 20)) / 2
+                if has_score else None
+            ),
+            review=self.description() if self.random.random() < 0.3 else None,
+            status=self.random.choice(StatusChoices.values),
+            is_hidden=self.random.random() < 0.1
+        )
@@ -0,0 +1,145 @@
+import csv
+import itertools
+import json
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from media.bulk import sync_derived_data
+from media.importing import InvalidRecord, MediaImporter, parse_record
+from media.models import ImportCheckpoint
+from media.search.trigram import unindexed_objects
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream books, films and series from a JSONL or CSV file into the "
+        "catalog with batched bulk inserts"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="JSONL or CSV file to import")
+        parser.add_argument(
+            "--format",
+            choices=("jsonl", "csv"),
+            help="Input format (guessed from the file extension by default)"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Records written per transaction"
+        )
+        parser.add_argument(
+            "--checkpoint",
+            help=(
+                "Name under which the number of committed records is "
+                "saved (defaults to the absolute path of the file)"
+            )
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Ignore an existing checkpoint and import from the start"
+        )
+        parser.add_argument(
+            "--strict",
+            action="store_true",
+            help="Stop at the first invalid record instead of skipping it"
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        if not path.is_file():
+            raise CommandError(f"{path} does not exist")
+
+        file_format = options["format"] or (
+            "csv" if path.suffix.lower() == ".csv" else "jsonl"
+        )
+        checkpoint = options["checkpoint"] or str(path.resolve())
+        start = 0 if options["restart"] else self.read_checkpoint(
+            checkpoint, path
+        )
+        if start:
+            self.stdout.write(f"Resuming after record {start}")
+
+        importer = MediaImporter(batch_size=options["batch_size"])
+        imported = skipped = 0
+        position = start
+        started = time.perf_counter()
+
+        with path.open(newline="", encoding="utf-8") as file:
+            records = itertools.islice(
+                self.read_records(file, file_format), start, None
+            )
+            while batch := list(
+                itertools.islice(records, options["batch_size"])
+            ):
+                parsed = []
+                for number, record in enumerate(batch, start=position + 1):
+                    try:
+                        parsed.append(parse_record(record))
+                    except InvalidRecord as error:
+                        if options["strict"]:
+                            raise CommandError(f"Record {number}: {error}")
+                        skipped += 1
+                        self.stderr.write(f"Skipped record {number}: {error}")
+
+                with transaction.atomic():
+                    imported += importer.import_batch(parsed)
+                    position += len(batch)
+                    self.write_checkpoint(checkpoint, path, position)
+
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"{position} records read, {imported} imported "
+                    f"({imported / elapsed:,.0f} records/s)"
+                )
+
+        # Creators and genres of an interrupted earlier run were never
+        # indexed, so the search rows are filled in from the database.
+        sync_derived_data(
+            unindexed_objects("creator"), unindexed_objects("genre")
+        )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {imported} media, skipped {skipped} invalid records "
+            f"and created {len(importer.new_creators)} creators and "
+            f"{len(importer.new_genres)} genres in {elapsed:.1f}s "
+            f"({imported / elapsed if elapsed else imported:,.0f} records/s)"
+        ))
+
+    def read_records(self, file, file_format):
+        if file_format == "csv":
+            yield from csv.DictReader(file)
+            return
+
+        for number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as error:
+                raise CommandError(f"Line {number} is not valid JSON: {error}")
+            if not isinstance(record, dict):
+                raise CommandError(f"Line {number} is not a JSON object")
+            yield record
+
+    def read_checkpoint(self, checkpoint: str, path: Path) -> int:
+        state = ImportCheckpoint.objects.filter(name=checkpoint).first()
+        if state is None:
+            return 0
+        if state.source != str(path.resolve()):
+            raise CommandError(
+                f"Checkpoint {checkpoint} belongs to {state.source}; "
+                f"pass --restart or another --checkpoint"
+            )
+        return state.records
+
+    def write_checkpoint(self, checkpoint: str, path: Path, records: int):
+        ImportCheckpoint.objects.update_or_create(
+            name=checkpoint,
+            defaults={"source": str(path.resolve()), "records": records}
+        )
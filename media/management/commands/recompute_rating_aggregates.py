@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from media.aggregates import recompute_rating_aggregates
+from media.models import Media
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the stored rating aggregates of every media "
+        "from the user_media_rating table"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of media rows recomputed per batch"
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        last_pk = 0
+        updated = 0
+
+        while True:
+            media_ids = list(
+                Media.objects
+                .filter(pk__gt=last_pk)
+                .order_by("pk")
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            if not media_ids:
+                break
+
+            updated += recompute_rating_aggregates(media_ids)
+            last_pk = media_ids[-1]
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Recomputed aggregates of {updated} media")
+        )
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from media.statistics import reconcile_statistics
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount the site statistics shown on the home page "
+        "from the users, media and rating tables"
+    )
+
+    def handle(self, *args, **options):
+        statistics = reconcile_statistics()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Reconciled statistics: {statistics.users_count} users, "
+                f"{statistics.media_count} media "
+                f"({statistics.books_count} books, "
+                f"{statistics.films_count} films, "
+                f"{statistics.series_count} series), "
+                f"{statistics.ratings_count} ratings"
+            )
+        )
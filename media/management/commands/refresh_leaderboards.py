@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from media.leaderboards import rebuild_leaderboards
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the top media per genre and type and the top raters "
+        "from the rating aggregates, e.g. after bulk imports or on a "
+        "schedule"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of media or users ranked per batch"
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1")
+
+        started = time.perf_counter()
+        media_rows, rater_rows = rebuild_leaderboards(options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored {media_rows} media and {rater_rows} rater leaderboard "
+            f"rows in {time.perf_counter() - started:.1f} s"
+        ))
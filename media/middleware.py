@@ -0,0 +1,71 @@
+import logging
+
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from media.preferences import Preferences
+from media.query_budget import format_overrun, get_query_budget
+from media.routers import is_pinned, pin_to_primary, replica_reads
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetMiddleware:
+    """Log a warning when a request runs more queries than its view allows.
+
+    Only active with ``DEBUG`` on, since counting needs the debug cursor.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DEBUG:
+            return self.get_response(request)
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.get_response(request)
+
+        match = request.resolver_match
+        budget = get_query_budget(match.func) if match else None
+        if budget is not None and len(context.captured_queries) > budget:
+            logger.warning(format_overrun(
+                match.view_name, context.captured_queries, budget
+            ))
+        return response
+
+
+class PreferencesMiddleware:
+    """Expose ``request.preferences`` and store them when they change."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.preferences = Preferences(request)
+        response = self.get_response(request)
+        request.preferences.save(response)
+        return response
+
+
+class ReplicaPinningMiddleware:
+    """Read from the replicas on safe requests, unless the client wrote
+    in the last ``REPLICA_PIN_SECONDS``.
+
+    Any other request reads from the primary and pins the client to it
+    with a signed cookie, so it sees its own writes while the replicas
+    catch up. A cookie rather than the session keeps the decision free
+    of queries.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        safe = request.method in ("GET", "HEAD", "OPTIONS")
+        with replica_reads(safe and not is_pinned(request)):
+            response = self.get_response(request)
+        if not safe:
+            pin_to_primary(response)
+        return response
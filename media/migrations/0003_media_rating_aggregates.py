@@ -0,0 +1,66 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:12
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    Media = apps.get_model('media', 'Media')
+    UserMediaRating = apps.get_model('media', 'UserMediaRating')
+
+    rows = (
+        UserMediaRating.objects
+        .filter(is_hidden=False)
+        .order_by()
+        .values('media_id')
+        .annotate(
+            reviews=Count('id'),
+            ratings=Count('rating'),
+            total=Sum('rating')
+        )
+    )
+    for row in rows.iterator():
+        total = row['total'] or Decimal(0)
+        Media.objects.filter(pk=row['media_id']).update(
+            reviews_num=row['reviews'],
+            ratings_num=row['ratings'],
+            ratings_sum=total,
+            reviews_avg=(
+                float(total) / row['ratings'] if row['ratings'] else None
+            )
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0002_media_creator_genre_usermediarating_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='media',
+            name='ratings_num',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='media',
+            name='ratings_sum',
+            field=models.DecimalField(decimal_places=1, default=0, editable=False, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='media',
+            name='reviews_avg',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='media',
+            name='reviews_num',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(
+            backfill_rating_aggregates, migrations.RunPython.noop
+        ),
+    ]
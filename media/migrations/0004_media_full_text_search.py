@@ -0,0 +1,14 @@
+from django.db import migrations
+
+from media.search.schema import install_search_schema, uninstall_search_schema
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0003_media_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_schema, uninstall_search_schema),
+    ]
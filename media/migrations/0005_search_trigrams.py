@@ -0,0 +1,68 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:17
+
+from django.db import migrations, models
+
+from media.search.trigram import trigrams
+
+TRIGRAM_COLUMNS = (
+    ('creator', 'Creator', 'media_creator', 'first_name'),
+    ('genre', 'Genre', 'media_genre', 'name'),
+    ('user', 'MediaUser', 'media_mediauser', 'username'),
+)
+
+
+def install_trigram_search(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for kind, _, table, column in TRIGRAM_COLUMNS:
+            schema_editor.execute(
+                f'CREATE INDEX IF NOT EXISTS {table}_{column}_trgm_idx '
+                f'ON {table} USING GIN (UPPER({column}::text) gin_trgm_ops)'
+            )
+        return
+
+    SearchTrigram = apps.get_model('media', 'SearchTrigram')
+    for kind, model_name, _, column in TRIGRAM_COLUMNS:
+        model = apps.get_model('media', model_name)
+        rows = model.objects.values_list('pk', column).iterator()
+        SearchTrigram.objects.bulk_create(
+            (
+                SearchTrigram(kind=kind, object_id=pk, trigram=trigram)
+                for pk, value in rows
+                for trigram in trigrams(value or '')
+            ),
+            batch_size=1000
+        )
+
+
+def uninstall_trigram_search(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for _, _, table, column in TRIGRAM_COLUMNS:
+            schema_editor.execute(
+                f'DROP INDEX IF EXISTS {table}_{column}_trgm_idx'
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0004_media_full_text_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTrigram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('trigram', models.CharField(max_length=3)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'trigram', 'object_id'], name='media_searc_kind_a572cf_idx'), models.Index(fields=['kind', 'object_id'], name='media_searc_kind_32ec47_idx')],
+            },
+        ),
+        migrations.RunPython(
+            install_trigram_search, uninstall_trigram_search
+        ),
+    ]
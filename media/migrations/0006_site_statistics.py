@@ -0,0 +1,46 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:23
+
+from django.db import migrations, models
+
+
+def create_site_statistics(apps, schema_editor):
+    get = apps.get_model
+    get('media', 'SiteStatistics').objects.update_or_create(
+        pk=1,
+        defaults={
+            'users_count': get('media', 'MediaUser').objects.count(),
+            'media_count': get('media', 'Media').objects.count(),
+            'ratings_count': get('media', 'UserMediaRating').objects.count(),
+            'books_count': get('media', 'Book').objects.count(),
+            'films_count': get('media', 'Film').objects.count(),
+            'series_count': get('media', 'Series').objects.count(),
+        }
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0005_search_trigrams'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SiteStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('users_count', models.PositiveBigIntegerField(default=0)),
+                ('media_count', models.PositiveBigIntegerField(default=0)),
+                ('ratings_count', models.PositiveBigIntegerField(default=0)),
+                ('books_count', models.PositiveBigIntegerField(default=0)),
+                ('films_count', models.PositiveBigIntegerField(default=0)),
+                ('series_count', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'site statistics',
+            },
+        ),
+        migrations.RunPython(
+            create_site_statistics, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0006_site_statistics'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['type', 'media_ptr'], name='book_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='media',
+            index=models.Index(fields=['title', 'id'], name='media_title_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='series',
+            index=models.Index(fields=['status', 'media_ptr'], name='series_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usermediarating',
+            index=models.Index(condition=models.Q(('is_hidden', False)), fields=['media', 'id'], name='rating_visible_media_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usermediarating',
+            index=models.Index(condition=models.Q(('is_hidden', False)), fields=['user', 'id'], name='rating_visible_user_idx'),
+        ),
+    ]
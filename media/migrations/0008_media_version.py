@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-18 19:44
+
+from django.db import migrations, models
+
+from media.search.schema import install_search_schema
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0007_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='media',
+            name='version',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        # SQLite rebuilds media_media for the new column, dropping the
+        # full-text triggers.
+        migrations.RunPython(install_search_schema, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.1 on 2026-10-18 21:12
+
+import django.utils.timezone
+from django.db import migrations, models
+
+from media.search.schema import install_search_schema
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0008_media_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='media',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='usermediarating',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        # SQLite rebuilds media_media for the new column, dropping the
+        # full-text triggers.
+        migrations.RunPython(install_search_schema, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.1 on 2026-10-18 21:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0009_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarMedia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('score', models.FloatField()),
+                ('media', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='similar_media', to='media.media')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='media.media')),
+            ],
+            options={
+                'verbose_name_plural': 'similar media',
+                'ordering': ('media_id', 'rank'),
+                'constraints': [models.UniqueConstraint(fields=('media', 'rank'), name='unique_similar_rank')],
+            },
+        ),
+    ]
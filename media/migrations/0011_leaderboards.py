@@ -0,0 +1,44 @@
+# Generated by Django 5.2.1 on 2026-10-18 21:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0010_similar_media'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RaterLeaderboardEntry',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('reviews_num', models.PositiveIntegerField()),
+            ],
+            options={
+                'verbose_name_plural': 'rater leaderboard entries',
+                'ordering': ('-reviews_num', 'user_id'),
+                'indexes': [models.Index(fields=['-reviews_num', 'user'], name='rater_leaderboard_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='MediaLeaderboardEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('media_type', models.CharField(max_length=20)),
+                ('score', models.FloatField()),
+                ('ratings_num', models.PositiveIntegerField()),
+                ('genre', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='media.genre')),
+                ('media', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to='media.media')),
+            ],
+            options={
+                'verbose_name_plural': 'media leaderboard entries',
+                'ordering': ('-score', 'media_id'),
+                'indexes': [models.Index(fields=['genre', 'media_type', '-score', 'media'], name='leaderboard_rank_idx')],
+                'constraints': [models.UniqueConstraint(fields=('media', 'genre'), name='unique_leaderboard_media')],
+            },
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.1 on 2026-10-18 22:10
+
+import datetime
+import django.db.models.functions.comparison
+from django.db import migrations, models
+from django.db.models import F, FloatField
+from django.db.models.functions import Cast
+
+from media.search.schema import install_search_schema
+
+
+def compute_weighted_scores(apps, schema_editor):
+    Media = apps.get_model('media', 'Media')
+    Media.objects.using(schema_editor.connection.alias).update(
+        weighted_score=(
+            (Cast('ratings_sum', FloatField()) + 10 * 5.0)
+            / (F('ratings_num') + 10)
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0011_leaderboards'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='media',
+            name='release_order',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.comparison.Coalesce('created_at', models.Value(datetime.date(1, 1, 1))), output_field=models.DateField()),
+        ),
+        migrations.AddField(
+            model_name='media',
+            name='weighted_score',
+            field=models.FloatField(default=5.0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='media',
+            index=models.Index(fields=['-weighted_score', '-id'], name='media_weighted_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='media',
+            index=models.Index(fields=['-reviews_num', '-id'], name='media_reviews_num_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='media',
+            index=models.Index(fields=['-release_order', '-id'], name='media_release_order_idx'),
+        ),
+        migrations.RunPython(compute_weighted_scores, migrations.RunPython.noop),
+        # SQLite rebuilds media_media for the new columns, dropping the
+        # full-text triggers.
+        migrations.RunPython(install_search_schema, migrations.RunPython.noop),
+    ]
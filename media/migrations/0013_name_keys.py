@@ -0,0 +1,41 @@
+# Generated by Django 5.2.1 on 2026-10-18 22:25
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0012_sort_orders'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='creator',
+            name='name_key',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.text.Lower(django.db.models.functions.text.Concat('first_name', models.Value(' '), 'last_name')), output_field=models.CharField(max_length=511)),
+        ),
+        migrations.AddField(
+            model_name='creator',
+            name='reversed_name_key',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.text.Lower(django.db.models.functions.text.Concat('last_name', models.Value(' '), 'first_name')), output_field=models.CharField(max_length=511)),
+        ),
+        migrations.AddField(
+            model_name='genre',
+            name='name_key',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.text.Lower('name'), output_field=models.CharField(max_length=255)),
+        ),
+        migrations.AddIndex(
+            model_name='creator',
+            index=models.Index(fields=['name_key'], name='creator_name_key_idx', opclasses=('varchar_pattern_ops',)),
+        ),
+        migrations.AddIndex(
+            model_name='creator',
+            index=models.Index(fields=['reversed_name_key'], name='creator_reversed_name_key_idx', opclasses=('varchar_pattern_ops',)),
+        ),
+        migrations.AddIndex(
+            model_name='genre',
+            index=models.Index(fields=['name_key'], name='genre_name_key_idx', opclasses=('varchar_pattern_ops',)),
+        ),
+    ]
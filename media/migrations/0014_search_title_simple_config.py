@@ -0,0 +1,24 @@
+# Generated by Django 5.2.1 on 2026-10-18 22:40
+
+from django.db import migrations
+
+from media.search.schema import rebuild_search_schema
+
+
+def rebuild_postgres_search_vector(apps, schema_editor):
+    # The SQLite index stores titles as they are and needs no rebuild.
+    if schema_editor.connection.vendor == 'postgresql':
+        rebuild_search_schema(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0013_name_keys'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            rebuild_postgres_search_vector, migrations.RunPython.noop
+        ),
+    ]
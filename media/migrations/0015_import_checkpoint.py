@@ -0,0 +1,22 @@
+# Generated by Django 5.2.1 on 2026-10-18 21:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('media', '0014_search_title_simple_config'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=1024, unique=True)),
+                ('source', models.CharField(max_length=1024)),
+                ('records', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+    ]
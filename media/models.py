@@ -1,8 +1,22 @@
+import datetime
+
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import (MinValueValidator, MaxValueValidator,
                                     MinLengthValidator, MaxLengthValidator)
 from django.db import models
-from django.db.models import UniqueConstraint
+from django.db.models import Q, UniqueConstraint, Value
+from django.db.models.functions import Coalesce, Concat, Lower
+from django.utils import timezone
+
+from media.cache import new_version
+
+
+# The weighted score is a Bayesian average: every media is scored as if
+# it also had WEIGHTED_SCORE_PRIOR_RATINGS ratings of
+# WEIGHTED_SCORE_PRIOR_MEAN, so one 10/10 rating does not outrank many
+# good ones.
+WEIGHTED_SCORE_PRIOR_MEAN = 5.0
+WEIGHTED_SCORE_PRIOR_RATINGS = 10
 
 
 class StatusChoices(models.TextChoices):
@@ -16,6 +30,18 @@ class Creator(models.Model):
     middle_name = models.CharField(max_length=255, blank=True, null=True)
     last_name = models.CharField(max_length=255)
     birth_date = models.DateField()
+    # Lowercase "first last" and "last first" names the autocomplete
+    # matches prefixes of.
+    name_key = models.GeneratedField(
+        expression=Lower(Concat("first_name", Value(" "), "last_name")),
+        output_field=models.CharField(max_length=511),
+        db_persist=True
+    )
+    reversed_name_key = models.GeneratedField(
+        expression=Lower(Concat("last_name", Value(" "), "first_name")),
+        output_field=models.CharField(max_length=511),
+        db_persist=True
+    )
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
@@ -28,16 +54,42 @@ class Creator(models.Model):
                 fields=("first_name", "last_name", "birth_date")
             )
         ]
+        indexes = [
+            # The operator class lets PostgreSQL serve LIKE 'prefix%'
+            # from the index; other databases ignore it.
+            models.Index(
+                fields=("name_key",),
+                name="creator_name_key_idx",
+                opclasses=("varchar_pattern_ops",)
+            ),
+            models.Index(
+                fields=("reversed_name_key",),
+                name="creator_reversed_name_key_idx",
+                opclasses=("varchar_pattern_ops",)
+            ),
+        ]
 
 
 class Genre(models.Model):
     name = models.CharField(max_length=255, unique=True)
+    name_key = models.GeneratedField(
+        expression=Lower("name"),
+        output_field=models.CharField(max_length=255),
+        db_persist=True
+    )
 
     def __str__(self):
         return self.name
 
     class Meta:
         ordering = ("name",)
+        indexes = [
+            models.Index(
+                fields=("name_key",),
+                name="genre_name_key_idx",
+                opclasses=("varchar_pattern_ops",)
+            ),
+        ]
 
 
 class MediaUser(AbstractUser):
@@ -73,12 +125,75 @@ class Media(models.Model):
     genres = models.ManyToManyField(Genre, related_name="media")
     media_type = models.CharField(max_length=20, editable=False)
     created_by = models.CharField(max_length=255, editable=False)
+    reviews_num = models.PositiveIntegerField(default=0, editable=False)
+    ratings_num = models.PositiveIntegerField(default=0, editable=False)
+    ratings_sum = models.DecimalField(
+        max_digits=12,
+        decimal_places=1,
+        default=0,
+        editable=False
+    )
+    reviews_avg = models.FloatField(null=True, blank=True, editable=False)
+    weighted_score = models.FloatField(
+        default=WEIGHTED_SCORE_PRIOR_MEAN, editable=False
+    )
+    # Sorts media without a date after every dated one in newest first
+    # lists, which a nullable column cannot do with one index on every
+    # database.
+    release_order = models.GeneratedField(
+        expression=Coalesce("created_at", Value(datetime.date.min)),
+        output_field=models.DateField(),
+        db_persist=True
+    )
+    # Changes whenever anything shown on the media card does; cached
+    # fragments of the card are keyed by it.
+    version = models.PositiveBigIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets signals tell whether the title shown on the detail pages
+        # of similar media changed.
+        instance._loaded_title = instance.__dict__.get("title")
+        return instance
+
+    def save(self, *args, **kwargs):
+        self.version = new_version()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {
+                *update_fields, "version", "updated_at"
+            }
+        super().save(*args, **kwargs)
+
+    @staticmethod
+    def change_fields() -> dict:
+        """Values of the change tracking fields for updates that bypass
+        ``save()``."""
+        return {"version": new_version(), "updated_at": timezone.now()}
+
     class Meta:
         ordering = ("title",)
+        indexes = [
+            # Keyset pagination orders every media list by (title, id).
+            models.Index(fields=("title", "id"), name="media_title_id_idx"),
+            # The other sort orders of the media lists.
+            models.Index(
+                fields=("-weighted_score", "-id"),
+                name="media_weighted_score_idx"
+            ),
+            models.Index(
+                fields=("-reviews_num", "-id"), name="media_reviews_num_idx"
+            ),
+            models.Index(
+                fields=("-release_order", "-id"),
+                name="media_release_order_idx"
+            ),
+        ]
 
 
 class UserMediaRating(models.Model):
@@ -107,14 +222,153 @@ class UserMediaRating(models.Model):
         blank=True
     )
     is_hidden = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         constraints = [
             UniqueConstraint(name="unique_reviews", fields=("user", "media"))
         ]
+        indexes = [
+            # Most pages only show visible ratings, per media or per user.
+            models.Index(
+                fields=("media", "id"),
+                condition=Q(is_hidden=False),
+                name="rating_visible_media_idx"
+            ),
+            models.Index(
+                fields=("user", "id"),
+                condition=Q(is_hidden=False),
+                name="rating_visible_user_idx"
+            ),
+        ]
         db_table = "user_media_rating"
 
 
+class SearchTrigram(models.Model):
+    kind = models.CharField(max_length=20)
+    object_id = models.BigIntegerField()
+    trigram = models.CharField(max_length=3)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=("kind", "trigram", "object_id")),
+            models.Index(fields=("kind", "object_id")),
+        ]
+
+
+class SimilarMedia(models.Model):
+    """The nearest neighbours of a media, ``rank`` 0 being the most
+    similar, as computed by ``build_similar_media``."""
+    media = models.ForeignKey(
+        Media,
+        related_name="similar_media",
+        on_delete=models.CASCADE,
+        # Served by the unique (media, rank) index.
+        db_index=False
+    )
+    similar = models.ForeignKey(
+        Media,
+        related_name="+",
+        on_delete=models.CASCADE
+    )
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ("media_id", "rank")
+        constraints = [
+            # Also the index detail pages read the neighbours with.
+            UniqueConstraint(
+                name="unique_similar_rank", fields=("media", "rank")
+            )
+        ]
+        verbose_name_plural = "similar media"
+
+
+class MediaLeaderboardEntry(models.Model):
+    """A media ranked among the media of one genre and type, kept up to
+    date by ``media.leaderboards``."""
+    genre = models.ForeignKey(
+        Genre,
+        related_name="+",
+        on_delete=models.CASCADE,
+        # Served by the leaderboard index.
+        db_index=False
+    )
+    media_type = models.CharField(max_length=20)
+    media = models.ForeignKey(
+        Media,
+        related_name="leaderboard_entries",
+        on_delete=models.CASCADE,
+        # Served by the unique (media, genre) index, which refreshes go
+        # through.
+        db_index=False
+    )
+    score = models.FloatField()
+    ratings_num = models.PositiveIntegerField()
+
+    class Meta:
+        ordering = ("-score", "media_id")
+        constraints = [
+            UniqueConstraint(
+                name="unique_leaderboard_media",
+                fields=("media", "genre")
+            )
+        ]
+        indexes = [
+            # A page of a leaderboard is one range of this index.
+            models.Index(
+                fields=("genre", "media_type", "-score", "media"),
+                name="leaderboard_rank_idx"
+            ),
+        ]
+        verbose_name_plural = "media leaderboard entries"
+
+
+class RaterLeaderboardEntry(models.Model):
+    """The number of visible reviews of a user who wrote any."""
+    user = models.OneToOneField(
+        MediaUser,
+        primary_key=True,
+        related_name="+",
+        on_delete=models.CASCADE
+    )
+    reviews_num = models.PositiveIntegerField()
+
+    class Meta:
+        ordering = ("-reviews_num", "user_id")
+        indexes = [
+            models.Index(
+                fields=("-reviews_num", "user"),
+                name="rater_leaderboard_idx"
+            ),
+        ]
+        verbose_name_plural = "rater leaderboard entries"
+
+
+class SiteStatistics(models.Model):
+    users_count = models.PositiveBigIntegerField(default=0)
+    media_count = models.PositiveBigIntegerField(default=0)
+    ratings_count = models.PositiveBigIntegerField(default=0)
+    books_count = models.PositiveBigIntegerField(default=0)
+    films_count = models.PositiveBigIntegerField(default=0)
+    series_count = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "site statistics"
+
+
+class ImportCheckpoint(models.Model):
+    """How many records of an ``import_media`` source are committed.
+
+    It is saved in the transaction of each batch, so a resumed import
+    neither repeats nor skips records.
+    """
+    name = models.CharField(max_length=1024, unique=True)
+    source = models.CharField(max_length=1024)
+    records = models.PositiveBigIntegerField(default=0)
+
+
 class Film(Media):
     country = models.CharField(max_length=255)
     duration = models.TimeField()
@@ -137,6 +391,11 @@ class Book(Media):
     chapters = models.PositiveSmallIntegerField()
     type = models.CharField(max_length=65, choices=BookTypeChoices.choices)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=("type", "media_ptr"), name="book_type_idx"),
+        ]
+
     def save(self, *args, **kwargs):
         if not self.media_type:
             self.media_type = "Book"
@@ -157,6 +416,13 @@ class Series(Media):
     series_number = models.PositiveIntegerField()
     type = models.CharField(max_length=65, choices=SeriesChoices.choices)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=("status", "media_ptr"), name="series_status_idx"
+            ),
+        ]
+
     def save(self, *args, **kwargs):
         if not self.media_type:
             self.media_type = "Series"
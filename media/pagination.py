@@ -0,0 +1,166 @@
+import base64
+import binascii
+import json
+from typing import Any, Optional, Sequence
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Field, Q, QuerySet
+
+FORWARD = "n"
+BACKWARD = "p"
+
+
+def encode_cursor(values: Sequence[Any], direction: str) -> str:
+    payload = json.dumps(
+        {"v": list(values), "d": direction},
+        cls=DjangoJSONEncoder,
+        separators=(",", ":")
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Optional[tuple[list, str]]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values, direction = payload["v"], payload["d"]
+    except (ValueError, TypeError, KeyError, binascii.Error):
+        return None
+
+    if not isinstance(values, list) or direction not in (FORWARD, BACKWARD):
+        return None
+    return values, direction
+
+
+class CursorPage:
+    is_cursor_page = True
+
+    def __init__(
+            self,
+            object_list: list,
+            next_cursor: Optional[str],
+            previous_cursor: Optional[str]
+    ):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """Paginate a queryset by the values of its ordering columns.
+
+    Unlike ``django.core.paginator.Paginator`` it never counts the rows
+    and never uses OFFSET, so every page costs one indexed range read.
+    The last ordering field must be unique (usually ``id``).
+    """
+
+    def __init__(
+            self,
+            queryset: QuerySet,
+            per_page: int,
+            ordering: Sequence[str]
+    ):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = [
+            (field.lstrip("-"), field.startswith("-")) for field in ordering
+        ]
+
+    def page(self, cursor: Optional[str] = None) -> CursorPage:
+        decoded = decode_cursor(cursor) if cursor else None
+        values = self._clean(decoded[0]) if decoded else None
+        direction = decoded[1] if values is not None else FORWARD
+
+        backward = direction == BACKWARD
+        queryset = self.queryset.order_by(*self._order_by(backward))
+        if values is not None:
+            queryset = queryset.filter(self._after(values, backward))
+
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backward:
+            rows.reverse()
+
+        if not rows:
+            return CursorPage(rows, None, None)
+
+        has_next = True if backward else has_more
+        has_previous = has_more if backward else values is not None
+        return CursorPage(
+            rows,
+            self._cursor(rows[-1], FORWARD) if has_next else None,
+            self._cursor(rows[0], BACKWARD) if has_previous else None
+        )
+
+    def _clean(self, values: list) -> Optional[list]:
+        """The cursor ``values`` as the types of their ordering fields, or
+        None when they do not fit them, e.g. a tampered cursor or one
+        from another ordering of the list."""
+        if len(values) != len(self.ordering):
+            return None
+        try:
+            values = [
+                self._field(field).to_python(value)
+                for (field, _), value in zip(self.ordering, values)
+            ]
+        except (ValueError, TypeError, ValidationError):
+            return None
+        if any(value is None for value in values):
+            return None
+        return values
+
+    def _field(self, path: str) -> Field:
+        annotation = self.queryset.query.annotations.get(path)
+        if annotation is not None:
+            return annotation.output_field
+        model = self.queryset.model
+        *relations, name = path.split("__")
+        for relation in relations:
+            model = model._meta.get_field(relation).related_model
+        field = model._meta.get_field(name)
+        return field.output_field if field.generated else field
+
+    def _order_by(self, backward: bool) -> list[str]:
+        return [
+            f"{'-' if descending != backward else ''}{field}"
+            for field, descending in self.ordering
+        ]
+
+    def _after(self, values: list, backward: bool) -> Q:
+        condition = Q()
+        for index, (field, descending) in enumerate(self.ordering):
+            lookup = "lt" if descending != backward else "gt"
+            step = Q(**{f"{field}__{lookup}": values[index]})
+            for position, (previous, _) in enumerate(self.ordering[:index]):
+                step &= Q(**{previous: values[position]})
+            condition |= step
+        return condition
+
+    def _cursor(self, obj: Any, direction: str) -> str:
+        return encode_cursor(
+            [self._value(obj, field) for field, _ in self.ordering],
+            direction
+        )
+
+    @staticmethod
+    def _value(obj: Any, field: str) -> Any:
+        for attribute in field.split("__"):
+            obj = getattr(obj, attribute)
+        return obj
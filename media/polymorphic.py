@@ -0,0 +1,53 @@
+from collections import defaultdict
+from typing import Iterable
+
+from media.models import Book, Film, Media, Series
+
+MEDIA_SUBTYPES = {
+    "Book": Book,
+    "Film": Film,
+    "Series": Series,
+}
+
+
+def hydrate_media(media_list: Iterable[Media]) -> list[Media]:
+    """Replace ``Media`` rows with their Book, Film or Series objects.
+
+    The subtype rows are loaded with one query per ``media_type`` present,
+    reading only the child table. Everything already loaded on the
+    ``Media`` instances is copied over: parent columns, annotations and
+    prefetched ``to_attr`` lists. Order is preserved, and rows without a
+    known subtype are returned as they are.
+    """
+    media_list = list(media_list)
+    ids_by_type = defaultdict(list)
+    for media in media_list:
+        if media.media_type in MEDIA_SUBTYPES:
+            ids_by_type[media.media_type].append(media.pk)
+
+    typed = {}
+    for media_type, ids in ids_by_type.items():
+        model = MEDIA_SUBTYPES[media_type]
+        child_fields = [
+            field.name for field in model._meta.local_concrete_fields
+        ]
+        # Without an ordering the query never joins the parent table.
+        subtypes = model.objects.filter(pk__in=ids).only(*child_fields)
+        for obj in subtypes.order_by():
+            typed[obj.pk] = obj
+
+    hydrated = []
+    for media in media_list:
+        obj = typed.get(media.pk)
+        if obj is None:
+            hydrated.append(media)
+            continue
+        for name, value in media.__dict__.items():
+            if name != "_state" and name not in obj.__dict__:
+                obj.__dict__[name] = value
+        obj._prefetched_objects_cache = {
+            **getattr(media, "_prefetched_objects_cache", {}),
+            **getattr(obj, "_prefetched_objects_cache", {}),
+        }
+        hydrated.append(obj)
+    return hydrated
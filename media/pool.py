@@ -0,0 +1,43 @@
+from typing import Optional
+
+from django.db import connections
+
+# Counters psycopg only reports once they are non-zero.
+POOL_COUNTERS = (
+    "requests_num", "requests_queued", "requests_wait_ms",
+    "requests_errors", "usage_ms", "connections_num", "connections_ms",
+    "connections_errors", "connections_lost", "returns_bad",
+)
+
+
+def pool_stats(using: str = "default") -> Optional[dict]:
+    """Size and usage counters of the connection pool of ``using``, or
+    ``None`` when its backend does not pool connections.
+
+    ``requests_num`` counts checkouts and ``requests_wait_ms`` the time
+    they spent waiting for a free connection, both since the pool opened.
+    """
+    pool = getattr(connections[using], "pool", None)
+    if pool is None:
+        return None
+    stats = dict.fromkeys(POOL_COUNTERS, 0)
+    stats.update(pool.get_stats())
+    return stats
+
+
+def pool_usage(before: Optional[dict], after: Optional[dict]) -> dict:
+    """Checkouts, waits and new connections between two ``pool_stats``."""
+    if before is None or after is None:
+        return {}
+    checkouts = after["requests_num"] - before["requests_num"]
+    wait_ms = after["requests_wait_ms"] - before["requests_wait_ms"]
+    return {
+        "checkouts": checkouts,
+        "queued": after["requests_queued"] - before["requests_queued"],
+        "wait_ms": wait_ms,
+        "mean_wait_ms": round(wait_ms / checkouts, 3) if checkouts else 0,
+        "connections_opened": (
+            after["connections_num"] - before["connections_num"]
+        ),
+        "errors": after["requests_errors"] - before["requests_errors"],
+    }
@@ -0,0 +1,63 @@
+import json
+from typing import Any
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+
+COOKIE_NAME = "preferences"
+COOKIE_SALT = "media.preferences"
+COOKIE_MAX_AGE = 60 * 60 * 24 * 365
+
+
+class Preferences:
+    """Interface preferences of a visitor, kept in one signed cookie.
+
+    Unlike the session, reading them needs no query and writing them no
+    UPDATE. The cookie is parsed at most once per request and sent back
+    only when a value actually changed.
+    """
+
+    def __init__(self, request: HttpRequest):
+        self._request = request
+        self._values = None
+        self.changed = False
+
+    @property
+    def values(self) -> dict:
+        if self._values is None:
+            raw = self._request.get_signed_cookie(
+                COOKIE_NAME,
+                default=None,
+                salt=COOKIE_SALT,
+                max_age=COOKIE_MAX_AGE
+            )
+            try:
+                values = json.loads(raw) if raw else {}
+            except ValueError:
+                values = {}
+            self._values = values if isinstance(values, dict) else {}
+        return self._values
+
+    def __getitem__(self, name: str) -> Any:
+        return self.values[name]
+
+    def get(self, name: str, default: Any = None) -> Any:
+        return self.values.get(name, default)
+
+    def set(self, name: str, value: Any) -> None:
+        if self.values.get(name) != value:
+            self.values[name] = value
+            self.changed = True
+
+    def save(self, response: HttpResponse) -> None:
+        if not self.changed:
+            return
+        response.set_signed_cookie(
+            COOKIE_NAME,
+            json.dumps(self.values, separators=(",", ":")),
+            salt=COOKIE_SALT,
+            max_age=COOKIE_MAX_AGE,
+            secure=settings.SESSION_COOKIE_SECURE,
+            httponly=True,
+            samesite="Lax"
+        )
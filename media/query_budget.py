@@ -0,0 +1,82 @@
+import re
+from collections import Counter
+from typing import Callable, Optional
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+
+
+def query_budget(limit: int) -> Callable:
+    """Declare how many SQL queries a request to the view may run.
+
+    Works on view classes and on view functions; a view class may also
+    set the ``query_budget`` attribute directly.
+    """
+
+    def decorator(view):
+        view.query_budget = limit
+        return view
+
+    return decorator
+
+
+def get_query_budget(view_func: Callable) -> Optional[int]:
+    view = getattr(view_func, "view_class", view_func)
+    return getattr(view, "query_budget", None)
+
+
+def fingerprint(sql: str) -> str:
+    """Return ``sql`` with literals and IN lists replaced by placeholders."""
+    sql = _LITERALS.sub("?", sql)
+    sql = _PLACEHOLDER_LISTS.sub("(...)", sql)
+    return " ".join(sql.split())
+
+
+def duplicated_fingerprints(queries: list[dict]) -> list[tuple[str, int]]:
+    counts = Counter(fingerprint(query["sql"]) for query in queries)
+    return [(sql, count) for sql, count in counts.most_common() if count > 1]
+
+
+def format_overrun(view_name: str, queries: list[dict], budget: int) -> str:
+    lines = [
+        f"{view_name} ran {len(queries)} queries, "
+        f"over its budget of {budget}."
+    ]
+    duplicates = duplicated_fingerprints(queries)
+    if duplicates:
+        lines.append("Duplicated queries:")
+        lines.extend(f"  {count}x {sql}" for sql, count in duplicates)
+    return "\n".join(lines)
+
+
+class QueryBudgetTestMixin:
+    """TestCase mixin that checks a URL against its view's query budget.
+
+    The URL is requested once beforehand to settle one-off work like the
+    content type cache, then the shared cache is cleared, so the budget
+    holds for the first request after a deploy or an eviction too.
+    """
+
+    def assertWithinQueryBudget(self, url: str, data: dict = None):
+        self.client.get(url, data)
+        cache.clear()
+        match = resolve(url)
+        budget = get_query_budget(match.func)
+        self.assertIsNotNone(
+            budget, f"{match.view_name} declares no query budget"
+        )
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, data)
+
+        self.assertEqual(response.status_code, 200)
+        if len(context.captured_queries) > budget:
+            self.fail(format_overrun(
+                match.view_name, context.captured_queries, budget
+            ))
+        return response
@@ -0,0 +1,98 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+from django.utils import timezone
+
+PIN_COOKIE_NAME = "primary_pin"
+PIN_COOKIE_SALT = "media.routers.pin"
+
+_replica_reads = ContextVar("replica_reads", default=False)
+
+
+def reads_from_replica() -> bool:
+    return (
+        _replica_reads.get()
+        and bool(settings.DATABASE_REPLICAS)
+        and not connections["default"].in_atomic_block
+    )
+
+
+@contextmanager
+def replica_reads(enabled: bool = True):
+    """Send the reads of the enclosed code to the replicas, or keep them
+    on the primary with ``enabled=False``."""
+    token = _replica_reads.set(enabled)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def may_be_stale(changed_at: datetime) -> bool:
+    """Whether data read now may predate a change made at ``changed_at``.
+
+    Replicas replay the primary's writes with a delay, so a value read
+    from them less than ``REPLICA_PIN_SECONDS`` after a change must not
+    be cached under the version of that change.
+    """
+    window = timedelta(seconds=settings.REPLICA_PIN_SECONDS)
+    return reads_from_replica() and timezone.now() - changed_at < window
+
+
+def is_pinned(request: HttpRequest) -> bool:
+    return request.get_signed_cookie(
+        PIN_COOKIE_NAME,
+        default=None,
+        salt=PIN_COOKIE_SALT,
+        max_age=settings.REPLICA_PIN_SECONDS
+    ) is not None
+
+
+def pin_to_primary(response: HttpResponse) -> None:
+    """Keep the reads of the client on the primary until the replicas
+    have caught up with its write."""
+    response.set_signed_cookie(
+        PIN_COOKIE_NAME,
+        "1",
+        salt=PIN_COOKIE_SALT,
+        max_age=settings.REPLICA_PIN_SECONDS,
+        secure=settings.SESSION_COOKIE_SECURE,
+        httponly=True,
+        samesite="Lax"
+    )
+
+
+class PrimaryReplicaRouter:
+    """Route reads to a random alias of ``DATABASE_REPLICAS`` while
+    replica reads are on, and everything else to ``default``.
+
+    ``ReplicaPinningMiddleware`` turns replica reads on for safe requests
+    only, so commands, shells and writing requests read from the primary.
+    So do reads inside a transaction on the primary, and reads of a
+    database backed cache.
+    """
+
+    def db_for_read(self, model, **hints):
+        # DatabaseCache entries hold versions and invalidations, which
+        # must not lag behind their writes.
+        if model._meta.app_label == "django_cache":
+            return "default"
+        if reads_from_replica():
+            return random.choice(settings.DATABASE_REPLICAS)
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema through replication.
+        return db not in settings.DATABASE_REPLICAS
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.db import connections
+from django.utils.module_loading import import_string
+
+from media.search.fulltext import (
+    BaseSearchBackend,
+    PostgresSearchBackend,
+    SQLiteSearchBackend,
+)
+
+SEARCH_BACKENDS = {
+    "postgresql": PostgresSearchBackend,
+    "sqlite": SQLiteSearchBackend,
+}
+
+
+def get_search_backend(using: str = "default") -> BaseSearchBackend:
+    backend_path = getattr(settings, "MEDIA_SEARCH_BACKEND", None)
+    if backend_path:
+        return import_string(backend_path)()
+    return SEARCH_BACKENDS[connections[using].vendor]()
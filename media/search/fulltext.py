@@ -0,0 +1,119 @@
+import re
+
+from django.db.models import FloatField, QuerySet
+from django.db.models.expressions import RawSQL
+
+TERM_PATTERN = re.compile(r"\w+")
+
+
+def search_terms(query: str) -> list[str]:
+    return TERM_PATTERN.findall(query.lower())
+
+
+class BaseSearchBackend:
+    """Full-text search over ``Media.title`` and ``Media.description``.
+
+    Backends match every term of the query as a word prefix and expose
+    the matching media ids as a subquery, so callers can filter any
+    queryset that references media (``pk`` for media, ``media_id`` for
+    ratings) without joining the search structures.
+    """
+
+    def match_sql(self, terms: list[str]) -> tuple[str, list]:
+        raise NotImplementedError
+
+    def rank_sql(self, terms: list[str]) -> tuple[str, list]:
+        raise NotImplementedError
+
+    def search(
+            self,
+            queryset: QuerySet,
+            query: str,
+            lookup: str = "pk",
+            rank: bool = False
+    ) -> QuerySet:
+        terms = search_terms(query)
+        if not terms:
+            return queryset.none()
+
+        queryset = queryset.filter(
+            **{f"{lookup}__in": RawSQL(*self.match_sql(terms))}
+        )
+        if rank:
+            queryset = queryset.annotate(
+                search_rank=RawSQL(
+                    *self.rank_sql(terms), output_field=FloatField()
+                )
+            )
+        return queryset
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """Query the ``search_vector`` column maintained by the database.
+
+    The column is a stored generated ``tsvector`` with a GIN index, see
+    migration 0004. Titles use the ``simple`` configuration, which keeps
+    stopwords, so titles such as "It" stay searchable; descriptions use
+    ``english``. A query matches either way, so stemmed and stopword
+    terms both find their media.
+    """
+
+    title_config = "simple"
+    config = "english"
+
+    def tsquery(self, terms: list[str]) -> str:
+        return " & ".join(f"{term}:*" for term in terms)
+
+    def tsquery_sql(self, terms: list[str]) -> tuple[str, list]:
+        return (
+            "(to_tsquery(%s::regconfig, %s) || "
+            "to_tsquery(%s::regconfig, %s))",
+            [
+                self.title_config, self.tsquery(terms),
+                self.config, self.tsquery(terms)
+            ]
+        )
+
+    def match_sql(self, terms):
+        sql, params = self.tsquery_sql(terms)
+        return (
+            f"SELECT id FROM media_media WHERE search_vector @@ {sql}",
+            params
+        )
+
+    def rank_sql(self, terms):
+        sql, params = self.tsquery_sql(terms)
+        return f'ts_rank("media_media"."search_vector", {sql})', params
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    """Query the ``media_media_fts`` FTS5 shadow table.
+
+    The table indexes ``media_media`` as external content and is kept in
+    sync by triggers, see migration 0004.
+    """
+
+    title_weight = 10.0
+    description_weight = 1.0
+
+    def match_expression(self, terms: list[str]) -> str:
+        return " ".join(f'"{term}"*' for term in terms)
+
+    def match_sql(self, terms):
+        return (
+            "SELECT rowid FROM media_media_fts "
+            "WHERE media_media_fts MATCH %s",
+            [self.match_expression(terms)]
+        )
+
+    def rank_sql(self, terms):
+        return (
+            "(SELECT -bm25(media_media_fts, %s, %s) FROM media_media_fts "
+            "WHERE media_media_fts MATCH %s "
+            'AND rowid = "media_media"."id")',
+            [
+                self.title_weight,
+                self.description_weight,
+                self.match_expression(terms)
+            ]
+        )
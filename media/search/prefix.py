@@ -0,0 +1,29 @@
+from django.db import connections
+from django.db.models import Q
+
+# Sorts after every character, so ``key < prefix + PREFIX_END`` holds for
+# all keys starting with ``prefix``.
+PREFIX_END = "\U0010ffff"
+
+
+def prefix_match(
+        fields: tuple[str, ...], query: str, using: str = "default"
+) -> Q:
+    """Rows where any of the lowercase key ``fields`` starts with
+    ``query``, in a form the index of each field can serve.
+
+    PostgreSQL answers ``LIKE 'prefix%'`` from a ``varchar_pattern_ops``
+    index. SQLite only does so for NOCASE columns, so there the prefix is
+    a range of the binary ordered index instead.
+    """
+    prefix = query.lower()
+    condition = Q()
+    for field in fields:
+        if connections[using].vendor == "postgresql":
+            condition |= Q(**{f"{field}__startswith": prefix})
+        else:
+            condition |= Q(**{
+                f"{field}__gte": prefix,
+                f"{field}__lt": prefix + PREFIX_END,
+            })
+    return condition
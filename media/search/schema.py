@@ -0,0 +1,92 @@
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE media_media ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS media_media_search_vector_idx
+    ON media_media USING GIN (search_vector)
+    """,
+]
+
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS media_media_search_vector_idx",
+    "ALTER TABLE media_media DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS media_media_fts USING fts5(
+        title, description,
+        content='media_media', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS media_media_fts_insert
+    AFTER INSERT ON media_media BEGIN
+        INSERT INTO media_media_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS media_media_fts_delete
+    AFTER DELETE ON media_media BEGIN
+        INSERT INTO media_media_fts(media_media_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS media_media_fts_update
+    AFTER UPDATE OF title, description ON media_media BEGIN
+        INSERT INTO media_media_fts(media_media_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO media_media_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    "INSERT INTO media_media_fts(media_media_fts) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS media_media_fts_update",
+    "DROP TRIGGER IF EXISTS media_media_fts_delete",
+    "DROP TRIGGER IF EXISTS media_media_fts_insert",
+    "DROP TABLE IF EXISTS media_media_fts",
+]
+
+FORWARD = {
+    "postgresql": POSTGRES_FORWARD,
+    "sqlite": SQLITE_FORWARD,
+}
+
+BACKWARD = {
+    "postgresql": POSTGRES_BACKWARD,
+    "sqlite": SQLITE_BACKWARD,
+}
+
+
+def install_search_schema(apps, schema_editor):
+    """Create the full-text structures of the current database vendor.
+
+    Every statement is idempotent. SQLite drops triggers when Django
+    rebuilds ``media_media`` during a migration, so migrations altering
+    that table run this again afterwards.
+    """
+    for statement in FORWARD.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def uninstall_search_schema(apps, schema_editor):
+    for statement in BACKWARD.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def rebuild_search_schema(apps, schema_editor):
+    """Recreate the full-text structures after their definition changed;
+    installing alone keeps an existing generated column as it is."""
+    uninstall_search_schema(apps, schema_editor)
+    install_search_schema(apps, schema_editor)
@@ -0,0 +1,164 @@
+import math
+
+from django.db import connections
+from django.db.models import (
+    Count, FloatField, Func, IntegerField, Lookup, OuterRef, QuerySet,
+    Subquery, Value
+)
+from django.db.models.functions import Cast, Upper
+
+from media.models import Creator, Genre, MediaUser, SearchTrigram
+
+TRIGRAM_SOURCES = {
+    "creator": (Creator, "first_name"),
+    "genre": (Genre, "name"),
+    "user": (MediaUser, "username"),
+}
+
+SIMILARITY_THRESHOLD = 0.3
+
+
+def trigrams(text: str) -> set[str]:
+    text = text.lower()
+    return {text[index:index + 3] for index in range(len(text) - 2)}
+
+
+def uses_side_table(using: str = "default") -> bool:
+    return connections[using].vendor != "postgresql"
+
+
+def kind_for_model(model) -> str:
+    for kind, (source_model, _) in TRIGRAM_SOURCES.items():
+        if source_model is model:
+            return kind
+    raise LookupError(f"{model.__name__} is not trigram indexed")
+
+
+def index_object(kind: str, obj, using: str = "default") -> None:
+    unindex_object(kind, obj.pk, using)
+    index_objects(kind, [obj], using)
+
+
+def index_objects(kind: str, objects, using: str = "default") -> None:
+    """Index objects that have no trigram rows yet, e.g. bulk inserts."""
+    _, field = TRIGRAM_SOURCES[kind]
+    SearchTrigram.objects.using(using).bulk_create(
+        (
+            SearchTrigram(kind=kind, object_id=obj.pk, trigram=trigram)
+            for obj in objects
+            for trigram in trigrams(getattr(obj, field) or "")
+        ),
+        batch_size=1000
+    )
+
+
+def unindexed_objects(kind: str, using: str = "default") -> QuerySet:
+    """Objects without trigram rows, like those bulk inserted by an import
+    that stopped before indexing them."""
+    model, field = TRIGRAM_SOURCES[kind]
+    return model.objects.using(using).only(field).exclude(
+        pk__in=SearchTrigram.objects.using(using).filter(
+            kind=kind
+        ).values("object_id")
+    )
+
+
+def unindex_object(kind: str, pk: int, using: str = "default") -> None:
+    SearchTrigram.objects.using(using).filter(
+        kind=kind, object_id=pk
+    ).delete()
+
+
+class TrigramSimilar(Lookup):
+    lookup_name = "trigram_similar"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} %% {rhs}", [*lhs_params, *rhs_params]
+
+
+class TrigramSearch:
+    """Substring search with a "did you mean" fallback by similarity.
+
+    On Postgres ``icontains`` and the ``%`` operator are served by
+    ``pg_trgm`` GIN indexes on ``UPPER(column)``. Elsewhere candidates
+    come from the ``SearchTrigram`` side table, which stores the
+    trigrams of every indexed value.
+    """
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        _, self.field = TRIGRAM_SOURCES[kind]
+
+    def search(self, queryset: QuerySet, query: str) -> tuple[QuerySet, bool]:
+        """Return the matching queryset and whether it holds suggestions."""
+        matches = self.substring(queryset, query)
+        if matches.exists():
+            return matches, False
+        return self.similar(queryset, query), True
+
+    def substring(self, queryset: QuerySet, query: str) -> QuerySet:
+        queryset = queryset.filter(**{f"{self.field}__icontains": query})
+        grams = trigrams(query)
+        if not grams or not uses_side_table(queryset.db):
+            return queryset
+
+        candidates = (
+            self._trigram_rows(grams)
+            .values("object_id")
+            .annotate(shared=Count("trigram"))
+            .filter(shared=len(grams))
+            .values("object_id")
+        )
+        return queryset.filter(pk__in=candidates)
+
+    def similar(self, queryset: QuerySet, query: str) -> QuerySet:
+        if not uses_side_table(queryset.db):
+            column, value = Upper(self.field), Upper(Value(query))
+            return (
+                queryset
+                .filter(TrigramSimilar(column, value))
+                .annotate(search_similarity=Func(
+                    column,
+                    value,
+                    function="similarity",
+                    output_field=FloatField()
+                ))
+                .order_by("-search_similarity", self.field)
+            )
+
+        grams = trigrams(query)
+        if not grams:
+            return queryset.none()
+
+        shared = Subquery(
+            self._trigram_rows(grams)
+            .filter(object_id=OuterRef("pk"))
+            .values("object_id")
+            .annotate(shared=Count("trigram"))
+            .values("shared"),
+            output_field=IntegerField()
+        )
+        candidates = (
+            self._trigram_rows(grams)
+            .values("object_id")
+            .annotate(shared=Count("trigram"))
+            .filter(
+                shared__gte=math.ceil(len(grams) * SIMILARITY_THRESHOLD)
+            )
+            .values("object_id")
+        )
+        return (
+            queryset
+            .filter(pk__in=candidates)
+            .annotate(
+                search_similarity=Cast(shared, FloatField()) / len(grams)
+            )
+            .order_by("-search_similarity", self.field)
+        )
+
+    def _trigram_rows(self, grams: set[str]) -> QuerySet:
+        return SearchTrigram.objects.filter(
+            kind=self.kind, trigram__in=grams
+        ).order_by()
@@ -0,0 +1,354 @@
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_migrate, post_save, pre_save
+)
+from django.contrib.auth.models import Group
+from django.dispatch import receiver
+
+from media.aggregates import apply_rating_delta, rating_contribution
+from media.backends import forget_users
+from media.cache import bump_version
+from media.fragments import FRAGMENTS_VERSION
+from media.leaderboards import (
+    refresh_media_leaderboards, refresh_rater_leaderboard
+)
+from media.models import (
+    Creator, Genre, Media, MediaUser, UserMediaRating
+)
+from media.search.trigram import (
+    TRIGRAM_SOURCES,
+    index_object,
+    kind_for_model,
+    unindex_object,
+    uses_side_table,
+)
+from media.statistics import MEDIA_TYPE_COUNTERS, adjust_statistics
+
+
+@receiver(pre_save, sender=UserMediaRating)
+def remember_previous_rating(sender, instance, using, **kwargs):
+    instance._previous_rating = None
+    if instance.pk is not None:
+        instance._previous_rating = (
+            sender.objects.using(using)
+            .filter(pk=instance.pk)
+            .values("media_id", "user_id", "rating", "is_hidden")
+            .first()
+        )
+
+
+@receiver(post_save, sender=UserMediaRating)
+def update_rating_aggregates_on_save(sender, instance, created, using,
+                                     **kwargs):
+    previous = getattr(instance, "_previous_rating", None)
+    if previous is not None:
+        reviews, ratings, total = rating_contribution(
+            previous["rating"], previous["is_hidden"]
+        )
+        apply_rating_delta(
+            previous["media_id"], -reviews, -ratings, -total, using
+        )
+
+    apply_rating_delta(
+        instance.media_id,
+        *rating_contribution(instance.rating, instance.is_hidden),
+        using
+    )
+
+
+@receiver(post_delete, sender=UserMediaRating)
+def update_rating_aggregates_on_delete(sender, instance, using, **kwargs):
+    reviews, ratings, total = rating_contribution(
+        instance.rating, instance.is_hidden
+    )
+    apply_rating_delta(instance.media_id, -reviews, -ratings, -total, using)
+
+
+@receiver(post_save, sender=UserMediaRating)
+def refresh_leaderboards_on_save(sender, instance, using, **kwargs):
+    # Runs after the aggregates the media leaderboards rank by.
+    previous = getattr(instance, "_previous_rating", None)
+    current = rating_contribution(instance.rating, instance.is_hidden)
+    if previous is not None and (
+            previous["media_id"] == instance.media_id
+            and previous["user_id"] == instance.user_id
+            and rating_contribution(
+                previous["rating"], previous["is_hidden"]
+            ) == current
+    ):
+        return
+
+    media_ids = {instance.media_id}
+    user_ids = {instance.user_id}
+    if previous is not None:
+        media_ids.add(previous["media_id"])
+        user_ids.add(previous["user_id"])
+    refresh_media_leaderboards(media_ids, using)
+    refresh_rater_leaderboard(user_ids, using)
+
+
+@receiver(post_delete, sender=UserMediaRating)
+def refresh_leaderboards_on_delete(sender, instance, using, **kwargs):
+    refresh_media_leaderboards([instance.media_id], using)
+    refresh_rater_leaderboard([instance.user_id], using)
+
+
+def _count_ratings(ratings, sign, using):
+    for rating in ratings:
+        reviews, ratings_num, total = rating_contribution(
+            rating["rating"], rating["is_hidden"]
+        )
+        apply_rating_delta(
+            rating["media_id"],
+            sign * reviews,
+            sign * ratings_num,
+            sign * total,
+            using
+        )
+    if ratings:
+        adjust_statistics(using, ratings_count=sign * len(ratings))
+        refresh_media_leaderboards(
+            (rating["media_id"] for rating in ratings), using
+        )
+        refresh_rater_leaderboard(
+            (rating["user_id"] for rating in ratings), using
+        )
+
+
+@receiver(m2m_changed, sender=Media.users.through)
+def update_rating_aggregates_on_users_change(sender, instance, action,
+                                             reverse, pk_set, using,
+                                             **kwargs):
+    # ``media.users.add()`` and ``remove()`` write rating rows in bulk,
+    # without the post_save and post_delete signals of UserMediaRating.
+    if action in ("post_remove", "post_clear"):
+        _count_ratings(instance._removed_ratings, -1, using)
+        return
+    if action not in ("post_add", "pre_remove", "pre_clear"):
+        return
+
+    rows = sender.objects.using(using).filter(
+        **{"user_id" if reverse else "media_id": instance.pk}
+    )
+    if pk_set is not None:
+        rows = rows.filter(
+            **{"media_id__in" if reverse else "user_id__in": pk_set}
+        )
+    ratings = list(
+        rows.values("media_id", "user_id", "rating", "is_hidden")
+    )
+
+    if action == "post_add":
+        _count_ratings(ratings, 1, using)
+    else:
+        instance._removed_ratings = ratings
+
+
+@receiver(post_save, sender=Creator)
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=MediaUser)
+def update_search_trigrams(sender, instance, using, update_fields=None,
+                           **kwargs):
+    if not uses_side_table(using):
+        return
+
+    kind = kind_for_model(sender)
+    _, field = TRIGRAM_SOURCES[kind]
+    if update_fields is not None and field not in update_fields:
+        return
+    index_object(kind, instance, using)
+
+
+@receiver(post_delete, sender=Creator)
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=MediaUser)
+def delete_search_trigrams(sender, instance, using, **kwargs):
+    if uses_side_table(using):
+        unindex_object(kind_for_model(sender), instance.pk, using)
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def invalidate_genre_choices(sender, **kwargs):
+    bump_version("genres")
+
+
+@receiver(post_save, sender=Creator)
+@receiver(post_delete, sender=Creator)
+def invalidate_creator_choices(sender, **kwargs):
+    bump_version("creators")
+
+
+@receiver(m2m_changed, sender=Media.creators.through)
+@receiver(m2m_changed, sender=Media.genres.through)
+def update_media_version_on_links_change(sender, instance, action, reverse,
+                                         pk_set, using, **kwargs):
+    # Cards list their creators and genres, so linking or unlinking them
+    # changes the card of every media involved.
+    if reverse and action == "pre_clear":
+        field = "creator_id" if sender is Media.creators.through else (
+            "genre_id"
+        )
+        instance._cleared_media_ids = list(
+            sender.objects.using(using)
+            .filter(**{field: instance.pk})
+            .values_list("media_id", flat=True)
+        )
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+
+    if not reverse:
+        media_ids = [instance.pk]
+    elif action == "post_clear":
+        media_ids = instance._cleared_media_ids
+    else:
+        media_ids = pk_set
+
+    changes = Media.change_fields()
+    Media.objects.using(using).filter(pk__in=media_ids).update(**changes)
+    bump_version("media")
+    if sender is Media.genres.through:
+        refresh_media_leaderboards(media_ids, using)
+    if not reverse:
+        for field, value in changes.items():
+            setattr(instance, field, value)
+
+
+@receiver(post_save, sender=UserMediaRating)
+@receiver(post_delete, sender=UserMediaRating)
+def invalidate_rating_pages(sender, **kwargs):
+    bump_version("ratings")
+
+
+@receiver(m2m_changed, sender=Media.users.through)
+def invalidate_rating_pages_on_users_change(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        bump_version("ratings")
+
+
+@receiver(post_save, sender=MediaUser)
+@receiver(post_delete, sender=MediaUser)
+def invalidate_user_pages(sender, **kwargs):
+    bump_version("users")
+
+
+@receiver(post_save, sender=MediaUser)
+@receiver(post_delete, sender=MediaUser)
+def forget_cached_user(sender, instance, using, **kwargs):
+    forget_users([instance.pk], using)
+
+
+@receiver(m2m_changed, sender=MediaUser.groups.through)
+@receiver(m2m_changed, sender=MediaUser.user_permissions.through)
+@receiver(m2m_changed, sender=Group.permissions.through)
+def forget_cached_users_on_permission_change(sender, instance, action,
+                                             model, pk_set, using,
+                                             **kwargs):
+    if action not in ("pre_clear", "post_add", "post_remove"):
+        return
+
+    if isinstance(instance, MediaUser):
+        user_ids = [instance.pk]
+    elif model is MediaUser and pk_set is not None:
+        user_ids = pk_set
+    elif isinstance(instance, Group) or model is MediaUser:
+        user_ids = instance.user_set.using(using).values_list(
+            "pk", flat=True
+        )
+    else:
+        # Groups gained or lost a permission.
+        groups = pk_set if pk_set is not None else instance.group_set.all()
+        user_ids = (
+            MediaUser.objects.using(using)
+            .filter(groups__in=groups)
+            .values_list("pk", flat=True)
+        )
+    forget_users(user_ids, using)
+
+
+@receiver(post_migrate)
+def invalidate_fragments_on_migrate(sender, **kwargs):
+    # Deploys migrate, and cached fragments may come from old templates.
+    if sender.name == "media":
+        bump_version(FRAGMENTS_VERSION)
+
+
+def invalidate_media_pages(sender, **kwargs):
+    bump_version("media")
+
+
+def invalidate_similar_titles_on_save(sender, instance, created, **kwargs):
+    # Detail pages list the titles of similar media. New media have none
+    # until build_similar_media runs.
+    if created:
+        return
+    if instance.title != getattr(instance, "_loaded_title", None):
+        instance._loaded_title = instance.title
+        bump_version("similar")
+
+
+def invalidate_similar_titles_on_delete(sender, **kwargs):
+    bump_version("similar")
+
+
+@receiver(post_save, sender=MediaUser)
+def count_created_user(sender, created, using, **kwargs):
+    if created:
+        adjust_statistics(using, users_count=1)
+
+
+@receiver(post_delete, sender=MediaUser)
+def count_deleted_user(sender, using, **kwargs):
+    adjust_statistics(using, users_count=-1)
+
+
+@receiver(post_save, sender=UserMediaRating)
+def count_created_rating(sender, created, using, **kwargs):
+    if created:
+        adjust_statistics(using, ratings_count=1)
+
+
+@receiver(post_delete, sender=UserMediaRating)
+def count_deleted_rating(sender, using, **kwargs):
+    adjust_statistics(using, ratings_count=-1)
+
+
+@receiver(post_save, sender=Media)
+def count_created_media(sender, created, using, **kwargs):
+    if created:
+        adjust_statistics(using, media_count=1)
+
+
+@receiver(post_delete, sender=Media)
+def count_deleted_media(sender, using, **kwargs):
+    adjust_statistics(using, media_count=-1)
+
+
+def count_created_media_type(sender, created, raw, using, **kwargs):
+    # Fixtures save the parent Media row on its own, which is counted by
+    # count_created_media, while a regular save only signals the child.
+    if created:
+        deltas = {MEDIA_TYPE_COUNTERS[sender]: 1}
+        if not raw:
+            deltas["media_count"] = 1
+        adjust_statistics(using, **deltas)
+
+
+def count_deleted_media_type(sender, using, **kwargs):
+    adjust_statistics(using, **{MEDIA_TYPE_COUNTERS[sender]: -1})
+
+
+for media_model in MEDIA_TYPE_COUNTERS:
+    post_save.connect(count_created_media_type, sender=media_model)
+    post_delete.connect(count_deleted_media_type, sender=media_model)
+
+# A child save only signals the child class, so every media class
+# invalidates the pages listing media.
+for media_model in (Media, *MEDIA_TYPE_COUNTERS):
+    post_save.connect(invalidate_media_pages, sender=media_model)
+    post_delete.connect(invalidate_media_pages, sender=media_model)
+    post_save.connect(
+        invalidate_similar_titles_on_save, sender=media_model
+    )
+    post_delete.connect(
+        invalidate_similar_titles_on_delete, sender=media_model
+    )
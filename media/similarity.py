@@ -0,0 +1,252 @@
+import itertools
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Optional
+
+import numpy as np
+from django.db import transaction
+from django.db.models import QuerySet
+from scipy import sparse
+
+from media.cache import bump_version
+from media.models import Media, SimilarMedia, UserMediaRating
+
+# How much the cosine similarity of each feature set counts.
+WEIGHTS = {"genres": 1.0, "creators": 1.0, "ratings": 1.0}
+
+_features: Optional[sparse.csr_matrix] = None
+_features_t: Optional[sparse.csr_matrix] = None
+
+
+def read_columns(
+        queryset: QuerySet,
+        fields: tuple[str, ...],
+        dtype=np.int64,
+        chunk_size: int = 100_000
+) -> np.ndarray:
+    """The ``fields`` of ``queryset`` as a 2-D array, built chunk by
+    chunk so no list of every row is held in memory."""
+    rows = queryset.values_list(*fields).iterator(chunk_size=chunk_size)
+    chunks = []
+    while batch := list(itertools.islice(rows, chunk_size)):
+        chunks.append(np.array(batch, dtype=dtype))
+    if not chunks:
+        return np.empty((0, len(fields)), dtype=dtype)
+    return np.concatenate(chunks)
+
+
+def normalize_rows(matrix: sparse.csr_matrix) -> sparse.csr_matrix:
+    """Scale every non-empty row to unit length."""
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1))).ravel()
+    norms[norms == 0] = 1
+    return (sparse.diags(1 / norms) @ matrix).tocsr()
+
+
+def incidence_matrix(
+        media_ids: np.ndarray,
+        pairs: np.ndarray,
+        values: Optional[np.ndarray] = None
+) -> sparse.csr_matrix:
+    """Media × object matrix with a row per id of ``media_ids`` (sorted)
+    and a column per distinct object of the ``(media_id, object_id)``
+    ``pairs``, with unit-length rows."""
+    known = np.isin(pairs[:, 0], media_ids)
+    pairs = pairs[known]
+    values = np.ones(len(pairs)) if values is None else values[known]
+    rows = np.searchsorted(media_ids, pairs[:, 0])
+    objects, columns = np.unique(pairs[:, 1], return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (values.astype(np.float32), (rows, columns)),
+        shape=(len(media_ids), len(objects))
+    )
+    matrix.eliminate_zeros()
+    return normalize_rows(matrix)
+
+
+def centered_ratings(ratings: np.ndarray) -> np.ndarray:
+    """Ratings minus the mean rating of their user, so that media are
+    alike when users rate them alike relative to their other ratings,
+    not because a user rates everything high."""
+    users, inverse = np.unique(ratings[:, 1], return_inverse=True)
+    means = (
+        np.bincount(inverse, weights=ratings[:, 2])
+        / np.bincount(inverse)
+    )
+    return ratings[:, 2] - means[inverse]
+
+
+def build_features(
+        media_ids: np.ndarray, weights: dict = WEIGHTS
+) -> sparse.csr_matrix:
+    """One sparse row per media whose dot products are the weighted
+    cosine similarities of the genres, creators and ratings of two
+    media.
+
+    Each feature set is normalised on its own, so a media with many
+    creators does not outweigh its genres. Ratings count only when they
+    are visible.
+    """
+    genres = read_columns(
+        Media.genres.through.objects.all(), ("media_id", "genre_id")
+    )
+    creators = read_columns(
+        Media.creators.through.objects.all(), ("media_id", "creator_id")
+    )
+    ratings = read_columns(
+        UserMediaRating.objects.filter(
+            is_hidden=False, rating__isnull=False
+        ),
+        ("media_id", "user_id", "rating"),
+        dtype=np.float64
+    )
+    blocks = [
+        weights["genres"] ** 0.5 * incidence_matrix(media_ids, genres),
+        weights["creators"] ** 0.5 * incidence_matrix(media_ids, creators),
+        weights["ratings"] ** 0.5 * incidence_matrix(
+            media_ids,
+            ratings[:, :2].astype(np.int64),
+            centered_ratings(ratings) if len(ratings) else None
+        ),
+    ]
+    return normalize_rows(sparse.hstack(blocks, format="csr"))
+
+
+def _share_features(features: sparse.csr_matrix) -> None:
+    global _features, _features_t
+    _features = features
+    _features_t = features.T.tocsr()
+
+
+def top_neighbours(
+        start: int, stop: int, k: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Row, neighbour row, rank and score of the ``k`` most similar
+    media of rows ``start`` to ``stop`` of the shared features.
+
+    The similarities of the whole block are one sparse product, so only
+    pairs that share a genre, creator or rater are ever materialised.
+    """
+    scores = (_features[start:stop] @ _features_t).tocoo()
+    rows = scores.row.astype(np.int64) + start
+    columns = scores.col.astype(np.int64)
+    keep = (rows != columns) & (scores.data > 1e-6)
+    rows, columns, data = rows[keep], columns[keep], scores.data[keep]
+
+    # By row, then best score first; ties go to the lower row.
+    order = np.lexsort((columns, -data, rows))
+    rows, columns, data = rows[order], columns[order], data[order]
+    first = np.searchsorted(rows, rows)
+    ranks = np.arange(len(rows)) - first
+    best = ranks < k
+    return rows[best], columns[best], ranks[best], data[best]
+
+
+def neighbour_blocks(
+        features: sparse.csr_matrix,
+        k: int,
+        block_size: int,
+        workers: int
+) -> Iterator[tuple[int, int, tuple]]:
+    """``(start, stop, neighbours)`` of consecutive row blocks, computed
+    by ``workers`` processes (in this one when ``workers`` is 1)."""
+    bounds = [
+        (start, min(start + block_size, features.shape[0]))
+        for start in range(0, features.shape[0], block_size)
+    ]
+    if workers == 1:
+        _share_features(features)
+        for start, stop in bounds:
+            yield start, stop, top_neighbours(start, stop, k)
+        return
+
+    # Only a few blocks are in flight at a time, so finished results do
+    # not pile up while the caller is still storing earlier ones.
+    pending = deque()
+    with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_share_features,
+            initargs=(features,)
+    ) as executor:
+        for start, stop in bounds:
+            pending.append(
+                (start, stop, executor.submit(top_neighbours, start, stop, k))
+            )
+            if len(pending) > 2 * workers:
+                start, stop, future = pending.popleft()
+                yield start, stop, future.result()
+        while pending:
+            start, stop, future = pending.popleft()
+            yield start, stop, future.result()
+
+
+def store_neighbours(
+        media_ids: np.ndarray, start: int, stop: int, neighbours
+) -> int:
+    """Replace the neighbours of ``media_ids[start:stop]``.
+
+    Media deleted since ``media_ids`` was read are left out, and the rest
+    are locked until the block is written, so a long run does not fail on
+    a missing foreign key.
+    """
+    rows, columns, ranks, scores = neighbours
+    involved = np.unique(np.concatenate((media_ids[rows], media_ids[columns])))
+    with transaction.atomic():
+        existing = set(
+            Media.objects
+            .select_for_update()
+            .filter(pk__in=involved.tolist())
+            .values_list("pk", flat=True)
+        )
+        SimilarMedia.objects.filter(
+            media_id__gte=media_ids[start],
+            media_id__lte=media_ids[stop - 1]
+        ).delete()
+        stored = SimilarMedia.objects.bulk_create(
+            [
+                SimilarMedia(
+                    media_id=int(media_ids[row]),
+                    similar_id=int(media_ids[column]),
+                    rank=int(rank),
+                    score=round(float(score), 4)
+                )
+                for row, column, rank, score in zip(
+                    rows, columns, ranks, scores
+                )
+                if media_ids[row] in existing
+                and media_ids[column] in existing
+            ],
+            batch_size=1000
+        )
+    return len(stored)
+
+
+def build_similar_media(
+        k: int = 10,
+        block_size: int = 512,
+        workers: Optional[int] = None,
+        weights: dict = WEIGHTS
+) -> tuple[int, int]:
+    """Recompute the ``k`` nearest neighbours of every media.
+
+    Memory stays linear in the number of media: the features are sparse
+    and only ``block_size`` rows of similarities exist at a time per
+    worker. Neighbours are replaced block by block, so detail pages keep
+    showing the previous ones until their block is written. Returns the
+    number of media and of neighbour rows.
+    """
+    media_ids = read_columns(
+        Media.objects.order_by("pk"), ("pk",)
+    ).ravel()
+    if not len(media_ids):
+        return 0, 0
+
+    features = build_features(media_ids, weights)
+    workers = workers or os.cpu_count() or 1
+    stored = 0
+    for start, stop, neighbours in neighbour_blocks(
+            features, k, block_size, workers
+    ):
+        stored += store_neighbours(media_ids, start, stop, neighbours)
+    bump_version("similar")
+    return len(media_ids), stored
@@ -0,0 +1,62 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.db.models import F
+
+from media.models import (
+    Book, Film, Media, Series, SiteStatistics, UserMediaRating
+)
+
+STATISTICS_PK = 1
+
+MEDIA_TYPE_COUNTERS = {
+    Book: "books_count",
+    Film: "films_count",
+    Series: "series_count",
+}
+
+
+def adjust_statistics(using: str = "default", **deltas: int) -> None:
+    """Add ``deltas`` to the counters of the statistics row in one UPDATE."""
+    updated = SiteStatistics.objects.using(using).filter(
+        pk=STATISTICS_PK
+    ).update(**{
+        field: F(field) + delta for field, delta in deltas.items()
+    })
+    if not updated:
+        reconcile_statistics(using)
+
+
+def reconcile_statistics(using: str = "default") -> SiteStatistics:
+    """Recount every counter from the source tables."""
+    media_type_counts = {
+        field: model.objects.using(using).count()
+        for model, field in MEDIA_TYPE_COUNTERS.items()
+    }
+    statistics, _ = SiteStatistics.objects.using(using).update_or_create(
+        pk=STATISTICS_PK,
+        defaults={
+            "users_count": get_user_model().objects.using(using).count(),
+            "media_count": Media.objects.using(using).count(),
+            "ratings_count": UserMediaRating.objects.using(using).count(),
+            **media_type_counts,
+        }
+    )
+    return statistics
+
+
+def get_statistics(using: str = "default") -> SiteStatistics:
+    statistics = SiteStatistics.objects.using(using).filter(
+        pk=STATISTICS_PK
+    ).first()
+    if statistics is None:
+        statistics = reconcile_statistics(using)
+    return statistics
+
+
+async def aget_statistics(using: str = "default") -> SiteStatistics:
+    statistics = await SiteStatistics.objects.using(using).filter(
+        pk=STATISTICS_PK
+    ).afirst()
+    if statistics is None:
+        statistics = await sync_to_async(reconcile_statistics)(using)
+    return statistics
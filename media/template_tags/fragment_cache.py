@@ -0,0 +1,85 @@
+from django import template
+
+from media.cache import get_version
+from media.fragments import (
+    FRAGMENTS_VERSION, card_key, cards_may_be_stale, fragment_key,
+    render_fragment
+)
+
+register = template.Library()
+
+
+class FragmentCacheNode(template.Node):
+    def __init__(self, nodelist, name, vary_on):
+        self.nodelist = nodelist
+        self.name = name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        name = self.name.resolve(context)
+        key = fragment_key(
+            name,
+            get_version(FRAGMENTS_VERSION),
+            *(value.resolve(context) for value in self.vary_on)
+        )
+        return render_fragment(
+            name,
+            key,
+            lambda: self.nodelist.render(context),
+            context.get("request")
+        )
+
+
+class CardCacheNode(template.Node):
+    def __init__(self, nodelist, media):
+        self.nodelist = nodelist
+        self.media = media
+
+    def render(self, context):
+        request = context["request"]
+        key = card_key(self.media.resolve(context), request)
+        return render_fragment(
+            "card",
+            key,
+            lambda: self.nodelist.render(context),
+            request,
+            store=not cards_may_be_stale(request)
+        )
+
+
+@register.tag
+def fragment_cache(parser, token):
+    """Cache the enclosed template under a name and vary-on values.
+
+    {% fragment_cache "navigation" user.pk %}...{% endfragment_cache %}
+
+    Every such fragment is also keyed by the ``FRAGMENTS_VERSION``
+    version, which migrations bump, so a deploy does not keep serving
+    the output of old templates.
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' takes a fragment name and optional vary-on values"
+        )
+    nodelist = parser.parse(("endfragment_cache",))
+    parser.delete_first_token()
+    return FragmentCacheNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        [parser.compile_filter(bit) for bit in bits[2:]]
+    )
+
+
+@register.tag
+def card_cache(parser, token):
+    """Cache the enclosed media card until the media changes.
+
+    {% card_cache book %}...{% endcard_cache %}
+    """
+    bits = token.split_contents()
+    if len(bits) != 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' takes a media")
+    nodelist = parser.parse(("endcard_cache",))
+    parser.delete_first_token()
+    return CardCacheNode(nodelist, parser.compile_filter(bits[1]))
@@ -1,15 +1,89 @@
 import datetime
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
-from django.urls import reverse
-
-from media.models import Book, Film, Series, UserMediaRating, Creator, Media
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.core.cache.backends.db import DatabaseCache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import DatabaseError, connection
+from django.db.models import F, Q
+from django.http import HttpResponse, QueryDict
+from django.test import (
+    RequestFactory, SimpleTestCase, TestCase, TransactionTestCase,
+    override_settings
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import path, resolve, reverse
+import numpy as np
+from scipy import sparse
+
+from media.backends import USER_KEY, CachedModelBackend
+from media.cache import (
+    VersionedCache, bump_version, choice_cache, get_version
+)
+from media.explain import (
+    IndexSuggestion, PlanIssue, capture_workload, compare_snapshots,
+    find_issues, snapshot_path, suggest_index, take_snapshot
+)
+from media.forms.filter_forms import CreatorFilterForm, GenreFilterForm
+from media.aggregates import (
+    apply_rating_delta, recompute_rating_aggregates
+)
+from media.fragments import FRAGMENTS_VERSION, fragment_stats
+from media.management.commands import import_media
+from media.leaderboards import MIN_RATINGS, rebuild_leaderboards
+from media.middleware import (
+    QueryBudgetMiddleware, ReplicaPinningMiddleware
+)
+from media.pagination import encode_cursor
+from media.polymorphic import hydrate_media
+from media.pool import pool_stats, pool_usage
+from media.preferences import COOKIE_NAME
+from media.models import (
+    Book, Film, Series, UserMediaRating, Creator, Media, Genre,
+    ImportCheckpoint, MediaLeaderboardEntry, RaterLeaderboardEntry,
+    SearchTrigram, SimilarMedia, SiteStatistics
+)
+from media.query_budget import (
+    QueryBudgetTestMixin, duplicated_fingerprints, fingerprint
+)
+from media.routers import (
+    PIN_COOKIE_NAME, PrimaryReplicaRouter, reads_from_replica,
+    replica_reads
+)
+from media.search.fulltext import PostgresSearchBackend
+from media.similarity import (
+    build_features, build_similar_media, neighbour_blocks
+)
+from media.statistics import get_statistics
+from media.views.book_views import AsyncBookListView, BookListView
+from media.views.film_views import FilmListView
+from media.views.media_views import MediaListView
+from media.views.mixins.mixins import gather_in_threads
+from media.views.views import GenreListView, async_index
+from media.workload import get_workload_client, get_workload_endpoints
+from media_vault.settings.database import postgres_database
+from media_vault.urls import urlpatterns as project_urlpatterns
 
 GENRES = "genres"
 CREATORS = "creators"
 TYPE = "type"
 
+# Serves the async variants next to the regular views for
+# AsyncListViewTests.
+urlpatterns = [
+    path("async/books/", AsyncBookListView.as_view()),
+    path("async/", async_index),
+    *project_urlpatterns,
+]
+
 
 class PublicTests(TestCase):
     def test_books_anonymous_access_false(self):
@@ -634,3 +708,2091 @@ class PrivateViewTests(TestCase):
 
         for error in self.REQUIRED_FIELD_ERRORS:
             self.assertIn(error, json_data["form_html"])
+
+
+class RatingAggregateTests(TestCase):
+    fixtures = ["media_vault_db_data.json"]
+
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create_user(
+            username="user", password="password"
+        )
+        self.media = Media.objects.get(pk=3)
+
+    def assert_aggregates(self, media, reviews_num, ratings_num, avg):
+        media.refresh_from_db()
+        self.assertEqual(media.reviews_num, reviews_num)
+        self.assertEqual(media.ratings_num, ratings_num)
+        self.assertEqual(media.reviews_avg, avg)
+
+    def test_fixture_ratings_are_aggregated(self):
+        self.assert_aggregates(Media.objects.get(pk=1), 1, 0, None)
+
+    def test_aggregates_follow_rating_changes(self):
+        rating = UserMediaRating.objects.create(
+            user=self.user, media=self.media, rating=8, is_hidden=False
+        )
+        self.assert_aggregates(self.media, 1, 1, 8.0)
+
+        other_user = get_user_model().objects.create_user(
+            username="other", password="password"
+        )
+        UserMediaRating.objects.create(
+            user=other_user, media=self.media, rating=5, is_hidden=False
+        )
+        self.assert_aggregates(self.media, 2, 2, 6.5)
+
+        rating.is_hidden = True
+        rating.save()
+        self.assert_aggregates(self.media, 1, 1, 5.0)
+
+        rating.is_hidden = False
+        rating.rating = None
+        rating.save()
+        self.assert_aggregates(self.media, 2, 1, 5.0)
+
+        rating.delete()
+        self.assert_aggregates(self.media, 1, 1, 5.0)
+
+    def test_deltas_are_written_to_the_saving_database(self):
+        with mock.patch.object(Media.objects, "using") as using:
+            apply_rating_delta(self.media.pk, 1, 1, 8, using="other")
+
+        using.assert_called_once_with("other")
+        using.return_value.filter.return_value.update.assert_called_once()
+
+    def test_aggregates_move_with_rating_media(self):
+        rating = UserMediaRating.objects.create(
+            user=self.user, media=self.media, rating=7, is_hidden=False
+        )
+        other_media = Media.objects.get(pk=2)
+
+        rating.media = other_media
+        rating.save()
+
+        self.assert_aggregates(self.media, 0, 0, None)
+        self.assert_aggregates(other_media, 1, 1, 7.0)
+
+    def test_recompute_command_repairs_aggregates(self):
+        UserMediaRating.objects.create(
+            user=self.user, media=self.media, rating=9, is_hidden=False
+        )
+        Media.objects.update(
+            reviews_num=0, ratings_num=0, ratings_sum=0, reviews_avg=None
+        )
+
+        call_command(
+            "recompute_rating_aggregates", batch_size=2, stdout=StringIO()
+        )
+
+        self.assert_aggregates(self.media, 1, 1, 9.0)
+        self.assert_aggregates(Media.objects.get(pk=4), 1, 0, None)
+
+
+class KeysetPaginationTests(TestCase):
+    BOOK_LIST_URL = reverse("media:book_list")
+    DESCRIPTION = "A book created to check cursor pagination. " * 3
+
+    def setUp(self) -> None:
+        user = get_user_model().objects.create_user(
+            username="user", password="password"
+        )
+        self.client.force_login(user)
+        for index in range(25):
+            Book.objects.create(
+                title=f"Book {index % 5}",
+                description=self.DESCRIPTION,
+                chapters=index + 1,
+                type="TB"
+            )
+        self.expected = list(
+            Book.objects.order_by("title", "id").values_list("id", flat=True)
+        )
+
+    def test_walks_all_pages_in_order(self):
+        seen = []
+        response = self.client.get(self.BOOK_LIST_URL)
+        while True:
+            seen.extend(book.id for book in response.context["book_list"])
+            page = response.context["page_obj"]
+            if not page.has_next():
+                break
+            response = self.client.get(
+                self.BOOK_LIST_URL, {"cursor": page.next_cursor}
+            )
+
+        self.assertEqual(seen, self.expected)
+
+    def test_previous_cursor_returns_previous_page(self):
+        first = self.client.get(self.BOOK_LIST_URL)
+        second = self.client.get(
+            self.BOOK_LIST_URL,
+            {"cursor": first.context["page_obj"].next_cursor}
+        )
+        back = self.client.get(
+            self.BOOK_LIST_URL,
+            {"cursor": second.context["page_obj"].previous_cursor}
+        )
+
+        self.assertEqual(
+            list(back.context["book_list"]),
+            list(first.context["book_list"])
+        )
+        self.assertFalse(back.context["page_obj"].has_previous())
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        response = self.client.get(self.BOOK_LIST_URL, {"cursor": "broken"})
+
+        self.assertEqual(
+            [book.id for book in response.context["book_list"]],
+            self.expected[:10]
+        )
+
+    def test_tampered_cursor_falls_back_to_first_page(self):
+        title_cursor = encode_cursor(["Book 1", self.expected[3]], "n")
+        for url, data in (
+                (self.BOOK_LIST_URL,
+                 {"cursor": encode_cursor(["x", "notint"], "n")}),
+                (self.BOOK_LIST_URL,
+                 {"cursor": encode_cursor([None, None], "n")}),
+                (self.BOOK_LIST_URL,
+                 {"cursor": encode_cursor([["x"], {}], "n")}),
+                (self.BOOK_LIST_URL,
+                 {"title": "book", "cursor": title_cursor}),
+                (self.BOOK_LIST_URL,
+                 {"sort": "released", "cursor": title_cursor}),
+        ):
+            with self.subTest(data=data):
+                response = self.client.get(url, data)
+
+                self.assertEqual(response.status_code, 200)
+                self.assertFalse(
+                    response.context["page_obj"].has_previous()
+                )
+
+    def test_load_more_returns_cards_and_next_cursor(self):
+        first = self.client.get(self.BOOK_LIST_URL)
+        response = self.client.get(
+            self.BOOK_LIST_URL,
+            {"cursor": first.context["page_obj"].next_cursor},
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest"
+        )
+
+        json_data = response.json()
+        self.assertEqual(json_data["html"].count("card-body"), 10)
+        self.assertIsNotNone(json_data["next_cursor"])
+
+
+class SortOrderTests(TestCase):
+    BOOK_LIST_URL = reverse("media:book_list")
+    DESCRIPTION = "A book created to check the list sort orders. " * 3
+
+    def setUp(self) -> None:
+        self.users = [
+            get_user_model().objects.create_user(
+                username=f"user{index}", password="password"
+            )
+            for index in range(4)
+        ]
+        self.client.force_login(self.users[0])
+        self.books = [
+            Book.objects.create(
+                title=f"Book {index}",
+                description=self.DESCRIPTION,
+                chapters=index + 1,
+                type="MA" if index % 2 else "TB",
+                created_at=(
+                    datetime.date(2000 + index, 1, 1) if index % 3 else None
+                )
+            )
+            for index in range(12)
+        ]
+
+    def rate(self, book: Book, ratings: list) -> None:
+        for user, rating in zip(self.users, ratings):
+            UserMediaRating.objects.create(
+                user=user, media=book, rating=rating, is_hidden=False
+            )
+
+    def walk(self, query: dict) -> list[int]:
+        seen = []
+        response = self.client.get(self.BOOK_LIST_URL, query)
+        while True:
+            seen.extend(book.id for book in response.context["book_list"])
+            page = response.context["page_obj"]
+            if not page.has_next():
+                return seen
+            response = self.client.get(
+                self.BOOK_LIST_URL, {**query, "cursor": page.next_cursor}
+            )
+
+    def test_weighted_score_needs_more_than_one_rating(self):
+        self.rate(self.books[0], [10])
+        self.rate(self.books[1], [9, 9, 8, 9])
+        self.books[0].refresh_from_db()
+        self.assertAlmostEqual(self.books[0].weighted_score, 60 / 11)
+
+        self.assertEqual(
+            self.walk({"sort": "score"})[:2],
+            [self.books[1].pk, self.books[0].pk]
+        )
+
+        recompute_rating_aggregates([self.books[1].pk])
+        self.books[1].refresh_from_db()
+        self.assertAlmostEqual(self.books[1].weighted_score, 85 / 14)
+
+    def test_sort_orders_walk_every_page(self):
+        self.rate(self.books[3], [5, 6])
+        self.rate(self.books[7], [7])
+        books = Book.objects.all()
+        expected = {
+            "reviews": books.order_by("-reviews_num", "-id"),
+            "released": books.order_by(
+                F("created_at").desc(nulls_last=True), "-id"
+            ),
+            "added": books.order_by("-id"),
+            "unknown": books.order_by("title", "id"),
+        }
+        for sort, queryset in expected.items():
+            with self.subTest(sort=sort):
+                self.assertEqual(
+                    self.walk({"sort": sort}),
+                    list(queryset.values_list("id", flat=True))
+                )
+
+        self.assertEqual(
+            self.walk({"sort": "added", "type": "Manga"}),
+            list(
+                books.filter(type="MA").order_by("-id")
+                .values_list("id", flat=True)
+            )
+        )
+
+    def test_picked_order_replaces_search_rank(self):
+        response = self.client.get(
+            self.BOOK_LIST_URL, {"title": "book", "sort": "added"}
+        )
+        self.assertEqual(
+            [book.id for book in response.context["book_list"]],
+            [book.id for book in reversed(self.books)][:10]
+        )
+        self.assertEqual(response.context["sort"], "added")
+        self.assertContains(response, "Recently added")
+
+
+class FullTextSearchTests(TestCase):
+    fixtures = ["media_vault_db_data.json"]
+    BOOK_LIST_URL = reverse("media:book_list")
+    DESCRIPTION = (
+        "An expedition crosses the frozen north in search of a lost ship "
+        "and the people who sailed it."
+    )
+
+    def setUp(self) -> None:
+        user = get_user_model().objects.create_user(
+            username="user", password="password"
+        )
+        self.client.force_login(user)
+        self.title_match = Book.objects.create(
+            title="Lighthouse keepers",
+            description=self.DESCRIPTION,
+            chapters=10,
+            type="TB"
+        )
+        self.description_match = Book.objects.create(
+            title="Northern winter",
+            description=f"{self.DESCRIPTION} A lighthouse guides them home.",
+            chapters=12,
+            type="TB"
+        )
+
+    def search_books(self, query):
+        response = self.client.get(self.BOOK_LIST_URL, {"title": query})
+        return list(response.context["book_list"])
+
+    def test_search_matches_description_and_ranks_title_first(self):
+        self.assertEqual(
+            self.search_books("lighthouse"),
+            [self.title_match, self.description_match]
+        )
+
+    def test_search_matches_word_prefixes(self):
+        self.assertCountEqual(
+            self.search_books("expedit nort"),
+            [self.title_match, self.description_match]
+        )
+        self.assertEqual(self.search_books("expedit nortx"), [])
+
+    def test_ranked_results_page_with_cursor(self):
+        for index in range(12):
+            Book.objects.create(
+                title=f"Lighthouse {index}",
+                description=self.DESCRIPTION,
+                chapters=index + 1,
+                type="TB"
+            )
+
+        first = self.client.get(self.BOOK_LIST_URL, {"title": "lighthouse"})
+        second = self.client.get(self.BOOK_LIST_URL, {
+            "title": "lighthouse",
+            "cursor": first.context["page_obj"].next_cursor
+        })
+        found = (
+            list(first.context["book_list"])
+            + list(second.context["book_list"])
+        )
+
+        self.assertEqual(len(found), 14)
+        self.assertEqual(len(set(found)), 14)
+        self.assertEqual(found[-1], self.description_match)
+
+    def test_search_index_follows_updates(self):
+        self.title_match.title = "Harbour keepers"
+        self.title_match.save()
+
+        self.assertEqual(self.search_books("harbour"), [self.title_match])
+        self.assertEqual(
+            self.search_books("lighthouse"), [self.description_match]
+        )
+
+    def test_query_without_words_matches_nothing(self):
+        response = self.client.get(self.BOOK_LIST_URL, {"title": "!!"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context["book_list"]), [])
+
+    def test_stopword_titles_are_searchable(self):
+        it = Book.objects.create(
+            title="It", description="A clown haunts a town.",
+            chapters=30, type="TB"
+        )
+
+        self.assertEqual(self.search_books("It")[0], it)
+        # PostgreSQL indexes titles without dropping stopwords.
+        sql, params = PostgresSearchBackend().match_sql(["it"])
+        self.assertEqual(params, ["simple", "it:*", "english", "it:*"])
+
+    def test_rating_search_uses_media_index(self):
+        response = self.client.get(
+            reverse("media:rating_list"),
+            {"media__title": "inception", "media": "film"}
+        )
+
+        self.assertEqual(
+            [rating.media_id for rating in response.context["rating_list"]],
+            [4]
+        )
+
+
+class TrigramSearchTests(TestCase):
+    fixtures = ["media_vault_db_data.json"]
+
+    def setUp(self) -> None:
+        user = get_user_model().objects.create_user(
+            username="user", password="password"
+        )
+        self.client.force_login(user)
+
+    def test_creator_substring_search(self):
+        response = self.client.get(
+            reverse("media:creator_list"), {"first_name": "saa"}
+        )
+
+        self.assertEqual(
+            [creator.first_name
+             for creator in response.context["creator_list"]],
+            ["Isaac"]
+        )
+        self.assertFalse(response.context["did_you_mean"])
+
+    def test_genre_search_suggests_similar_names(self):
+        response = self.client.get(
+            reverse("media:genre_list"), {"name": "Fantsy"}
+        )
+
+        self.assertTrue(response.context["did_you_mean"])
+        self.assertEqual(
+            response.context["genre_list"][0].name, "Fantasy"
+        )
+
+    def test_user_search_index_follows_renames(self):
+        tom = get_user_model().objects.get(username="Tom")
+        tom.username = "Thomas"
+        tom.save()
+
+        response = self.client.get(
+            reverse("media:user_list"), {"username": "homa"}
+        )
+        self.assertEqual(list(response.context["user_list"]), [tom])
+
+        response = self.client.get(
+            reverse("media:user_list"), {"username": "Tom"}
+        )
+        self.assertNotIn(tom, response.context["user_list"])
+
+
+class AutocompleteTests(TestCase):
+    fixtures = ["media_vault_db_data.json"]
+
+    def setUp(self) -> None:
+        user = get_user_model().objects.create_user(
+            username="user", password="password"
+        )
+        self.client.force_login(user)
+
+    def test_creators_match_first_or_last_name_prefix(self):
+        for query in ("isa", "ASIMOV", "Isaac As"):
+            with self.subTest(query=query):
+                response = self.client.get(
+                    reverse("media:creator_autocomplete"), {"q": query}
+                )
+                self.assertEqual(
+                    response.json(),
+                    {
+                        "results": [{"id": 1, "name": "Isaac Asimov"}],
+                        "more": False,
+                    }
+                )
+
+    def test_genres_are_limited_and_ordered(self):
+        Genre.objects.bulk_create(
+            Genre(name=f"Space opera {index:02}") for index in range(12)
+        )
+        response = self.client.get(
+            reverse("media:genre_autocomplete"), {"q": "space"}
+        )
+
+        data = response.json()
+        self.assertEqual(len(data["results"]), 10)
+        self.assertEqual(data["results"][0]["name"], "Space opera 00")
+        self.assertTrue(data["more"])
+
+    def test_form_renders_only_selected_choices(self):
+        url = reverse("media:film_update", args=[1])
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as before:
+            response = self.client.get(url)
+        self.assertContains(response, "Isaac Asimov")
+        self.assertNotContains(response, "Joanne Rowling")
+        self.assertNotContains(response, "Mystery")
+
+        Creator.objects.bulk_create(
+            Creator(
+                first_name=f"Writer {index}", last_name="Smith",
+                birth_date=datetime.date(1950, 1, 1)
+            )
+            for index in range(50)
+        )
+        with CaptureQueriesContext(connection) as after:
+            self.client.get(url)
+        self.assertEqual(len(after), len(before))
+
+    def test_form_rejects_unknown_ids(self):
+        response = self.client.post(
+            reverse("media:film_update", args=[1]),
+            {
+                "title": "I, Robot",
+                "description": "Description",
+                "country": "UK",
+                "duration": "01:30",
+                "genres": [2, 999],
+            }
+        )
+
+        self.assertIn("genres", response.context["form"].errors)
+
+
+class ChoiceCacheTests(TestCase):
+    fixtures = ["media_vault_db_data.json"]
+
+    def setUp(self) -> None:
+        choice_cache.clear()
+
+    def test_filter_forms_reuse_cached_choices(self):
+        GenreFilterForm()
+
+        with self.assertNumQueries(0):
+            genre_form = GenreFilterForm()
+            CreatorFilterForm()
+
+        self.assertIn(("Fantasy", "Fantasy"),
+                      genre_form.fields["genres"].choices)
+
+    def test_creator_filter_checks_submitted_names_only(self):
+        form = CreatorFilterForm(QueryDict("creators=Joanne&creators=Isaac"))
+        with self.assertNumQueries(1):
+            self.assertTrue(form.is_valid())
+
+        form = CreatorFilterForm(QueryDict("creators=Joanne&creators=Nobody"))
+        self.assertFalse(form.is_valid())
+
+    def test_choices_follow_genre_and_creator_changes(self):
+        GenreFilterForm()
+
+        Genre.objects.create(name="Horror")
+        Creator.objects.get(first_name="Isaac").delete()
+
+        self.assertIn(("Horror", "Horror"),
+                      GenreFilterForm().fields["genres"].choices)
+        self.assertFalse(
+            CreatorFilterForm(QueryDict("creators=Isaac")).is_valid()
+        )
+
+    def test_cache_is_bounded_and_drops_old_versions(self):
+        versioned = VersionedCache(maxsize=2)
+
+        versioned.get_or_set("first", lambda: 1)
+        bump_version("first")
+        self.assertEqual(versioned.get_or_set("first", lambda: 2), 2)
+        self.assertEqual(len(versioned._entries), 1)
+
+        versioned.get_or_set("second", lambda: 3)
+        versioned.get_or_set("third", lambda: 4)
+        self.assertEqual(
+            [name for name, _ in versioned._entries], ["second", "third"]
+        )
+
+
+class FacetTests(TestCase):
+    fixtures = ["media_vault_db_data.json"]
+
+    def setUp(self) -> None:
+        user = get_user_model().objects.create_user(
+            username="user", password="password"
+        )
+        self.client.force_login(user)
+
+    def test_genre_and_creator_facets_count_filtered_results(self):
+        response = self.client.get(reverse("media:film_list"))
+        genre_counts = {
+            facet["name"]: facet["count"]
+            for facet in response.context["genre_facets"]
+        }
+        self.assertEqual(genre_counts["Science Fiction"], 2)
+        self.assertEqual(genre_counts["Fantasy"], 1)
+        self.assertEqual(genre_counts["Comedy"], 0)
+
+        response = self.client.get(
+            reverse("media:film_list"), {GENRES: "Science Fiction"}
+        )
+        self.assertEqual(
+            [(facet["name"], facet["count"])
+             for facet in response.context["creator_facets"]],
+            [("Christopher", 1), ("Isaac", 1)]
+        )
+
+        response = self.client.get(
+            reverse("media:film_list"), {"title": "robot"}
+        )
+        self.assertEqual(
+            [(facet["name"], facet["count"])
+             for facet in response.context["creator_facets"]],
+            [("Isaac", 1)]
+        )
+
+    def test_facets_ignore_their_own_selection(self):
+        response = self.client.get(
+            reverse("media:film_list"), {GENRES: "Science Fiction"}
+        )
+        genre_counts = {
+            facet["name"]: facet["count"]
+            for facet in response.context["genre_facets"]
+        }
+        self.assertEqual(genre_counts["Science Fiction"], 2)
+        self.assertEqual(genre_counts["Fantasy"], 1)
+
+        Book.objects.create(
+            title="Berserk", description="Manga", chapters=1, type="MA"
+        )
+        response = self.client.get(
+            reverse("media:book_list"), {"type": "Manga"}
+        )
+        self.assertEqual(len(response.context["object_list"]), 1)
+        self.assertIn(("Traditional book", 1), response.context["type_facets"])
+        self.assertIn(("Manga", 1), response.context["type_facets"])
+
+    def test_type_and_status_facets(self):
+        response = self.client.get(reverse("media:book_list"))
+        self.assertIn(("Traditional book", 1), response.context["type_facets"])
+
+        response = self.client.get(reverse("media:series_list"))
+        self.assertIn(("Anime", 1), response.context["type_facets"])
+        self.assertIn(("Finished", 1), response.context["status_facets"])
+
+    def test_creator_facet_shows_top_entries_and_selected_ones(self):
+        with mock.patch.object(FilmListView, "creator_facet_size", 1):
+            response = self.client.get(
+                reverse("media:film_list"), {CREATORS: "Isaac"}
+            )
+            self.assertEqual(
+                [facet["name"]
+                 for facet in response.context["creator_facets"]],
+                ["Isaac", "Christopher"]
+            )
+
+            response = self.client.get(reverse("media:film_list"))
+            self.assertEqual(len(response.context["creator_facets"]), 1)
+            self.assertEqual(response.context["creator_facets_offset"], 1)
+
+    def test_creator_facet_endpoint_searches_and_pages(self):
+        with mock.patch.object(FilmListView, "creator_facet_size", 2):
+            response = self.client.get(
+                reverse("media:film_list"), {"creator_facet": ""}
+            )
+            self.assertEqual(
+                [row["name"] for row in response.json()["results"]],
+                ["Christopher", "Hayao"]
+            )
+            self.assertEqual(response.json()["next_offset"], 2)
+
+            response = self.client.get(
+                reverse("media:film_list"),
+                {"creator_facet": "", "offset": 2}
+            )
+            self.assertEqual(response.json()["results"],
+                             [{"name": "Isaac", "count": 1}])
+            self.assertIsNone(response.json()["next_offset"])
+
+        response = self.client.get(
+            reverse("media:film_list"), {"creator_facet": "aya"}
+        )
+        self.assertEqual(response.json()["results"],
+                         [{"name": "Hayao", "count": 1}])
+
+
+class SiteStatisticsTests(TestCase):
+    fixtures = ["media_vault_db_data.json"]
+
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create_user(
+            username="user", password="password"
+        )
+        self.client.force_login(self.user)
+
+    def assert_statistics(self, **expected):
+        statistics = get_statistics()
+        for field, value in expected.items():
+            self.assertEqual(getattr(statistics, field), value, field)
+
+    def test_counters_follow_fixture_and_changes(self):
+        self.assert_statistics(
+            users_count=3, media_count=5, ratings_count=5,
+            books_count=1, films_count=3, series_count=1
+        )
+
+        book = Book.objects.create(
+            title="New book", description="Description",
+            chapters=1, type="TB"
+        )
+        book.users.add(self.user)
+        self.assert_statistics(media_count=6, books_count=2, ratings_count=6)
+
+        book.delete()
+        Film.objects.get(pk=1).delete()
+        self.assert_statistics(
+            media_count=4, books_count=1, films_count=2, ratings_count=4
+        )
+
+        self.user.delete()
+        self.assert_statistics(users_count=2)
+
+    def test_index_does_not_count_large_tables(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse("media:index"))
+
+        self.assertEqual(response.context["media_titles_count"], 5)
+        for query in context.captured_queries:
+            self.assertNotIn("COUNT", query["sql"])
+
+    def test_reconcile_command_repairs_counters(self):
+        SiteStatistics.objects.update(media_count=0, ratings_count=42)
+
+        call_command("reconcile_site_statistics", stdout=StringIO())
+
+        self.assert_statistics(media_count=5, ratings_count=5)
+
+
+class CardQueryTests(TestCase):
+    fixtures = ["media_vault_db_data.json"]
+
+    def setUp(self) -> None:
+        user = get_user_model().objects.create_user(
+            username="user", password="password"
+        )
+        self.client.force_login(user)
+
+        creators = list(Creator.objects.all())
+        genres = list(Genre.objects.all())
+        for index in range(12):
+            book = Book.objects.create(
+                title=f"Card book {index}",
+                description="Description",
+                chapters=index + 1,
+                type="TB"
+            )
+            book.creators.set(creators)
+            book.genres.set(genres)
+
+    def count_book_list_queries(self, page_size):
+        with mock.patch.object(BookListView, "paginate_by", page_size):
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(reverse("media:book_list"))
+        self.assertEqual(len(response.context["book_list"]), page_size)
+        return len(context.captured_queries), response
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        self.count_book_list_queries(2)
+        small_page_queries, _ = self.count_book_list_queries(2)
+        large_page_queries, response = self.count_book_list_queries(10)
+
+        self.assertEqual(small_page_queries, large_page_queries)
+        self.assertNotContains(response, "Author unknown")
+
+    def test_cards_prefetch_limited_creators_and_genres(self):
+        _, response = self.count_book_list_queries(2)
+
+        book = response.context["book_list"][0]
+        self.assertEqual(len(book.card_creators), 2)
+        self.assertEqual(len(book.card_genres), 5)
+        self.assertEqual(
+            [genre.name for genre in book.card_genres],
+            sorted(genre.name for genre in Genre.objects.all())[:5]
+        )
+
+
+class FragmentCacheTests(TestCase):
+    fixtures = ["media_vault_db_data.json"]
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username="user", password="password"
+        )
+        self.client.force_login(self.user)
+        self.book = Book.objects.get(pk=3)
+
+    def render_book_list(self):
+        fragment_stats.reset()
+        response = self.client.get(reverse("media:book_list"))
+        return response, fragment_stats.snapshot()
+
+    def test_warm_renders_hit_the_cache(self):
+        _, cold = self.render_book_list()
+        response, warm = self.render_book_list()
+
+        self.assertEqual(cold["card"]["misses"], 1)
+        self.assertEqual(warm["card"], {
+            "hits": 1, "misses": 0, "hit_ratio": 1.0
+        })
+        self.assertEqual(warm["navigation"]["hit_ratio"], 1.0)
+        self.assertContains(response, "Harry Potter")
+        self.assertContains(response, 'name="csrfmiddlewaretoken"')
+
+    def test_cards_change_with_media_ratings_and_renames(self):
+        self.render_book_list()
+
+        self.book.title = "Renamed book"
+        self.book.save()
+        response, stats = self.render_book_list()
+        self.assertContains(response, "Renamed book")
+        self.assertEqual(stats["card"]["misses"], 1)
+
+        UserMediaRating.objects.create(
+            user=self.user, media=self.book, rating=3, is_hidden=False
+        )
+        response, stats = self.render_book_list()
+        self.assertEqual(stats["card"]["misses"], 1)
+        self.assertContains(response, "Open reviews 1")
+
+        genre = self.book.genres.first()
+        genre.name = "Renamed genre"
+        genre.save()
+        response, stats = self.render_book_list()
+        self.assertEqual(stats["card"]["misses"], 1)
+        self.assertContains(response, "Renamed genre")
+
+        self.book.creators.clear()
+        response, stats = self.render_book_list()
+        self.assertEqual(stats["card"]["misses"], 1)
+        self.assertContains(response, "Author unknown")
+
+    def test_navigation_is_cached_per_user(self):
+        self.render_book_list()
+        other = get_user_model().objects.create_user(
+            username="other", password="password"
+        )
+        self.client.force_login(other)
+
+        response, stats = self.render_book_list()
+        self.assertEqual(stats["navigation"]["misses"], 1)
+        self.assertContains(
+            response, reverse("media:user_detail", args=[other.pk])
+        )
+        self.assertNotContains(
+            response, reverse("media:user_detail", args=[self.user.pk])
+        )
+
+    def test_navigation_ignores_media_choice_and_follows_its_version(self):
+        self.render_book_list()
+        self.client.get(reverse("media:genre_list"), {"media": "film"})
+
+        _, stats = self.render_book_list()
+        self.assertEqual(stats["navigation"]["misses"], 0)
+
+        bump_version(FRAGMENTS_VERSION)
+        _, stats = self.render_book_list()
+        self.assertEqual(stats["navigation"]["misses"], 1)
+
+
+class MediaFeedTests(TestCase):
+    fixtures = ["media_vault_db_data.json"]
+
+    def setUp(self) -> None:
+        user = get_user_model().objects.create_user(
+            username="user", password="password"
+        )
+        self.client.force_login(user)
+
+        creators = list(Creator.objects.all())
+        genres = list(Genre.objects.all())
+        for index in range(4):
+            for media in (
+                Book.objects.create(
+                    title=f"Feed {index} book", description="Description",
+                    chapters=index + 1, type="CS"
+                ),
+                Film.objects.create(
+                    title=f"Feed {index} film", description="Description",
+                    country="UK", duration=datetime.time(1, 30)
+                ),
+                Series.objects.create(
+                    title=f"Feed {index} series", description="Description",
+                    country="UK", status="F", type="AE",
+                    seasons=2, series_number=10
+                ),
+            ):
+                media.creators.set(creators)
+                media.genres.set(genres)
+
+    def count_feed_queries(self, page_size, **params):
+        with mock.patch.object(MediaListView, "paginate_by", page_size):
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(
+                    reverse("media:media_list"), params
+                )
+        return len(context.captured_queries), response
+
+    def test_feed_returns_typed_media_in_order(self):
+        _, response = self.count_feed_queries(6, title="Feed")
+
+        feed = response.context["media_list"]
+        self.assertEqual(
+            [media.title for media in feed],
+            sorted(media.title for media in feed)
+        )
+        self.assertEqual(
+            [type(media) for media in feed],
+            [Book, Film, Series, Book, Film, Series]
+        )
+        self.assertEqual(feed[0].get_type_display(), "Comics")
+        self.assertEqual(feed[2].seasons, 2)
+        self.assertEqual(len(feed[1].card_creators), 2)
+        self.assertContains(
+            response, reverse("media:film_detail", args=[feed[1].pk])
+        )
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        self.count_feed_queries(3)
+        small_page_queries, _ = self.count_feed_queries(3)
+        large_page_queries, response = self.count_feed_queries(15)
+
+        self.assertEqual(len(response.context["media_list"]), 15)
+        self.assertEqual(small_page_queries, large_page_queries)
+
+    def test_feed_supports_genre_and_creator_filters(self):
+        _, response = self.count_feed_queries(20, genres="Drama")
+        self.assertEqual(
+            {media.title for media in response.context["media_list"]},
+            {
+                *(f"Feed {index} {kind}" for index in range(4)
+                  for kind in ("book", "film", "series")),
+                *Media.objects.filter(genres__name="Drama")
+                .values_list("title", flat=True),
+            }
+        )
+
+        _, response = self.count_feed_queries(20, creators="Hayao")
+        self.assertIn(
+            Film,
+            {type(media) for media in response.context["media_list"]}
+        )
+
+    def test_hydrate_media_keeps_rows_without_a_subtype(self):
+        media = Media.objects.create(title="Untyped", media_type="")
+        self.assertEqual(hydrate_media([media]), [media])
+
+
+class ConditionalGetTests(TestCase):
+    fixtures = ["media_vault_db_data.json"]
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username="user", password="password"
+        )
+        self.client.force_login(self.user)
+        self.book = Book.objects.get(pk=3)
+        self.detail_url = reverse("media:book_detail", args=[self.book.pk])
+
+    def revalidate(self, url, response, header="ETag"):
+        request_header = {
+            "ETag": "if_none_match",
+            "Last-Modified": "if_modified_since",
+        }[header]
+        return self.client.get(url, headers={
+            request_header: response.headers[header]
+        })
+
+    def test_unchanged_detail_page_is_not_modified(self):
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Last-Modified", response.headers)
+        self.assertIn("no-cache", response.headers["Cache-Control"])
+
+        with CaptureQueriesContext(connection) as context:
+            revalidated = self.revalidate(self.detail_url, response)
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated.headers["ETag"], response.headers["ETag"])
+        self.assertFalse(any(
+            "media_book" in query["sql"]
+            for query in context.captured_queries
+        ))
+
+        revalidated = self.revalidate(
+            self.detail_url, response, "Last-Modified"
+        )
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_detail_page_changes_with_media_and_links(self):
+        response = self.client.get(self.detail_url)
+
+        self.book.title = "Renamed book"
+        self.book.save()
+        changed = self.revalidate(self.detail_url, response)
+        self.assertEqual(changed.status_code, 200)
+        self.assertContains(changed, "Renamed book")
+
+        creator = self.book.creators.first()
+        creator.first_name = "Renamed"
+        creator.save()
+        self.assertEqual(
+            self.revalidate(self.detail_url, changed).status_code, 200
+        )
+
+    def test_list_page_changes_with_ratings(self):
+        url = reverse("media:rating_list")
+        response = self.client.get(url)
+        self.assertEqual(self.revalidate(url, response).status_code, 304)
+
+        UserMediaRating.objects.create(
+            user=self.user, media=self.book, rating=3, is_hidden=False
+        )
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_validators_are_per_user(self):
+        response = self.client.get(reverse("media:book_list"))
+        other = get_user_model().objects.create_user(
+            username="other", password="password"
+        )
+        self.client.force_login(other)
+
+        self.assertEqual(
+            self.revalidate(reverse("media:book_list"), response)
+            .status_code,
+            200
+        )
+
+
+class SimilarMediaTests(TestCase):
+    fixtures = ["media_vault_db_data.json"]
+
+    def setUp(self) -> None:
+        cache.clear()
+        user = get_user_model().objects.create_user(
+            username="user", password="password"
+        )
+        self.client.force_login(user)
+
+    def neighbours(self, media_id: int) -> list[int]:
+        return list(
+            SimilarMedia.objects.filter(media_id=media_id)
+            .values_list("similar_id", flat=True)
+        )
+
+    def test_neighbours_share_genres_and_creators(self):
+        self.assertEqual(build_similar_media(k=2, workers=1), (5, 8))
+
+        # I, Robot and Fullmetal Alchemist share their genre and creator.
+        self.assertEqual(self.neighbours(1), [2, 4])
+        self.assertAlmostEqual(
+            SimilarMedia.objects.get(media_id=1, rank=0).score, 1.0
+        )
+        self.assertEqual(self.neighbours(3), [5])
+        self.assertFalse(SimilarMedia.objects.filter(
+            media_id=F("similar_id")
+        ).exists())
+
+    def test_media_deleted_during_a_run_are_skipped(self):
+        def build_then_delete(media_ids, weights):
+            features = build_features(media_ids, weights)
+            Media.objects.filter(pk=4).delete()
+            return features
+
+        with mock.patch(
+                "media.similarity.build_features", build_then_delete
+        ):
+            build_similar_media(k=2, workers=1)
+
+        self.assertFalse(SimilarMedia.objects.filter(
+            Q(media_id=4) | Q(similar_id=4)
+        ).exists())
+        self.assertEqual(self.neighbours(1), [2])
+
+    def test_top_neighbours_match_dense_cosine(self):
+        random = np.random.default_rng(0)
+        features = sparse.random(
+            40, 12, density=0.3, format="csr", random_state=random
+        )
+        features = sparse.diags(
+            1 / np.maximum(sparse.linalg.norm(features, axis=1), 1e-9)
+        ) @ features
+        dense = (features @ features.T).toarray()
+        np.fill_diagonal(dense, 0)
+
+        for start, stop, (rows, columns, ranks, scores) in neighbour_blocks(
+                features.tocsr(), k=3, block_size=7, workers=2
+        ):
+            for row in range(start, stop):
+                found = columns[rows == row]
+                expected = [
+                    column for column in np.argsort(-dense[row], kind="stable")
+                    if dense[row, column] > 1e-6
+                ][:3]
+                np.testing.assert_array_equal(found, expected)
+
+    def test_detail_page_lists_similar_titles(self):
+        url = reverse("media:film_detail", kwargs={"pk": 1})
+        response = self.client.get(url)
+        self.assertNotContains(response, "Similar titles")
+
+        call_command(
+            "build_similar_media", neighbours=2, workers=1, stdout=StringIO()
+        )
+        with CaptureQueriesContext(connection) as context:
+            changed = self.client.get(
+                url, HTTP_IF_NONE_MATCH=response.headers["ETag"]
+            )
+
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(
+            [media.title for media in changed.context["similar_media"]],
+            ["Fullmetal Alchemist: Brotherhood", "Inception"]
+        )
+        self.assertContains(
+            changed, reverse("media:series_detail", kwargs={"pk": 2})
+        )
+        self.assertEqual(
+            sum(
+                'FROM "media_similarmedia"' in query["sql"]
+                for query in context.captured_queries
+            ),
+            1
+        )
+
+    def test_only_title_changes_refresh_similar_titles(self):
+        build_similar_media(k=2, workers=1)
+        url = reverse("media:film_detail", kwargs={"pk": 1})
+        response = self.client.get(url)
+        etag = response.headers["ETag"]
+
+        neighbour = Media.objects.get(pk=4)
+        neighbour.description += " Edited."
+        neighbour.save()
+        UserMediaRating.objects.create(
+            user=get_user_model().objects.get(username="user"),
+            media=neighbour, rating=9, is_hidden=False
+        )
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304
+        )
+
+        neighbour.title = "Renamed neighbour"
+        neighbour.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, "Renamed neighbour")
+
+
+class LeaderboardTests(TestCase):
+    fixtures = ["media_vault_db_data.json"]
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.users = [
+            get_user_model().objects.create_user(
+                username=f"user{index}", password="password"
+            )
+            for index in range(MIN_RATINGS)
+        ]
+        self.client.force_login(self.users[0])
+
+    def rate(self, media_id: int, ratings: list) -> list:
+        return [
+            UserMediaRating.objects.create(
+                user=user, media_id=media_id, rating=rating,
+                is_hidden=False
+            )
+            for user, rating in zip(self.users, ratings)
+        ]
+
+    def board(self, genre_id: int, media_type: str) -> list:
+        return list(
+            MediaLeaderboardEntry.objects
+            .filter(genre_id=genre_id, media_type=media_type)
+            .values_list("media_id", "score")
+        )
+
+    def test_ratings_refresh_media_leaderboards(self):
+        # Inception (2, 4) and I, Robot (2) are films of genre 2.
+        self.rate(4, [9, 9, 6])
+        self.rate(1, [4, 5])
+        self.assertEqual(self.board(2, "Film"), [(4, 74 / 13)])
+        self.assertEqual(self.board(4, "Film"), [(4, 74 / 13)])
+
+        rating = UserMediaRating.objects.create(
+            user=self.users[2], media_id=1, rating=9, is_hidden=False
+        )
+        self.assertEqual(self.board(2, "Film"), [(4, 74 / 13), (1, 68 / 13)])
+
+        rating.is_hidden = True
+        rating.save()
+        self.assertEqual(self.board(2, "Film"), [(4, 74 / 13)])
+
+        Media.objects.get(pk=4).genres.remove(2)
+        self.assertEqual(self.board(2, "Film"), [])
+        self.assertEqual(self.board(4, "Film"), [(4, 74 / 13)])
+
+    def test_rater_leaderboard_counts_visible_reviews(self):
+        # The three reviews of the fixture user count too.
+        self.rate(4, [9, 9, 6])
+        self.rate(1, [4])
+        UserMediaRating.objects.create(
+            user=self.users[1], media_id=1, is_hidden=True
+        )
+        self.assertEqual(
+            list(RaterLeaderboardEntry.objects.values_list(
+                "user_id", "reviews_num"
+            )),
+            [(2, 3), (self.users[0].pk, 2), (self.users[1].pk, 1),
+             (self.users[2].pk, 1)]
+        )
+
+        self.users[0].media.remove(4)
+        self.assertEqual(
+            RaterLeaderboardEntry.objects.get(user=self.users[0]).reviews_num,
+            1
+        )
+
+    def test_rebuild_matches_incremental_refresh(self):
+        self.rate(4, [9, 9, 6])
+        self.rate(5, [7, 8, 10])
+        expected = list(MediaLeaderboardEntry.objects.values_list(
+            "genre_id", "media_type", "media_id", "score", "ratings_num"
+        ).order_by("genre_id", "media_id"))
+
+        MediaLeaderboardEntry.objects.all().delete()
+        RaterLeaderboardEntry.objects.all().delete()
+        self.assertEqual(rebuild_leaderboards(batch_size=2), (4, 4))
+        self.assertEqual(
+            list(MediaLeaderboardEntry.objects.values_list(
+                "genre_id", "media_type", "media_id", "score", "ratings_num"
+            ).order_by("genre_id", "media_id")),
+            expected
+        )
+
+    def test_leaderboard_pages(self):
+        self.rate(4, [9, 9, 6])
+        self.rate(5, [7, 8, 10])
+        url = reverse(
+            "media:media_leaderboard",
+            kwargs={"media_type": "films", "genre_pk": 1}
+        )
+        response = self.client.get(url)
+        self.assertContains(response, "Spirited Away")
+        self.assertNotContains(response, "Inception")
+        self.assertEqual(self.client.get(
+            url, headers={"if-none-match": response["ETag"]}
+        ).status_code, 304)
+
+        self.rate(3, [10, 10, 10])
+        self.assertEqual(self.client.get(
+            url, headers={"if-none-match": response["ETag"]}
+        ).status_code, 200)
+
+        self.assertEqual(self.client.get(reverse(
+            "media:media_leaderboard",
+            kwargs={"media_type": "comics", "genre_pk": 1}
+        )).status_code, 404)
+
+        response = self.client.get(reverse("media:rater_leaderboard"))
+        self.assertEqual(
+            [entry.user_id for entry in response.context["entry_list"]],
+            [2] + [user.pk for user in self.users]
+        )
+
+
+class PreferenceTests(TestCase):
+    fixtures = ["media_vault_db_data.json"]
+
+    def setUp(self) -> None:
+        user = get_user_model().objects.create_user(
+            username="user", password="password"
+        )
+        self.client.force_login(user)
+        self.url = reverse("media:genre_list")
+
+    def test_media_choice_is_stored_without_session_writes(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url, {"media": "film"})
+
+        self.assertIn(COOKIE_NAME, response.cookies)
+        self.assertFalse(any(
+            "django_session" in query["sql"]
+            and not query["sql"].startswith("SELECT")
+            for query in context.captured_queries
+        ))
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.context["media"], "film")
+        self.assertNotIn(COOKIE_NAME, response.cookies)
+
+        response = self.client.get(self.url, {"media": "film"})
+        self.assertNotIn(COOKIE_NAME, response.cookies)
+
+    def test_tampered_cookie_falls_back_to_books(self):
+        self.client.cookies[COOKIE_NAME] = '{"media_chosen":"film"}'
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.context["media"], "book")
+
+
+class CachedUserTests(TestCase):
+    fixtures = ["media_vault_db_data.json"]
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username="user", password="password"
+        )
+        self.client.force_login(self.user)
+        self.url = reverse("media:genre_list")
+
+    def user_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url)
+        return response, [
+            query for query in context.captured_queries
+            if 'FROM "media_mediauser"' in query["sql"]
+        ]
+
+    def test_session_user_is_loaded_from_the_cache(self):
+        self.user_queries()
+        response, queries = self.user_queries()
+
+        self.assertEqual(queries, [])
+        self.assertEqual(response.context["user"], self.user)
+
+    def test_password_hash_is_not_cached(self):
+        self.user_queries()
+        entry = cache.get(USER_KEY.format(pk=self.user.pk))
+        self.assertNotIn("password", entry["fields"])
+        self.assertNotIn(self.user.password, str(entry))
+
+        user = CachedModelBackend().get_user(self.user.pk)
+        self.assertEqual(
+            user.get_session_auth_hash(), self.user.get_session_auth_hash()
+        )
+        with self.assertNumQueries(1):
+            self.assertTrue(user.check_password("password"))
+        user.set_password("changed-password")
+        self.assertNotEqual(
+            user.get_session_auth_hash(), entry["session_auth_hash"]
+        )
+
+    def test_permission_changes_drop_cached_users_on_commit(self):
+        key = USER_KEY.format(pk=self.user.pk)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.user.user_permissions.add(Permission.objects.first())
+            # Another request caches the user before the change commits.
+            self.user_queries()
+            self.assertIsNotNone(cache.get(key))
+
+        for callback in callbacks:
+            callback()
+        self.assertIsNone(cache.get(key))
+
+    def test_cached_user_is_dropped_on_changes(self):
+        self.user_queries()
+        self.user.first_name = "Renamed"
+        self.user.save()
+        response, queries = self.user_queries()
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(response.context["user"].first_name, "Renamed")
+
+        self.user.user_permissions.add(Permission.objects.first())
+        self.assertIsNone(cache.get(USER_KEY.format(pk=self.user.pk)))
+
+        self.user.set_password("changed-password")
+        self.user.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 302)
+
+    def test_deleted_user_is_logged_out(self):
+        self.user_queries()
+        self.user.delete()
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 302)
+
+
+@override_settings(ROOT_URLCONF="media.tests")
+class AsyncListViewTests(TransactionTestCase):
+    # Outside a test transaction, reads go to the replicas if configured.
+    databases = "__all__"
+    fixtures = ["media_vault_db_data.json"]
+
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create_user(
+            username="user", password="password"
+        )
+        self.async_client.force_login(self.user)
+
+    async def test_async_list_matches_the_sync_list(self):
+        with mock.patch(
+                "media.views.mixins.mixins.gather_in_threads",
+                wraps=gather_in_threads
+        ) as gather:
+            response = await self.async_client.get("/async/books/")
+        expected = await self.async_client.get(reverse("media:book_list"))
+
+        self.assertEqual(len(gather.call_args.args[0]), 4)
+        self.assertContains(response, "Harry Potter")
+        for name in ("type_facets", "genre_facets", "creator_facets"):
+            self.assertEqual(response.context[name], expected.context[name])
+        self.assertEqual(
+            list(response.context["book_list"]),
+            list(expected.context["book_list"])
+        )
+
+    async def test_async_index_and_login_redirect(self):
+        response = await self.async_client.get("/async/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["media_titles_count"], 5)
+
+        await self.async_client.alogout()
+        response = await self.async_client.get("/async/books/")
+        self.assertEqual(response.status_code, 302)
+
+
+class ConnectionPoolTests(TestCase):
+    POSTGRES = {
+        "POSTGRES_DB": "media_vault",
+        "POSTGRES_USER": "media_vault",
+        "POSTGRES_PASSWORD": "password",
+        "POSTGRES_HOST": "localhost",
+        "POSTGRES_DB_PORT": "5432",
+    }
+
+    def test_pool_is_sized_from_the_environment(self):
+        with mock.patch.dict("os.environ", {
+            **self.POSTGRES,
+            "DB_POOL_MIN_SIZE": "1",
+            "DB_POOL_MAX_SIZE": "4",
+        }):
+            database = postgres_database()
+        pool = database["OPTIONS"]["pool"]
+        self.assertEqual((pool["min_size"], pool["max_size"]), (1, 4))
+        self.assertTrue(database["CONN_HEALTH_CHECKS"])
+
+        with mock.patch.dict(
+                "os.environ", {**self.POSTGRES, "DB_POOL": "0"}
+        ):
+            database = postgres_database()
+        self.assertNotIn("OPTIONS", database)
+        self.assertEqual(database["CONN_MAX_AGE"], 0)
+
+    def test_pool_usage_between_two_snapshots(self):
+        before = dict.fromkeys(
+            ("requests_num", "requests_queued", "requests_wait_ms",
+             "requests_errors", "connections_num"), 0
+        )
+        after = {
+            **before,
+            "requests_num": 4, "requests_wait_ms": 10, "connections_num": 1
+        }
+
+        usage = pool_usage(before, after)
+
+        self.assertEqual(usage["checkouts"], 4)
+        self.assertEqual(usage["mean_wait_ms"], 2.5)
+        self.assertEqual(usage["connections_opened"], 1)
+        self.assertEqual(pool_usage(None, None), {})
+
+    def test_health_and_pool_status(self):
+        response = self.client.get(reverse("media:health"))
+        self.assertEqual(response.json(), {"database": "ok"})
+
+        user = get_user_model().objects.create_user(
+            username="user", password="password"
+        )
+        self.client.force_login(user)
+        response = self.client.get(reverse("media:pool_status"))
+        self.assertEqual(response.status_code, 403)
+
+        user.is_staff = True
+        user.save()
+        response = self.client.get(reverse("media:pool_status"))
+        # SQLite connections are not pooled.
+        self.assertIsNone(pool_stats())
+        self.assertEqual(response.json(), {"pool": None})
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self) -> None:
+        self.router = PrimaryReplicaRouter()
+        self.factory = RequestFactory()
+
+    def read_from_replica(self, request) -> tuple[bool, HttpResponse]:
+        reads = []
+
+        def get_response(request):
+            reads.append(reads_from_replica())
+            return HttpResponse()
+
+        response = ReplicaPinningMiddleware(get_response)(request)
+        return reads[0], response
+
+    def test_only_reads_in_replica_mode_go_to_the_replica(self):
+        self.assertEqual(self.router.db_for_read(Media), "default")
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Media), "replica")
+            self.assertEqual(self.router.db_for_write(Media), "default")
+            with replica_reads(False):
+                self.assertEqual(self.router.db_for_read(Media), "default")
+            cache_entry = DatabaseCache("cache", {}).cache_model_class
+            self.assertEqual(self.router.db_for_read(cache_entry), "default")
+        self.assertFalse(self.router.allow_migrate("replica", "media"))
+
+    def test_writing_client_is_pinned_to_the_primary(self):
+        reads, _ = self.read_from_replica(self.factory.get("/books/"))
+        self.assertTrue(reads)
+
+        reads, response = self.read_from_replica(
+            self.factory.post("/ratings/create/")
+        )
+        self.assertFalse(reads)
+        pin = response.cookies[PIN_COOKIE_NAME]
+        self.assertEqual(pin["max-age"], 10)
+
+        request = self.factory.get("/books/")
+        request.COOKIES[PIN_COOKIE_NAME] = pin.value
+        reads, _ = self.read_from_replica(request)
+        self.assertFalse(reads)
+
+        with override_settings(REPLICA_PIN_SECONDS=0):
+            reads, _ = self.read_from_replica(request)
+        self.assertTrue(reads)
+
+    def test_cached_users_are_read_from_the_primary(self):
+        reads = []
+        with mock.patch(
+                "media.backends.cache.get",
+                side_effect=lambda key: reads.append(reads_from_replica())
+        ), mock.patch.object(
+                ModelBackend, "get_user",
+                side_effect=lambda user_id: reads.append(reads_from_replica())
+        ), replica_reads():
+            CachedModelBackend().get_user(1)
+        self.assertEqual(reads, [False, False])
+
+    def test_fresh_versions_are_not_cached_from_a_replica(self):
+        cache.clear()
+        choice_cache.clear()
+        loader = mock.Mock(return_value=["genre"])
+
+        # The cleared cache hands out a new version, as a write would.
+        with replica_reads():
+            choice_cache.get_or_set("stale", loader)
+            choice_cache.get_or_set("stale", loader)
+            self.assertEqual(loader.call_count, 2)
+
+            with override_settings(REPLICA_PIN_SECONDS=0):
+                choice_cache.get_or_set("stale", loader)
+                choice_cache.get_or_set("stale", loader)
+            self.assertEqual(loader.call_count, 3)
+
+
+class QueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    fixtures = ["media_vault_db_data.json"]
+
+    def setUp(self) -> None:
+        self.user = get_user_model().objects.create_user(
+            username="user", password="password"
+        )
+        self.client.force_login(self.user)
+
+        creators = list(Creator.objects.all())
+        genres = list(Genre.objects.all())
+        for index in range(15):
+            for media in (
+                Book.objects.create(
+                    title=f"Book {index}", description="Description",
+                    chapters=index + 1, type="TB"
+                ),
+                Film.objects.create(
+                    title=f"Film {index}", description="Description",
+                    country="UK", duration=datetime.time(1, 30)
+                ),
+                Series.objects.create(
+                    title=f"Series {index}", description="Description",
+                    country="UK", status="F", type="AE",
+                    seasons=1, series_number=10
+                ),
+            ):
+                media.creators.set(creators)
+                media.genres.set(genres)
+                UserMediaRating.objects.create(
+                    user=self.user, media=media, rating=7,
+                    review="Review", is_hidden=False
+                )
+
+    def test_views_stay_within_query_budget(self):
+        urls = [
+            reverse("media:index"),
+            reverse("media:book_list"),
+            reverse("media:film_list"),
+            reverse("media:series_list"),
+            reverse("media:media_list"),
+            reverse("media:book_detail", kwargs={"pk": 3}),
+            reverse("media:film_detail", kwargs={"pk": 1}),
+            reverse("media:series_detail", kwargs={"pk": 2}),
+            reverse("media:rating_list"),
+            reverse("media:user_detail", kwargs={"pk": self.user.pk}),
+            reverse("media:user_detail", kwargs={"pk": 2}),
+            reverse(
+                "media:media_leaderboard",
+                kwargs={"media_type": "books", "genre_pk": 1}
+            ),
+            reverse("media:rater_leaderboard"),
+            reverse("media:creator_autocomplete"),
+            reverse("media:genre_autocomplete"),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertWithinQueryBudget(url)
+        for url, sort in (
+                (reverse("media:book_list"), "score"),
+                (reverse("media:series_list"), "released"),
+        ):
+            with self.subTest(url=url, sort=sort):
+                self.assertWithinQueryBudget(url, {"sort": sort})
+        self.assertWithinQueryBudget(
+            reverse("media:creator_autocomplete"), {"q": "ro"}
+        )
+
+    def test_fingerprint_ignores_literals(self):
+        self.assertEqual(
+            fingerprint(
+                "SELECT * FROM t WHERE id = 12 AND name = 'it''s' "
+                "AND pk IN (1, 2, 3)"
+            ),
+            "SELECT * FROM t WHERE id = ? AND name = ? AND pk IN (...)"
+        )
+        self.assertEqual(
+            duplicated_fingerprints([
+                {"sql": "SELECT * FROM t WHERE id = 1"},
+                {"sql": "SELECT * FROM t WHERE id = 2"},
+                {"sql": "SELECT * FROM u"},
+            ]),
+            [("SELECT * FROM t WHERE id = ?", 2)]
+        )
+
+    @override_settings(DEBUG=True)
+    def test_middleware_warns_about_overruns(self):
+        url = reverse("media:genre_list")
+        request = RequestFactory().get(url)
+        request.resolver_match = resolve(url)
+
+        def get_response(request):
+            for _ in range(2):
+                list(Genre.objects.filter(pk=1))
+            return HttpResponse()
+
+        middleware = QueryBudgetMiddleware(get_response)
+        with mock.patch.object(
+            GenreListView, "query_budget", 1, create=True
+        ):
+            with self.assertLogs("media.middleware", "WARNING") as logs:
+                middleware(request)
+
+        self.assertIn(
+            "media:genre_list ran 2 queries, over its budget of 1",
+            logs.output[0]
+        )
+        self.assertIn('2x SELECT "media_genre"', logs.output[0])
+
+
+class PlanSnapshotTests(TestCase):
+    fixtures = ["media_vault_db_data.json"]
+
+    def test_hot_query_plans_do_not_degrade(self):
+        path = snapshot_path(connection.vendor)
+        if not path.is_file():
+            self.skipTest(f"No plan snapshot for {connection.vendor}")
+
+        queries = capture_workload(
+            get_workload_client(), get_workload_endpoints()
+        )
+        problems = compare_snapshots(
+            json.loads(path.read_text()), take_snapshot(queries)
+        )
+        self.assertFalse(problems, "\n\n".join((
+            *problems,
+            "Add an index, or run advise_indexes --update-snapshot on a "
+            "database loaded with media_vault_db_data.json if the change "
+            "is intended.",
+        )))
+
+    def test_flags_scans_and_sorts(self):
+        sql = (
+            'SELECT "media_book"."type" FROM "media_book" U0 '
+            'ORDER BY U0."chapters" ASC'
+        )
+        self.assertEqual(
+            find_issues(
+                ["SCAN U0", "USE TEMP B-TREE FOR ORDER BY"], sql, "sqlite"
+            ),
+            [
+                PlanIssue("sequential scan", "media_book", "SCAN U0"),
+                PlanIssue(
+                    "sort", "media_book", "USE TEMP B-TREE FOR ORDER BY"
+                ),
+            ]
+        )
+        self.assertEqual(
+            find_issues(
+                ["SCAN media_book USING INDEX book_type_idx"], sql, "sqlite"
+            ),
+            []
+        )
+
+    def test_suggests_partial_index_for_boolean_filters(self):
+        sql = (
+            'SELECT "user_media_rating"."id" FROM "user_media_rating" '
+            'WHERE (NOT "user_media_rating"."is_hidden" AND '
+            '"user_media_rating"."user_id" = %s) '
+            'ORDER BY "user_media_rating"."id" ASC'
+        )
+        issue = PlanIssue("sequential scan", "user_media_rating", "")
+        suggestion = suggest_index(issue, sql, (3,))
+
+        self.assertEqual(
+            suggestion,
+            IndexSuggestion(
+                "user_media_rating", ("user_id", "id"), ("is_hidden", False)
+            )
+        )
+        self.assertIn(
+            "UserMediaRating: models.Index(fields=('user', 'id'), "
+            "condition=Q(is_hidden=False)",
+            suggestion.as_code()
+        )
+
+    def test_detects_degraded_plans(self):
+        stored = [{
+            "query": "SELECT 1",
+            "endpoints": ["index"],
+            "plan": ["SEARCH media_media USING INDEX media_title_id_idx"],
+            "issues": [],
+        }]
+        current = [{
+            **stored[0],
+            "plan": ["SCAN media_media"],
+            "issues": ["sequential scan on media_media: SCAN media_media"],
+        }]
+
+        self.assertEqual(compare_snapshots(stored, stored), [])
+        [problem] = compare_snapshots(stored, current)
+        self.assertIn("new: sequential scan on media_media", problem)
+        self.assertEqual(
+            compare_snapshots(stored, []),
+            ["index no longer run SELECT 1"]
+        )
+
+    def test_advise_indexes_command(self):
+        out = StringIO()
+        call_command("advise_indexes", only=["rating_list"], stdout=out)
+        self.assertIn("queries scan or sort without an index", out.getvalue())
+        self.assertIn("No indexes to propose.", out.getvalue())
+
+
+class CatalogGeneratorTests(TestCase):
+    def setUp(self) -> None:
+        call_command(
+            "generate_catalog",
+            creators=20, genres=5, books=30, films=20, series=10,
+            users=10, ratings=200, seed=7, stdout=StringIO()
+        )
+
+    def test_generates_linked_catalog_with_derived_data(self):
+        self.assertEqual(Book.objects.count(), 30)
+        self.assertEqual(Film.objects.count(), 20)
+        self.assertEqual(Series.objects.count(), 10)
+        self.assertEqual(
+            Media.objects.filter(media_type="Film").count(), 20
+        )
+        self.assertFalse(Media.objects.filter(creators=None).exists())
+        self.assertFalse(Media.objects.filter(genres=None).exists())
+
+        statistics = get_statistics()
+        self.assertEqual(statistics.media_count, 60)
+        self.assertEqual(
+            statistics.ratings_count, UserMediaRating.objects.count()
+        )
+
+        media = Media.objects.order_by("-reviews_num").first()
+        self.assertEqual(
+            media.reviews_num,
+            media.media_ratings.filter(is_hidden=False).count()
+        )
+        self.assertEqual(
+            RaterLeaderboardEntry.objects.count(),
+            UserMediaRating.objects.filter(is_hidden=False)
+            .values("user").distinct().count()
+        )
+
+        creator = Creator.objects.first()
+        user = get_user_model().objects.first()
+        self.client.force_login(user)
+        response = self.client.get(
+            reverse("media:creator_list"),
+            {"first_name": creator.first_name}
+        )
+        self.assertIn(creator, response.context["creator_list"])
+
+    def test_generation_invalidates_versions(self):
+        versions = {
+            name: get_version(name) for name in ("media", "ratings", "users")
+        }
+
+        call_command(
+            "generate_catalog",
+            creators=2, genres=1, books=2, films=0, series=0,
+            users=2, ratings=4, seed=8, stdout=StringIO()
+        )
+
+        for name, version in versions.items():
+            with self.subTest(name=name):
+                self.assertGreater(get_version(name), version)
+
+    def test_benchmark_reports_json(self):
+        output = StringIO()
+        call_command(
+            "benchmark_endpoints",
+            requests=2, warmup=0, only=["book_list", "book_detail"],
+            stdout=output, stderr=StringIO()
+        )
+
+        report = json.loads(output.getvalue())
+        self.assertEqual(report["meta"]["catalog"]["books"], 30)
+        self.assertEqual(
+            [result["name"] for result in report["results"]],
+            ["book_list", "book_detail"]
+        )
+        for result in report["results"]:
+            self.assertEqual(result["status"], 200)
+            self.assertLessEqual(
+                result["latency_ms"]["p50"], result["latency_ms"]["p99"]
+            )
+            self.assertGreater(result["queries"]["max"], 0)
+            self.assertGreater(result["peak_memory_kb"], 0)
+        self.assertGreater(
+            report["results"][0]["fragment_cache"]["card"]["hits"], 0
+        )
+
+    # Without the test runner's "testserver", so the Host header counts.
+    @override_settings(ALLOWED_HOSTS=["localhost"])
+    def test_benchmark_through_the_asgi_handler(self):
+        output = StringIO()
+        call_command(
+            "benchmark_endpoints", asgi=True,
+            requests=1, warmup=0, only=["index", "book_list"],
+            stdout=output, stderr=StringIO()
+        )
+
+        report = json.loads(output.getvalue())
+        self.assertEqual(report["meta"]["handler"], "asgi")
+        self.assertEqual(
+            [result["status"] for result in report["results"]], [200, 200]
+        )
+
+    def test_benchmark_fails_on_error_responses(self):
+        with override_settings(ALLOWED_HOSTS=["example.com"]):
+            with self.assertRaisesMessage(
+                    CommandError, "book_list (400)"
+            ):
+                call_command(
+                    "benchmark_endpoints",
+                    requests=1, warmup=0, only=["book_list"],
+                    stdout=StringIO(), stderr=StringIO()
+                )
+
+
+class ImportMediaTests(TestCase):
+    fixtures = ["media_vault_db_data.json"]
+
+    DESCRIPTION = "An imported description that is long enough to be valid."
+
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+    def write_jsonl(self, records) -> Path:
+        path = self.directory / "catalog.jsonl"
+        path.write_text("\n".join(json.dumps(record) for record in records))
+        return path
+
+    def import_media(self, path, **options):
+        output = StringIO()
+        call_command(
+            "import_media", str(path), stdout=output, stderr=output,
+            **options
+        )
+        return output.getvalue()
+
+    def test_import_invalidates_list_etags(self):
+        user = get_user_model().objects.create_user(
+            username="user", password="password"
+        )
+        self.client.force_login(user)
+        url = reverse("media:book_list")
+        response = self.client.get(url)
+        path = self.write_jsonl([{
+            "media_type": "book", "title": "Imported book",
+            "description": self.DESCRIPTION, "chapters": 3, "type": "TB",
+        }])
+
+        self.import_media(path)
+
+        revalidated = self.client.get(
+            url, headers={"if_none_match": response.headers["ETag"]}
+        )
+        self.assertEqual(revalidated.status_code, 200)
+        self.assertContains(revalidated, "Imported book")
+
+    def test_imports_all_media_types_with_links(self):
+        path = self.write_jsonl([
+            {
+                "media_type": "book", "title": "Imported comic",
+                "description": self.DESCRIPTION, "chapters": 12,
+                "type": "Comics", "genres": ["Fantasy", "Cosy crime"],
+                "creators": [{"first_name": "Joanne", "last_name": "Rowling",
+                              "birth_date": "1965-07-31"}],
+            },
+            {
+                "media_type": "film", "title": "Imported film",
+                "description": self.DESCRIPTION, "country": "UK",
+                "duration": "01:45:00", "created_at": "2001-05-04",
+                "creators": [{"first_name": "Greta", "last_name": "Gerwig",
+                              "birth_date": "1983-08-04"}],
+            },
+            {
+                "media_type": "series", "title": "Imported series",
+                "description": self.DESCRIPTION, "country": "Japan",
+                "status": "F", "type": "AE", "seasons": 2,
+                "series_number": 24,
+            },
+            {"media_type": "book", "title": "Too short", "description": "x"},
+        ])
+
+        output = self.import_media(path, batch_size=2)
+
+        self.assertIn("Skipped record 4", output)
+        book = Book.objects.get(title="Imported comic")
+        self.assertEqual(book.type, "CS")
+        self.assertEqual(book.media_type, "Book")
+        self.assertEqual(
+            sorted(genre.name for genre in book.genres.all()),
+            ["Cosy crime", "Fantasy"]
+        )
+        self.assertEqual(Genre.objects.filter(name="Fantasy").count(), 1)
+        self.assertEqual(
+            Film.objects.get(title="Imported film").creators.get().last_name,
+            "Gerwig"
+        )
+        self.assertTrue(Series.objects.filter(title="Imported series")
+                        .exists())
+        self.assertEqual(get_statistics().media_count, 8)
+        self.assertIn(
+            ("Cosy crime", "Cosy crime"),
+            GenreFilterForm().fields["genres"].choices
+        )
+
+    def test_imports_csv(self):
+        path = self.directory / "catalog.csv"
+        path.write_text(
+            "media_type,title,description,country,duration,genres,creators\n"
+            f"film,CSV film,{self.DESCRIPTION},France,00:95:00,,\n"
+            f"film,CSV film 2,{self.DESCRIPTION},France,01:35:00,"
+            "Drama|Comedy,Agnes;Varda;1928-05-30\n"
+        )
+
+        output = self.import_media(path)
+
+        self.assertIn("Skipped record 1", output)
+        film = Film.objects.get(title="CSV film 2")
+        self.assertEqual(film.duration, datetime.time(1, 35))
+        self.assertEqual(film.genres.count(), 2)
+        self.assertEqual(film.creators.get().first_name, "Agnes")
+
+    def test_resumes_after_checkpoint(self):
+        path = self.write_jsonl([
+            {"media_type": "film", "title": f"Resumed film {index}",
+             "description": self.DESCRIPTION, "country": "UK",
+             "duration": "01:30:00",
+             "creators": [{"first_name": f"Director{index}",
+                           "last_name": "Smith",
+                           "birth_date": "1970-01-01"}]}
+            for index in range(5)
+        ])
+        ImportCheckpoint.objects.create(
+            name=str(path.resolve()), source=str(path.resolve()), records=3
+        )
+        # Created by the interrupted run, which never indexed it.
+        Creator.objects.bulk_create([Creator(
+            first_name="Director2", last_name="Smith",
+            birth_date=datetime.date(1970, 1, 1)
+        )])
+
+        self.import_media(path, batch_size=1)
+
+        self.assertEqual(
+            list(Film.objects.filter(title__startswith="Resumed")
+                 .order_by("title").values_list("title", flat=True)),
+            ["Resumed film 3", "Resumed film 4"]
+        )
+        self.assertEqual(ImportCheckpoint.objects.get().records, 5)
+        self.assertQuerySetEqual(
+            Creator.objects.filter(
+                first_name__startswith="Director"
+            ).exclude(
+                pk__in=SearchTrigram.objects.filter(
+                    kind="creator"
+                ).values("object_id")
+            ),
+            []
+        )
+
+        self.import_media(path)
+        self.assertEqual(
+            Film.objects.filter(title__startswith="Resumed").count(), 2
+        )
+
+    def test_checkpoint_is_rolled_back_with_its_batch(self):
+        path = self.write_jsonl([
+            {"media_type": "film", "title": f"Film {index}",
+             "description": self.DESCRIPTION, "country": "UK",
+             "duration": "01:30:00"}
+            for index in range(2)
+        ])
+
+        write_checkpoint = import_media.Command.write_checkpoint
+
+        def fail_second_write(command, checkpoint, source, records):
+            if records == 2:
+                raise DatabaseError("connection lost")
+            write_checkpoint(command, checkpoint, source, records)
+
+        with mock.patch.object(
+                import_media.Command, "write_checkpoint", fail_second_write
+        ), self.assertRaises(DatabaseError):
+            self.import_media(path, batch_size=1)
+
+        self.assertEqual(ImportCheckpoint.objects.get().records, 1)
+        self.assertTrue(Film.objects.filter(title="Film 0").exists())
+        self.assertFalse(Film.objects.filter(title="Film 1").exists())
+
+    def test_rejects_lines_that_are_not_objects(self):
+        path = self.directory / "catalog.jsonl"
+        path.write_text('{"media_type": "film"}\n[1, 2]\n')
+
+        with self.assertRaisesMessage(
+                CommandError, "Line 2 is not a JSON object"
+        ):
+            self.import_media(path)
+
+
+class RatingExportTests(TestCase):
+    fixtures = ["media_vault_db_data.json"]
+
+    def setUp(self) -> None:
+        self.viewer = get_user_model().objects.create_user(
+            username="user", password="password"
+        )
+        self.alice = get_user_model().objects.get(username="alice")
+
+    def export(self, user, export_format):
+        response = self.client.get(
+            reverse("media:user_rating_export", kwargs={"pk": user.pk}),
+            {"format": export_format}
+        )
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_csv_export_of_own_library_includes_hidden_ratings(self):
+        self.client.force_login(self.alice)
+
+        lines = self.export(self.alice, "csv").splitlines()
+
+        self.assertEqual(
+            lines[0],
+            "media_id,title,media_type,genres,rating,review,status,is_hidden"
+        )
+        self.assertEqual(len(lines), 3)
+        self.assertIn("4,Inception,Film,Mystery|Science Fiction", lines[1])
+
+    def test_jsonl_export_hides_hidden_ratings_from_others(self):
+        self.client.force_login(self.viewer)
+
+        self.assertEqual(self.export(self.alice, "jsonl"), "")
+
+        tom = get_user_model().objects.get(username="Tom")
+        rows = [
+            json.loads(line)
+            for line in self.export(tom, "jsonl").splitlines()
+        ]
+        self.assertEqual([row["media_id"] for row in rows], [1, 4, 5])
+        self.assertEqual(rows[0]["title"], "I, Robot")
+        self.assertEqual(rows[0]["genres"], ["Science Fiction"])
+        self.assertEqual(rows[0]["status"], "Finished")
+
+    def test_unknown_format_is_not_found(self):
+        self.client.force_login(self.viewer)
+        response = self.client.get(
+            reverse("media:user_rating_export", kwargs={"pk": 1}),
+            {"format": "xml"}
+        )
+        self.assertEqual(response.status_code, 404)
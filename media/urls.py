@@ -1,28 +1,35 @@
+from django.conf import settings
 from django.urls import path
 
 from media.views.book_views import (
-    BookListView, BookDetailView,
+    AsyncBookListView, BookListView, BookDetailView,
     BookDeleteView, BookUpdateView,
     BookCreateView
 )
+from media.views.leaderboard_views import (
+    MediaLeaderboardView, RaterLeaderboardView
+)
+from media.views.media_views import AsyncMediaListView, MediaListView
 from media.views.film_views import (
-    FilmListView, FilmCreateView,
+    AsyncFilmListView, FilmListView, FilmCreateView,
     FilmDetailView, FilmDeleteView,
     FilmUpdateView
 )
 from media.views.series_views import (
-    SeriesListView, SeriesCreateView,
+    AsyncSeriesListView, SeriesListView, SeriesCreateView,
     SeriesDetailView, SeriesDeleteView,
     SeriesUpdateView
 )
 from media.views.user_views import (
     UserListView, UserDetailView,
-    UserDeleteView, UserUpdateView
+    UserDeleteView, UserUpdateView,
+    UserRatingExportView
 )
 from media.views.views import (
-    index, GenreListView,
+    async_index, health, index, pool_status, GenreListView,
     CreatorListView, CreatorCreateView,
-    CreatorDeleteView, CreatorUpdateView
+    CreatorDeleteView, CreatorUpdateView,
+    CreatorAutocompleteView, GenreAutocompleteView
 )
 from media.views.rating_views import (
     RatingListView, RatingDetailView,
@@ -30,11 +37,34 @@ from media.views.rating_views import (
     RatingCreateView
 )
 
+ASYNC_VIEWS = settings.ASYNC_VIEWS
+
 urlpatterns = [
-    path("", index, name="index"),
+    path("", async_index if ASYNC_VIEWS else index, name="index"),
+    path("health/", health, name="health"),
+    path("health/pool/", pool_status, name="pool_status"),
     path("genres/", GenreListView.as_view(), name="genre_list"),
     path("creators/", CreatorListView.as_view(), name="creator_list"),
-    path("books/", BookListView.as_view(), name="book_list"),
+    path(
+        "genres/autocomplete/",
+        GenreAutocompleteView.as_view(),
+        name="genre_autocomplete"
+    ),
+    path(
+        "creators/autocomplete/",
+        CreatorAutocompleteView.as_view(),
+        name="creator_autocomplete"
+    ),
+    path(
+        "all/",
+        (AsyncMediaListView if ASYNC_VIEWS else MediaListView).as_view(),
+        name="media_list"
+    ),
+    path(
+        "books/",
+        (AsyncBookListView if ASYNC_VIEWS else BookListView).as_view(),
+        name="book_list"
+    ),
     path("books/<int:pk>/", BookDetailView.as_view(), name="book_detail"),
     path(
         "books/<int:pk>/delete/",
@@ -47,7 +77,11 @@ urlpatterns = [
         name="book_update"
     ),
     path("books/create/", BookCreateView.as_view(), name="book_create"),
-    path("series/", SeriesListView.as_view(), name="series_list"),
+    path(
+        "series/",
+        (AsyncSeriesListView if ASYNC_VIEWS else SeriesListView).as_view(),
+        name="series_list"
+    ),
     path("series/create/", SeriesCreateView.as_view(), name="series_create"),
     path("series/<int:pk>/", SeriesDetailView.as_view(), name="series_detail"),
     path(
@@ -60,7 +94,11 @@ urlpatterns = [
         SeriesUpdateView.as_view(),
         name="series_update"
     ),
-    path("films/", FilmListView.as_view(), name="film_list"),
+    path(
+        "films/",
+        (AsyncFilmListView if ASYNC_VIEWS else FilmListView).as_view(),
+        name="film_list"
+    ),
     path("films/create/", FilmCreateView.as_view(), name="film_create"),
     path("films/<int:pk>/", FilmDetailView.as_view(), name="film_detail"),
     path(
@@ -73,12 +111,27 @@ urlpatterns = [
         FilmUpdateView.as_view(),
         name="film_update"
     ),
+    path(
+        "leaderboards/raters/",
+        RaterLeaderboardView.as_view(),
+        name="rater_leaderboard"
+    ),
+    path(
+        "leaderboards/<str:media_type>/<int:genre_pk>/",
+        MediaLeaderboardView.as_view(),
+        name="media_leaderboard"
+    ),
     path("users/", UserListView.as_view(), name="user_list"),
     path(
         "users/<int:pk>/",
         UserDetailView.as_view(),
         name="user_detail"
     ),
+    path(
+        "users/<int:pk>/ratings/export/",
+        UserRatingExportView.as_view(),
+        name="user_rating_export"
+    ),
     path(
         "users/<int:pk>/delete",
         UserDeleteView.as_view(),
@@ -4,8 +4,18 @@ from django.views import generic
 
 from media.forms.search_forms import MediaSearchForm
 from media.models import Book
-from media.views.mixins.media_mixin import BookMutateMixin, MediaListMixin
+from media.views.mixins.media_mixin import (
+    BookMutateMixin,
+    MediaDetailConditionalMixin,
+    MediaDetailMixin,
+    MediaListMixin,
+    SimilarMediaMixin,
+)
 from media.views.mixins.mixins import (
+    AsyncListMixin,
+    ConditionalGetMixin,
+    ContextPartsMixin,
+    KeysetPaginationMixin,
     SearchMixin,
     TypeChoiceMixin,
 )
@@ -14,8 +24,11 @@ from media.views.mixins.mixins import (
 class BookListView(
     LoginRequiredMixin,
     MediaListMixin,
+    ConditionalGetMixin,
     SearchMixin,
     TypeChoiceMixin,
+    ContextPartsMixin,
+    KeysetPaginationMixin,
     generic.ListView
 ):
     model = Book
@@ -23,11 +36,26 @@ class BookListView(
     template_name = "media/list/book_list.html"
     search_form = MediaSearchForm
     url_create = reverse_lazy("media:book_create")
+    card_template_name = "media/list/cards/book_card.html"
+    card_object_name = "book"
+    card_fields = MediaListMixin.card_fields + ("chapters", "type")
+    query_budget = 9
+
 
+class AsyncBookListView(AsyncListMixin, BookListView):
+    pass
 
-class BookDetailView(LoginRequiredMixin, generic.DetailView):
+
+class BookDetailView(
+    LoginRequiredMixin,
+    MediaDetailConditionalMixin,
+    MediaDetailMixin,
+    SimilarMediaMixin,
+    generic.DetailView
+):
     model = Book
     template_name = "media/detail/book_detail.html"
+    query_budget = 7
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -4,14 +4,29 @@ from django.views import generic
 
 from media.forms.search_forms import MediaSearchForm
 from media.models import Film
-from media.views.mixins.media_mixin import MediaListMixin, FilmMutateMixin
-from media.views.mixins.mixins import SearchMixin
+from media.views.mixins.media_mixin import (
+    FilmMutateMixin,
+    MediaDetailConditionalMixin,
+    MediaDetailMixin,
+    MediaListMixin,
+    SimilarMediaMixin,
+)
+from media.views.mixins.mixins import (
+    AsyncListMixin,
+    ConditionalGetMixin,
+    ContextPartsMixin,
+    KeysetPaginationMixin,
+    SearchMixin,
+)
 
 
 class FilmListView(
     LoginRequiredMixin,
     MediaListMixin,
+    ConditionalGetMixin,
     SearchMixin,
+    ContextPartsMixin,
+    KeysetPaginationMixin,
     generic.ListView
 ):
     model = Film
@@ -19,11 +34,26 @@ class FilmListView(
     template_name = "media/list/film_list.html"
     search_form = MediaSearchForm
     url_create = reverse_lazy("media:film_create")
+    card_template_name = "media/list/cards/film_card.html"
+    card_object_name = "film"
+    card_fields = MediaListMixin.card_fields + ("country", "duration")
+    query_budget = 8
+
 
+class AsyncFilmListView(AsyncListMixin, FilmListView):
+    pass
 
-class FilmDetailView(LoginRequiredMixin, generic.DetailView):
+
+class FilmDetailView(
+    LoginRequiredMixin,
+    MediaDetailConditionalMixin,
+    MediaDetailMixin,
+    SimilarMediaMixin,
+    generic.DetailView
+):
     model = Film
     template_name = "media/detail/film_detail.html"
+    query_budget = 7
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
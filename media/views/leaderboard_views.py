@@ -0,0 +1,76 @@
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from django.views import generic
+
+from media.models import Genre, MediaLeaderboardEntry, RaterLeaderboardEntry
+from media.views.mixins.mixins import (
+    ConditionalGetMixin,
+    KeysetPaginationMixin,
+)
+
+LEADERBOARD_MEDIA_TYPES = {
+    "books": "Book",
+    "films": "Film",
+    "series": "Series",
+}
+
+
+class MediaLeaderboardView(
+    LoginRequiredMixin, ConditionalGetMixin, KeysetPaginationMixin,
+    generic.ListView
+):
+    model = MediaLeaderboardEntry
+    paginate_by = 10
+    template_name = "media/list/media_leaderboard.html"
+    context_object_name = "entry_list"
+    cursor_ordering = ("-score", "media_id")
+    card_template_name = "media/list/cards/leaderboard_card.html"
+    card_object_name = "entry"
+    query_budget = 4
+    conditional_collections = ("leaderboards", "media", "genres")
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.kwargs["media_type"] not in LEADERBOARD_MEDIA_TYPES:
+            raise Http404("Unknown media type")
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_queryset(self):
+        return (
+            MediaLeaderboardEntry.objects
+            .filter(
+                genre_id=self.kwargs["genre_pk"],
+                media_type=LEADERBOARD_MEDIA_TYPES[self.kwargs["media_type"]]
+            )
+            .select_related("media")
+            .only(
+                "score", "ratings_num", "media__title", "media__media_type"
+            )
+        )
+
+    def get_context_data(self, *, object_list=None, **kwargs):
+        context = super().get_context_data(object_list=object_list, **kwargs)
+        context["genre"] = get_object_or_404(Genre, pk=self.kwargs["genre_pk"])
+        context["media_type"] = self.kwargs["media_type"]
+        context["media_types"] = LEADERBOARD_MEDIA_TYPES
+        return context
+
+
+class RaterLeaderboardView(
+    LoginRequiredMixin, ConditionalGetMixin, KeysetPaginationMixin,
+    generic.ListView
+):
+    model = RaterLeaderboardEntry
+    queryset = (
+        RaterLeaderboardEntry.objects
+        .select_related("user")
+        .only("reviews_num", "user__username")
+    )
+    paginate_by = 10
+    template_name = "media/list/rater_leaderboard.html"
+    context_object_name = "entry_list"
+    cursor_ordering = ("-reviews_num", "user_id")
+    card_template_name = "media/list/cards/rater_card.html"
+    card_object_name = "entry"
+    query_budget = 3
+    conditional_collections = ("leaderboards", "users")
@@ -0,0 +1,49 @@
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.views import generic
+
+from media.forms.search_forms import MediaSearchForm
+from media.models import Media
+from media.polymorphic import hydrate_media
+from media.views.mixins.media_mixin import MediaListMixin
+from media.views.mixins.mixins import (
+    AsyncListMixin,
+    ConditionalGetMixin,
+    ContextPartsMixin,
+    KeysetPaginationMixin,
+    SearchMixin,
+)
+
+
+class MediaListView(
+    LoginRequiredMixin,
+    MediaListMixin,
+    ConditionalGetMixin,
+    SearchMixin,
+    ContextPartsMixin,
+    KeysetPaginationMixin,
+    generic.ListView
+):
+    """Books, films and series in one list.
+
+    Pages are read from ``Media`` alone and then hydrated into their
+    concrete classes with one query per media type on the page.
+    """
+    model = Media
+    paginate_by = 10
+    template_name = "media/list/media_list.html"
+    search_form = MediaSearchForm
+    card_template_name = "media/list/cards/media_card.html"
+    card_object_name = "media"
+    card_fields = MediaListMixin.card_fields + ("media_type",)
+    query_budget = 10
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator, page, object_list, is_paginated = super().paginate_queryset(
+            queryset, page_size
+        )
+        page.object_list = hydrate_media(object_list)
+        return paginator, page, page.object_list, is_paginated
+
+
+class AsyncMediaListView(AsyncListMixin, MediaListView):
+    pass
@@ -1,11 +1,19 @@
-from django.db.models import Count, Q, Avg
+from functools import partial
+
+from django.db.models import Count, Prefetch, Q
+from django.http import JsonResponse
 from django.urls import reverse_lazy
 
+from media.facets import creator_facet, genre_facet
+from media.fragments import prefetch_cards
 from media.forms.filter_forms import CreatorFilterForm, GenreFilterForm
 from media.forms.forms import CreatorForm
 from media.forms.media_forms import BookForm, FilmForm, SeriesForm
-from media.models import Series, Film, Book, Creator, Genre
+from media.models import (
+    Series, Film, Book, Creator, Genre, Media, SimilarMedia
+)
 from media.utils import get_reverse_choice
+from media.views.mixins.mixins import ConditionalGetMixin
 
 
 class MediaMutateMixin:
@@ -98,8 +106,159 @@ class SeriesMutateMixin(MediaMutateMixin):
         return context
 
 
+class MediaDetailConditionalMixin(ConditionalGetMixin):
+    conditional_collections = ("creators", "genres", "similar")
+
+    def get_validators(self):
+        row = (
+            Media.objects
+            .filter(pk=self.kwargs["pk"])
+            .values_list("version", "updated_at")
+            .first()
+        )
+        if row is None:
+            return None
+        version, updated_at = row
+        versions, last_modified = super().get_validators()
+        return (*versions, version), max(last_modified, updated_at)
+
+
+class MediaDetailMixin:
+    """Load the creators and genres of the media along with it, since
+    detail templates test and list each of them more than once."""
+
+    def get_queryset(self):
+        return super().get_queryset().prefetch_related("creators", "genres")
+
+
+class SimilarMediaMixin:
+    """Show the titles ``build_similar_media`` found most similar."""
+    similar_media_limit = 5
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        neighbours = (
+            SimilarMedia.objects
+            .filter(media_id=self.object.pk)
+            .select_related("similar")
+            # Ratings do not change the validators of detail pages, so
+            # nothing rating-dependent is shown.
+            .only("similar__title", "similar__media_type")
+        )[:self.similar_media_limit]
+        context["similar_media"] = [
+            neighbour.similar for neighbour in neighbours
+        ]
+        return context
+
+
 class MediaListMixin:
     url_create = None
+    conditional_collections = ("media", "creators", "genres")
+    full_text_lookup = "pk"
+    full_text_rank = True
+    creator_facet_size = 10
+    card_fields = (
+        "title", "description", "created_at", "reviews_num", "reviews_avg",
+        "version"
+    )
+    card_creators_limit = 2
+    card_genres_limit = 5
+    sort_orders = {
+        "title": ("Title", ("title", "id")),
+        "score": ("Top rated", ("-weighted_score", "-id")),
+        "reviews": ("Most reviewed", ("-reviews_num", "-id")),
+        "released": ("Newest", ("-release_order", "-id")),
+        "added": ("Recently added", ("-id",)),
+    }
+
+    def get(self, request, *args, **kwargs):
+        if "creator_facet" in request.GET:
+            return self.get_creator_facet_response()
+        return super().get(request, *args, **kwargs)
+
+    def get_creator_facet_response(self):
+        try:
+            offset = max(int(self.request.GET.get("offset", 0)), 0)
+        except ValueError:
+            offset = 0
+
+        self.object_list = self.get_queryset()
+        rows = creator_facet(
+            self.get_facet_queryset("creators"),
+            query=self.request.GET["creator_facet"],
+            offset=offset,
+            limit=self.creator_facet_size + 1
+        )
+        return JsonResponse({
+            "results": [
+                {"name": name, "count": count}
+                for name, count in rows[:self.creator_facet_size]
+            ],
+            "next_offset": (
+                offset + self.creator_facet_size
+                if len(rows) > self.creator_facet_size
+                else None
+            ),
+        })
+
+    def get_context_parts(self):
+        forms = self.get_filter_forms(self.request.GET)
+        return [
+            *super().get_context_parts(),
+            partial(self.get_genre_facets, forms["genre_filter_form"]),
+            partial(self.get_creator_facets, forms["creators_filter_form"]),
+        ]
+
+    def get_genre_facets(self, genre_form):
+        selected_genres = (
+            genre_form.cleaned_data["genres"]
+            if genre_form.is_valid() else []
+        )
+        genre_counts = genre_facet(self.get_facet_queryset("genres"))
+        return {
+            "genre_facets": [
+                {
+                    "name": name,
+                    "count": genre_counts.get(name, 0),
+                    "selected": name in selected_genres,
+                }
+                for name, _ in genre_form.fields["genres"].choices
+            ],
+        }
+
+    def get_creator_facets(self, creators_form):
+        selected_creators = (
+            creators_form.cleaned_data["creators"]
+            if creators_form.is_valid() else []
+        )
+        creator_rows = creator_facet(
+            self.get_facet_queryset("creators"),
+            pinned=selected_creators,
+            limit=self.creator_facet_size + 1
+        )
+        creator_limit = self.creator_facet_size + len(selected_creators)
+        return {
+            "creator_facets": [
+                {
+                    "name": name,
+                    "count": count,
+                    "selected": name in selected_creators,
+                }
+                for name, count in creator_rows[:creator_limit]
+            ],
+            "creator_facets_offset": (
+                self.creator_facet_size
+                if len(creator_rows) > creator_limit
+                else None
+            ),
+        }
+
+    def get_sort_fields(self) -> list[str]:
+        """Fields the cursor of the picked sort order is made of."""
+        sort = self.get_sort()
+        if sort is None:
+            return []
+        return [field.lstrip("-") for field in self.sort_orders[sort][1]]
 
     def get_filter_forms(self, query_params=None):
         if not hasattr(self, "_filter_forms"):
@@ -115,40 +274,52 @@ class MediaListMixin:
             }
         return self._filter_forms
 
-    def get_queryset(self):
-        queryset = (
-            super()
-            .get_queryset()
-            .prefetch_related("genres", "creators", "media_ratings")
-            .annotate(
-                reviews_num=Count(
-                    "media_ratings",
-                    filter=Q(media_ratings__is_hidden=False)
-                ),
-                reviews_avg=Avg(
-                    "media_ratings__rating",
-                    filter=Q(
-                        media_ratings__is_hidden=False,
-                        media_ratings__rating__isnull=False
-                    )
-                )
-            )
-        )
-
+    def get_facet_filters(self):
+        filters = super().get_facet_filters()
         forms = self.get_filter_forms(self.request.GET)
         if forms["genre_filter_form"].is_valid():
-            queryset = queryset.filter(
-                genres__name__in=forms["genre_filter_form"]
-                .cleaned_data["genres"]
+            filters["genres"] = Q(
+                pk__in=Media.genres.through.objects.filter(
+                    genre__name__in=forms["genre_filter_form"]
+                    .cleaned_data["genres"]
+                ).values("media_id")
             )
 
         if forms["creators_filter_form"].is_valid():
-            queryset = queryset.filter(
-                creators__first_name__in=forms["creators_filter_form"]
-                .cleaned_data["creators"]
+            filters["creators"] = Q(
+                pk__in=Media.creators.through.objects.filter(
+                    creator__first_name__in=forms["creators_filter_form"]
+                    .cleaned_data["creators"]
+                ).values("media_id")
             )
+        return filters
 
-        return queryset
+    def get_queryset(self):
+        # Facets are counted on the list before their own filter, which
+        # ``get_facet_queryset`` puts back together from these two.
+        self.facet_queryset = super().get_queryset()
+        self.facet_filters = self.get_facet_filters()
+        return (
+            self.facet_queryset
+            .filter(*self.facet_filters.values())
+            .only(*self.card_fields, *self.get_sort_fields())
+            .prefetch_related(
+                Prefetch(
+                    "creators",
+                    queryset=Creator.objects.only(
+                        "first_name", "last_name"
+                    )[:self.card_creators_limit],
+                    to_attr="card_creators"
+                ),
+                Prefetch(
+                    "genres",
+                    queryset=Genre.objects.only(
+                        "name"
+                    )[:self.card_genres_limit],
+                    to_attr="card_genres"
+                ),
+            )
+        )
 
     def get_context_data(self, *, object_list=None, **kwargs):
         context = super().get_context_data(object_list=object_list, **kwargs)
@@ -159,11 +330,12 @@ class MediaListMixin:
         forms = self.get_filter_forms(context["query_params"])
         context["genre_filter_form"] = forms["genre_filter_form"]
         context["creators_filter_form"] = forms["creators_filter_form"]
+        prefetch_cards(self.request, context["object_list"])
 
         return context
 
 
-class MediaNameSessionMixin:
+class MediaNamePreferenceMixin:
     media_name = None
     redirect_url = None
 
@@ -179,11 +351,11 @@ class MediaNameSessionMixin:
         if "media" in request.GET:
             media_query = request.GET["media"]
             media_name = media_query if media_query in media_dict else "book"
-            request.session["media_chosen"] = media_name
-        elif "media_chosen" in request.session:
-            media_name = request.session["media_chosen"]
+            request.preferences.set("media_chosen", media_name)
         else:
-            media_name = "book"
+            media_name = request.preferences.get("media_chosen", "book")
+            if media_name not in media_dict:
+                media_name = "book"
 
         self.media_name = media_name
         self.redirect_url = media_dict[media_name]
@@ -201,7 +373,6 @@ class MediaTypeCountMixin:
     def get_queryset(self):
         queryset = super().get_queryset()
 
-        media_chosen = self.request.session.get("media_chosen", "book")
         media_type_to_filter = {
             "book": Count("media__book"),
             "film": Count("media__film"),
@@ -216,7 +387,7 @@ class MediaTypeCountMixin:
             )
         }
         return queryset.annotate(
-            media_type_count=media_type_to_filter[media_chosen]
+            media_type_count=media_type_to_filter[self.media_name]
         )
 
 
@@ -224,7 +395,6 @@ class MediaTypeFilterMixin:
     def get_queryset(self):
         queryset = super().get_queryset()
 
-        media_chosen = self.request.session.get("media_chosen", "book")
         media_type_to_filter = {
             "book": {"media__book__isnull": False},
             "film": {"media__film__isnull": False},
@@ -234,4 +404,4 @@ class MediaTypeFilterMixin:
             "anime": {"media__series__isnull": False,
                       "media__series__type": "AE"}
         }
-        return queryset.filter(**media_type_to_filter[media_chosen])
+        return queryset.filter(**media_type_to_filter[self.media_name])
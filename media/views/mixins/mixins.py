@@ -1,14 +1,42 @@
+import asyncio
+import hashlib
+from datetime import datetime
+from functools import partial
+from typing import Callable, Iterable, Optional
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.db import close_old_connections, connection
+from django.db.models import Q
+from django.http import JsonResponse
+from django.template.loader import render_to_string
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, patch_vary_headers
+)
+from django.middleware.csrf import get_token
+from django.utils.http import http_date, quote_etag
+
+from media.cache import get_version, version_time
+from media.facets import field_facet
+from media.pagination import KeysetPaginator
+from media.routers import may_be_stale
+from media.search import get_search_backend
+from media.search.trigram import TrigramSearch
 from media.utils import get_reverse_choice
 
 
 class SearchMixin:
     search_form = None
+    full_text_lookup = None
+    full_text_rank = False
+    trigram_kind = None
+    did_you_mean = False
 
     def get_context_data(self, *, object_list=None, **kwargs):
         context = super().get_context_data(object_list=object_list, **kwargs)
         query_params = self.request.GET.copy()
         context["query_params"] = query_params
         context["search_form"] = self.search_form(query_params)
+        context["did_you_mean"] = self.did_you_mean
 
         return context
 
@@ -18,11 +46,38 @@ class SearchMixin:
         form = self.search_form(self.request.GET)
         field_name = list(form.fields.keys())[0]
         if form and form.is_valid() and form.cleaned_data[field_name]:
-            queryset = queryset.filter(
-                **{f"{field_name}__icontains": form.cleaned_data[field_name]}
-            )
+            query = form.cleaned_data[field_name]
+            if self.full_text_lookup:
+                queryset = get_search_backend(queryset.db).search(
+                    queryset,
+                    query,
+                    lookup=self.full_text_lookup,
+                    rank=self.full_text_rank
+                )
+                # A query without any word matches nothing and is not
+                # ranked, so it must not order by the rank.
+                if "search_rank" in queryset.query.annotations:
+                    self.search_query = query
+            elif self.trigram_kind:
+                queryset, self.did_you_mean = TrigramSearch(
+                    self.trigram_kind
+                ).search(queryset, query)
+            else:
+                queryset = queryset.filter(
+                    **{f"{field_name}__icontains": query}
+                )
         return queryset
 
+    def get_cursor_ordering(self):
+        # Results are ranked by relevance unless another order is picked.
+        if (
+                self.full_text_rank
+                and getattr(self, "search_query", None)
+                and self.get_sort() is None
+        ):
+            return "-search_rank", "id"
+        return super().get_cursor_ordering()
+
 
 class TypeChoiceMixin:
     def get_context_data(self, *, object_list=None, **kwargs):
@@ -33,12 +88,219 @@ class TypeChoiceMixin:
         ]
         return context
 
-    def get_queryset(self):
-        queryset = super().get_queryset()
+    def get_context_parts(self):
+        return [*super().get_context_parts(), self.get_type_facets]
+
+    def get_type_facets(self):
+        type_counts = field_facet(self.get_facet_queryset("type"), "type")
+        return {
+            "type_facets": [
+                (label, type_counts.get(value, 0))
+                for value, label in self.model.type.field.choices
+            ]
+        }
+
+    def get_facet_filters(self):
+        filters = super().get_facet_filters()
         type_choice = self.request.GET.get("type")
         db_stored_choice = get_reverse_choice(type_choice, self.model.type)
         if db_stored_choice:
-            queryset = queryset.filter(
-                type=db_stored_choice
+            filters["type"] = Q(type=db_stored_choice)
+        return filters
+
+
+async def gather_in_threads(calls: Iterable[Callable]) -> list:
+    """Run ``calls`` concurrently, each in a worker thread with its own
+    database connection, and return their results in order."""
+
+    def run(call):
+        try:
+            return call()
+        finally:
+            close_old_connections()
+
+    return await asyncio.gather(*(
+        sync_to_async(run, thread_sensitive=False)(call) for call in calls
+    ))
+
+
+class ContextPartsMixin:
+    """Build the context of a list view from independent parts.
+
+    Mixins extend ``get_context_parts`` with callables that each return
+    a dict of context entries, like facet counts. Parts must not depend
+    on one another or on the page, since ``AsyncListMixin`` runs them
+    concurrently with the page query.
+    """
+
+    def get_context_parts(self) -> list[Callable[[], dict]]:
+        return []
+
+    def get_facet_filters(self) -> dict[str, Q]:
+        """Conditions of the picked facet values, by facet name."""
+        return {}
+
+    def get_facet_queryset(self, facet: str):
+        """The list filtered by every facet but ``facet``, so picking a
+        value does not hide the counts of its alternatives."""
+        return self.facet_queryset.filter(*(
+            condition for name, condition in self.facet_filters.items()
+            if name != facet
+        ))
+
+    def run_context_parts(self, parts: list[Callable]) -> list:
+        return [part() for part in parts]
+
+    def get_context_data(self, **kwargs):
+        page = partial(super().get_context_data, **kwargs)
+        context, *extras = self.run_context_parts(
+            [page, *self.get_context_parts()]
+        )
+        for extra in extras:
+            context.update(extra)
+        return context
+
+
+class AsyncListMixin:
+    """Serve a ``ContextPartsMixin`` list view natively under ASGI.
+
+    The view code still runs synchronously in a thread, but the page
+    query and the context parts are gathered concurrently, so a page
+    costs about as long as its slowest query instead of their sum.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        # Mixins like LoginRequiredMixin check request.user synchronously;
+        # load it here so they never query from the event loop.
+        request.user = await request.auser()
+        response = super().dispatch(request, *args, **kwargs)
+        if asyncio.iscoroutine(response):
+            response = await response
+        return response
+
+    async def get(self, request, *args, **kwargs):
+        return await sync_to_async(super().get)(request, *args, **kwargs)
+
+    def run_context_parts(self, parts):
+        # Other connections do not see the writes of an open transaction.
+        if connection.in_atomic_block:
+            return super().run_context_parts(parts)
+        return async_to_sync(gather_in_threads)(parts)
+
+
+class KeysetPaginationMixin:
+    cursor_ordering = ("title", "id")
+    # Orders a ``sort`` query parameter picks, by name: a label and the
+    # cursor ordering, which should match an index.
+    sort_orders = {}
+    card_template_name = None
+    card_object_name = None
+
+    def get_sort(self) -> Optional[str]:
+        sort = self.request.GET.get("sort")
+        return sort if sort in self.sort_orders else None
+
+    def get_cursor_ordering(self):
+        sort = self.get_sort()
+        if sort is not None:
+            return self.sort_orders[sort][1]
+        return self.cursor_ordering
+
+    def get_context_data(self, *, object_list=None, **kwargs):
+        context = super().get_context_data(object_list=object_list, **kwargs)
+        context["sort_orders"] = [
+            (name, label) for name, (label, _) in self.sort_orders.items()
+        ]
+        context["sort"] = self.get_sort()
+        return context
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = KeysetPaginator(
+            queryset, page_size, self.get_cursor_ordering()
+        )
+        page = paginator.page(self.request.GET.get("cursor"))
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    def render_to_response(self, context, **response_kwargs):
+        if self.request.headers.get("x-requested-with") == "XMLHttpRequest":
+            page = context["page_obj"]
+            html = "".join(
+                render_to_string(
+                    self.card_template_name,
+                    {self.card_object_name: obj},
+                    request=self.request
+                )
+                for obj in context["object_list"]
             )
-        return queryset
+            return JsonResponse({
+                "html": html,
+                "next_cursor": page.next_cursor if page else None,
+            })
+        return super().render_to_response(context, **response_kwargs)
+
+
+class ConditionalGetMixin:
+    """Answer GET requests with 304 Not Modified when the client already
+    holds the current page.
+
+    The validators are computed before the main query: the versions of
+    the ``conditional_collections`` the page shows, plus whatever a view
+    adds in ``get_validators`` (at most one indexed lookup). The ETag
+    also covers the URL, the user, the chosen media type and the CSRF
+    secret, since navigation and forms depend on them.
+    """
+    conditional_collections = ()
+
+    def get_validators(self) -> Optional[tuple[tuple, Optional[datetime]]]:
+        """Return the values the page depends on and when they last
+        changed, or None to render the page unconditionally."""
+        versions = tuple(
+            get_version(name) for name in self.conditional_collections
+        )
+        return versions, version_time(max(versions)) if versions else None
+
+    def get_etag(self, validators: tuple) -> str:
+        request = self.request
+        # Forms embed tokens derived from the CSRF secret, which
+        # get_token() creates when the client has none yet.
+        get_token(request)
+        key = repr((
+            request.get_full_path(),
+            request.headers.get("x-requested-with"),
+            request.user.pk,
+            request.preferences.get("media_chosen"),
+            request.META["CSRF_COOKIE"],
+            validators,
+        ))
+        return quote_etag(hashlib.md5(key.encode()).hexdigest())
+
+    def get(self, request, *args, **kwargs):
+        state = self.get_validators()
+        if state is None:
+            return super().get(request, *args, **kwargs)
+
+        validators, last_modified = state
+        if last_modified and may_be_stale(last_modified):
+            # The page may be rendered from a replica that lags behind
+            # the validators.
+            return super().get(request, *args, **kwargs)
+        etag = self.get_etag(validators)
+        last_modified = (
+            int(last_modified.timestamp()) if last_modified else None
+        )
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response.headers.setdefault("ETag", etag)
+            if last_modified is not None:
+                response.headers.setdefault(
+                    "Last-Modified", http_date(last_modified)
+                )
+        # Browsers revalidate on every visit, which costs the validators
+        # only.
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ("Cookie", "X-Requested-With"))
+        return response
@@ -6,18 +6,20 @@ from media.forms.search_forms import RatingSearchForm
 from media.models import UserMediaRating
 from media.views.mixins.media_mixin import (
     MediaTypeFilterMixin,
-    MediaNameSessionMixin
+    MediaNamePreferenceMixin
 )
 from media.views.mixins.mixins import (
+    ConditionalGetMixin,
+    KeysetPaginationMixin,
     SearchMixin,
-
 )
 from media.views.mixins.rating_mixins import RatingViewMixin
 
 
 class RatingListView(
-    LoginRequiredMixin, MediaNameSessionMixin,
+    LoginRequiredMixin, ConditionalGetMixin, MediaNamePreferenceMixin,
     SearchMixin, MediaTypeFilterMixin,
+    KeysetPaginationMixin,
     generic.ListView
 ):
     model = UserMediaRating
@@ -30,12 +32,39 @@ class RatingListView(
     search_form = RatingSearchForm
     template_name = "media/list/rating_list.html"
     context_object_name = "rating_list"
+    cursor_ordering = ("media__title", "id")
+    full_text_lookup = "media_id"
+    card_template_name = "media/list/cards/rating_card.html"
+    card_object_name = "rating"
+    query_budget = 5
+    conditional_collections = ("ratings", "media", "users")
 
 
-class RatingDetailView(LoginRequiredMixin, generic.DetailView):
+class RatingDetailView(
+    LoginRequiredMixin,
+    ConditionalGetMixin,
+    generic.DetailView
+):
     model = UserMediaRating
     template_name = "media/detail/rating_detail.html"
     context_object_name = "rating"
+    conditional_collections = ("users",)
+
+    def get_validators(self):
+        row = (
+            UserMediaRating.objects
+            .filter(pk=self.kwargs["pk"])
+            .values_list("updated_at", "media__version", "media__updated_at")
+            .first()
+        )
+        if row is None:
+            return None
+        updated_at, media_version, media_updated_at = row
+        versions, last_modified = super().get_validators()
+        return (
+            (*versions, updated_at, media_version),
+            max(last_modified, updated_at, media_updated_at)
+        )
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
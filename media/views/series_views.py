@@ -1,12 +1,24 @@
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db.models import Q
 from django.urls import reverse_lazy
 from django.views import generic
 
 from media.forms.search_forms import MediaSearchForm
+from media.facets import field_facet
 from media.models import Series
 from media.utils import get_reverse_choice
-from media.views.mixins.media_mixin import MediaListMixin, SeriesMutateMixin
+from media.views.mixins.media_mixin import (
+    MediaDetailConditionalMixin,
+    MediaDetailMixin,
+    MediaListMixin,
+    SeriesMutateMixin,
+    SimilarMediaMixin,
+)
 from media.views.mixins.mixins import (
+    AsyncListMixin,
+    ConditionalGetMixin,
+    ContextPartsMixin,
+    KeysetPaginationMixin,
     SearchMixin,
     TypeChoiceMixin
 )
@@ -15,8 +27,11 @@ from media.views.mixins.mixins import (
 class SeriesListView(
     LoginRequiredMixin,
     MediaListMixin,
+    ConditionalGetMixin,
     SearchMixin,
     TypeChoiceMixin,
+    ContextPartsMixin,
+    KeysetPaginationMixin,
     generic.ListView
 ):
     model = Series
@@ -24,6 +39,12 @@ class SeriesListView(
     template_name = "media/list/series_list.html"
     search_form = MediaSearchForm
     url_create = reverse_lazy("media:series_create")
+    card_template_name = "media/list/cards/series_card.html"
+    card_object_name = "series"
+    card_fields = MediaListMixin.card_fields + (
+        "country", "status", "type", "seasons", "series_number"
+    )
+    query_budget = 10
 
     def get_context_data(self, *, object_list=None, **kwargs):
         context = super().get_context_data(object_list=object_list, **kwargs)
@@ -33,15 +54,31 @@ class SeriesListView(
         ]
         return context
 
-    def get_queryset(self):
-        queryset = super().get_queryset()
+    def get_context_parts(self):
+        return [*super().get_context_parts(), self.get_status_facets]
+
+    def get_status_facets(self):
+        status_counts = field_facet(
+            self.get_facet_queryset("status"), "status"
+        )
+        return {
+            "status_facets": [
+                (label, status_counts.get(value, 0))
+                for value, label in Series.status.field.choices
+            ]
+        }
+
+    def get_facet_filters(self):
+        filters = super().get_facet_filters()
         status_choice = self.request.GET.get("status")
         db_stored_choice = get_reverse_choice(status_choice, Series.status)
         if db_stored_choice:
-            queryset = queryset.filter(
-                status=db_stored_choice
-            )
-        return queryset
+            filters["status"] = Q(status=db_stored_choice)
+        return filters
+
+
+class AsyncSeriesListView(AsyncListMixin, SeriesListView):
+    pass
 
 
 class SeriesCreateView(
@@ -61,9 +98,16 @@ class SeriesUpdateView(
         )
 
 
-class SeriesDetailView(LoginRequiredMixin, generic.DetailView):
+class SeriesDetailView(
+    LoginRequiredMixin,
+    MediaDetailConditionalMixin,
+    MediaDetailMixin,
+    SimilarMediaMixin,
+    generic.DetailView
+):
     model = Series
     template_name = "media/detail/series_detail.html"
+    query_budget = 7
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -1,40 +1,59 @@
 from django.contrib.auth import logout
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.db.models import Prefetch
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from django.urls import reverse_lazy
 from django.views import generic
 
+from media.exports import (
+    RATING_EXPORT_FIELDS,
+    rating_export_rows,
+    stream_csv,
+    stream_jsonl,
+)
 from media.forms.search_forms import UserSearchForm
 from media.forms.user_forms import MediaUserUpdateForm
 from media.models import MediaUser, UserMediaRating
+from media.search.trigram import TrigramSearch
+from media.views.mixins.mixins import ConditionalGetMixin
 
 
-class UserListView(LoginRequiredMixin, generic.ListView):
+class UserListView(LoginRequiredMixin, ConditionalGetMixin, generic.ListView):
     model = MediaUser
     paginate_by = 10
     template_name = "media/list/user_list.html"
     context_object_name = "user_list"
+    did_you_mean = False
+    conditional_collections = ("users",)
 
     def get_context_data(self, *, object_list=None, **kwargs):
         context = super().get_context_data(object_list=object_list, **kwargs)
         context["query_params"] = self.request.GET.copy()
         context["search_form"] = UserSearchForm(self.request.GET)
+        context["did_you_mean"] = self.did_you_mean
         return context
 
     def get_queryset(self):
         queryset = super().get_queryset()
         search_form = UserSearchForm(self.request.GET)
         if search_form.is_valid() and search_form.cleaned_data["username"]:
-            queryset = queryset.filter(
-                username__icontains=search_form.cleaned_data["username"]
+            queryset, self.did_you_mean = TrigramSearch("user").search(
+                queryset, search_form.cleaned_data["username"]
             )
         return queryset
 
 
-class UserDetailView(LoginRequiredMixin, generic.DetailView):
+class UserDetailView(
+    LoginRequiredMixin,
+    ConditionalGetMixin,
+    generic.DetailView
+):
     model = MediaUser
     template_name = "media/detail/user_detail.html"
     context_object_name = "media_user"
+    query_budget = 5
+    conditional_collections = ("users", "ratings", "media")
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -62,6 +81,37 @@ class UserDetailView(LoginRequiredMixin, generic.DetailView):
         return queryset
 
 
+class UserRatingExportView(LoginRequiredMixin, generic.View):
+    chunk_size = 2000
+    content_types = {
+        "csv": "text/csv",
+        "jsonl": "application/x-ndjson",
+    }
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.GET.get("format", "csv")
+        if export_format not in self.content_types:
+            raise Http404("Unknown export format")
+
+        media_user = get_object_or_404(MediaUser, pk=self.kwargs["pk"])
+        ratings = UserMediaRating.objects.filter(user=media_user)
+        if request.user.id != media_user.pk:
+            ratings = ratings.filter(is_hidden=False)
+
+        rows = rating_export_rows(ratings, self.chunk_size)
+        response = StreamingHttpResponse(
+            stream_csv(rows, RATING_EXPORT_FIELDS)
+            if export_format == "csv"
+            else stream_jsonl(rows),
+            content_type=self.content_types[export_format]
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="{media_user.username}-ratings.'
+            f'{export_format}"'
+        )
+        return response
+
+
 class UserDeleteView(LoginRequiredMixin, generic.DeleteView):
     model = MediaUser
     success_url = reverse_lazy("media:user_list")
@@ -1,6 +1,8 @@
-from django.contrib.auth import get_user_model
+from asgiref.sync import sync_to_async
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.exceptions import PermissionDenied
+from django.db import DatabaseError, connection
 from django.http import HttpRequest, HttpResponse, JsonResponse
 from django.shortcuts import render
 from django.template.loader import render_to_string
@@ -9,31 +11,71 @@ from django.views import generic
 
 from media.forms.forms import CreatorForm
 from media.forms.search_forms import GenreSearchForm, CreatorSearchForm
-from media.models import Genre, Media, Creator, UserMediaRating
+from media.models import Genre, Creator, SiteStatistics
+from media.pool import pool_stats
+from media.query_budget import query_budget
+from media.search.prefix import prefix_match
+from media.statistics import aget_statistics, get_statistics
 from media.views.mixins.media_mixin import (
-    MediaNameSessionMixin,
+    MediaNamePreferenceMixin,
     MediaTypeCountMixin
 )
 from media.views.mixins.mixins import (
+    ConditionalGetMixin,
     SearchMixin
 )
 
 
+def index_context(statistics: SiteStatistics) -> dict:
+    return {
+        "media_users_count": statistics.users_count,
+        "media_titles_count": statistics.media_count,
+        "media_ratings_count": statistics.ratings_count,
+        "statistics": statistics,
+    }
+
+
+@query_budget(3)
 @login_required()
 def index(request: HttpRequest) -> HttpResponse:
-    media_users_count = get_user_model().objects.count()
-    context = {
-        "media_users_count": media_users_count,
-        "media_titles_count": Media.objects.all().count(),
-        "media_ratings_count": UserMediaRating.objects.all().count()
-    }
-    return render(request, "home/index.html", context)
+    statistics = get_statistics()
+    return render(request, "home/index.html", index_context(statistics))
+
+
+@query_budget(3)
+@login_required()
+async def async_index(request: HttpRequest) -> HttpResponse:
+    statistics = await aget_statistics()
+    # Templates read the session and the lazy user synchronously.
+    return await sync_to_async(render)(
+        request, "home/index.html", index_context(statistics)
+    )
+
+
+def health(request: HttpRequest) -> JsonResponse:
+    """Whether a database connection can be checked out and used, for
+    load balancer probes."""
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+    except DatabaseError:
+        return JsonResponse({"database": "unavailable"}, status=503)
+    return JsonResponse({"database": "ok"})
+
+
+@login_required()
+def pool_status(request: HttpRequest) -> JsonResponse:
+    """Size, checkouts and wait time of this worker's connection pool."""
+    if not request.user.is_staff:
+        raise PermissionDenied
+    return JsonResponse({"pool": pool_stats()})
 
 
 class GenreListView(
     LoginRequiredMixin,
+    ConditionalGetMixin,
     SearchMixin,
-    MediaNameSessionMixin,
+    MediaNamePreferenceMixin,
     MediaTypeCountMixin,
     generic.ListView
 ):
@@ -41,11 +83,23 @@ class GenreListView(
     template_name = "media/list/genre_list.html"
     paginate_by = 10
     search_form = GenreSearchForm
+    trigram_kind = "genre"
+    conditional_collections = ("genres", "media")
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["leaderboard_type"] = (
+            "films" if self.media_name == "film"
+            else "series" if self.media_name in ("series", "anime")
+            else "books"
+        )
+        return context
 
 
 class CreatorListView(
     LoginRequiredMixin,
-    MediaNameSessionMixin,
+    ConditionalGetMixin,
+    MediaNamePreferenceMixin,
     SearchMixin,
     MediaTypeCountMixin,
     generic.ListView
@@ -54,6 +108,8 @@ class CreatorListView(
     template_name = "media/list/creator_list.html"
     paginate_by = 10
     search_form = CreatorSearchForm
+    trigram_kind = "creator"
+    conditional_collections = ("creators", "media")
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -113,3 +169,45 @@ class CreatorUpdateView(LoginRequiredMixin, generic.UpdateView):
         context = super().get_context_data(**kwargs)
         context["media_name"] = "creator"
         return context
+
+
+class AutocompleteView(LoginRequiredMixin, generic.View):
+    """The first ``limit`` objects whose name starts with ``q``, as
+    JSON, for the creator and genre pickers of the media forms.
+
+    Matches and order come from the indexed lowercase name keys, so a
+    lookup reads ``limit`` index entries however large the table is.
+    """
+    model = None
+    key_fields = ()
+    fields = ()
+    limit = 10
+    query_budget = 3
+
+    def get(self, request, *args, **kwargs):
+        query = request.GET.get("q", "").strip()
+        queryset = self.model.objects.order_by(self.key_fields[0], "pk")
+        if query:
+            queryset = queryset.filter(
+                prefix_match(self.key_fields, query, queryset.db)
+            )
+        objects = list(queryset.only(*self.fields)[:self.limit + 1])
+        return JsonResponse({
+            "results": [
+                {"id": obj.pk, "name": str(obj)}
+                for obj in objects[:self.limit]
+            ],
+            "more": len(objects) > self.limit,
+        })
+
+
+class CreatorAutocompleteView(AutocompleteView):
+    model = Creator
+    key_fields = ("name_key", "reversed_name_key")
+    fields = ("first_name", "last_name")
+
+
+class GenreAutocompleteView(AutocompleteView):
+    model = Genre
+    key_fields = ("name_key",)
+    fields = ("name",)
@@ -0,0 +1,147 @@
+from typing import Optional
+
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, Client
+from django.urls import reverse
+from django.utils.http import urlencode
+
+from media.models import (
+    Book, Creator, Film, Genre, Series, UserMediaRating
+)
+
+
+SERVER_NAME = "localhost"
+# Outside INTERNAL_IPS, which keeps the debug toolbar out of the
+# measurements.
+CLIENT_ADDRESS = "192.0.2.1"
+
+
+class WorkloadAsyncClient(AsyncClient):
+    """AsyncClient sending its requests to ``SERVER_NAME`` from
+    ``CLIENT_ADDRESS``.
+
+    AsyncClient always sends ``Host: testserver`` and turns constructor
+    defaults into further headers, so both are set in the ASGI scope of
+    every request instead.
+    """
+
+    def request(self, **request):
+        request["headers"] = [
+            (name, value) for name, value in request["headers"]
+            if name != b"host"
+        ] + [(b"host", SERVER_NAME.encode())]
+        request.setdefault("client", [CLIENT_ADDRESS, 0])
+        return super().request(**request)
+
+
+def get_workload_client(
+        username: Optional[str] = None,
+        client_class: type[Client] = Client
+) -> Optional[Client]:
+    """Return a test client logged in as ``username`` (or the first user).
+
+    Pass ``WorkloadAsyncClient`` as ``client_class`` to send the requests
+    through the ASGI handler. Returns ``None`` when there is no such
+    user.
+    """
+    users = get_user_model().objects.order_by("pk")
+    user = (
+        users.filter(username=username).first()
+        if username else users.first()
+    )
+    if user is None:
+        return None
+
+    if issubclass(client_class, AsyncClient):
+        client = client_class()
+    else:
+        client = client_class(
+            SERVER_NAME=SERVER_NAME, REMOTE_ADDR=CLIENT_ADDRESS
+        )
+    client.force_login(user)
+    return client
+
+
+def get_workload_endpoints() -> list[tuple[str, str]]:
+    """Name and URL of every list, detail, search and filter page, with
+    objects and query values picked from the current catalog."""
+    endpoints = [
+        ("index", reverse("media:index")),
+    ]
+    for name in (
+            "media_list", "book_list", "film_list", "series_list",
+            "genre_list", "creator_list", "user_list", "rating_list",
+    ):
+        endpoints.append((name, reverse(f"media:{name}")))
+
+    for name, model in (
+            ("book_detail", Book),
+            ("film_detail", Film),
+            ("series_detail", Series),
+            ("user_detail", get_user_model()),
+            ("rating_detail", UserMediaRating),
+    ):
+        # The most reviewed media make for the heaviest detail pages.
+        pk = (
+            model.objects.order_by("-reviews_num", "pk")
+            if hasattr(model, "reviews_num")
+            else model.objects.order_by("pk")
+        ).values_list("pk", flat=True).first()
+        if pk is not None:
+            endpoints.append(
+                (name, reverse(f"media:{name}", kwargs={"pk": pk}))
+            )
+
+    book = Book.objects.order_by("pk").first()
+    word = book.title.split()[0] if book else "the"
+    searches_and_filters = [
+        ("book_search", "media:book_list", {"title": word}),
+        ("film_search", "media:film_list", {"title": word}),
+        ("series_search", "media:series_list", {"title": word}),
+        ("rating_search", "media:rating_list", {"media__title": word}),
+        ("genre_search", "media:genre_list", {"name": "ic"}),
+        ("creator_search", "media:creator_list", {"first_name": "ar"}),
+        ("user_search", "media:user_list", {"username": "user_1"}),
+        ("book_type_filter", "media:book_list",
+         {"type": "Traditional book"}),
+        ("series_status_filter", "media:series_list",
+         {"status": "Finished"}),
+        ("book_score_sort", "media:book_list", {"sort": "score"}),
+        ("film_reviews_sort", "media:film_list", {"sort": "reviews"}),
+        ("series_released_sort", "media:series_list",
+         {"sort": "released"}),
+        ("media_added_sort", "media:media_list", {"sort": "added"}),
+        ("genre_autocomplete", "media:genre_autocomplete", {"q": "sc"}),
+        ("creator_autocomplete", "media:creator_autocomplete",
+         {"q": "ro"}),
+    ]
+    genre = Genre.objects.order_by("pk").first()
+    if genre:
+        searches_and_filters.append(
+            ("book_genre_filter", "media:book_list",
+             {"genres": genre.name})
+        )
+    creator = Creator.objects.order_by("pk").first()
+    if creator:
+        searches_and_filters.append(
+            ("film_creator_filter", "media:film_list",
+             {"creators": creator.first_name})
+        )
+
+    if genre:
+        endpoints.append((
+            "book_leaderboard",
+            reverse(
+                "media:media_leaderboard",
+                kwargs={"media_type": "books", "genre_pk": genre.pk}
+            )
+        ))
+    endpoints.append(
+        ("rater_leaderboard", reverse("media:rater_leaderboard"))
+    )
+
+    for name, url_name, query in searches_and_filters:
+        endpoints.append(
+            (name, f"{reverse(url_name)}?{urlencode(query)}")
+        )
+    return endpoints
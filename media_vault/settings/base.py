@@ -30,8 +30,11 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    "media.middleware.ReplicaPinningMiddleware",
     "debug_toolbar.middleware.DebugToolbarMiddleware",
+    "media.middleware.QueryBudgetMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
+    "media.middleware.PreferencesMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
@@ -56,6 +59,7 @@ TEMPLATES = [
             ],
             "libraries": {
                 "query_transform": "media.template_tags.query_transform",
+                "fragment_cache": "media.template_tags.fragment_cache",
             }
         },
     },
@@ -63,6 +67,12 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "media_vault.wsgi.application"
 
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
     {"NAME": "django.contrib.auth.password_validation.MinimumLengthValidator"},
@@ -82,6 +92,20 @@ ASSETS_ROOT = "/static/assets"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 AUTH_USER_MODEL = "media.MediaUser"
 
+AUTHENTICATION_BACKENDS = ["media.backends.CachedModelBackend"]
+
 LOGIN_URL = reverse_lazy("authentication:login")
 LOGIN_REDIRECT_URL = reverse_lazy("media:index")
 LOGOUT_REDIRECT_URL = LOGIN_URL
+
+# Serve list pages and the home page with async views, whose independent
+# queries run concurrently. Meant for ASGI servers such as uvicorn.
+ASYNC_VIEWS = env.bool("ASYNC_VIEWS", default=False)
+
+# Reads of safe requests go to the read replicas of "default" listed in
+# DATABASE_REPLICAS (none by default). Clients that wrote read from the
+# primary for REPLICA_PIN_SECONDS, which should exceed the replication
+# lag.
+DATABASE_ROUTERS = ["media.routers.PrimaryReplicaRouter"]
+DATABASE_REPLICAS = []
+REPLICA_PIN_SECONDS = env.int("REPLICA_PIN_SECONDS", default=10)
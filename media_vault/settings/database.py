@@ -0,0 +1,56 @@
+import copy
+
+from .base import env
+
+
+def postgres_database() -> dict:
+    """The PostgreSQL ``default`` database, configured from the
+    ``POSTGRES_*`` variables.
+
+    Each worker process keeps a psycopg pool of ``DB_POOL_MIN_SIZE`` to
+    ``DB_POOL_MAX_SIZE`` connections. Size it so that the workers times
+    ``DB_POOL_MAX_SIZE`` stays below the server's ``max_connections``;
+    the async list views check out one connection per concurrent query.
+    ``DB_POOL=0`` turns pooling off and opens a connection per request,
+    or keeps one for ``CONN_MAX_AGE`` seconds.
+    """
+    database = {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": env("POSTGRES_DB"),
+        "USER": env("POSTGRES_USER"),
+        "PASSWORD": env("POSTGRES_PASSWORD"),
+        "HOST": env("POSTGRES_HOST"),
+        "PORT": env.int("POSTGRES_DB_PORT"),
+        # Connections the server dropped while idle are replaced on
+        # checkout (or on reuse, unpooled) instead of failing the request.
+        "CONN_HEALTH_CHECKS": True,
+    }
+    if not env.bool("DB_POOL", default=True):
+        database["CONN_MAX_AGE"] = env.int("CONN_MAX_AGE", default=0)
+        return database
+
+    database["OPTIONS"] = {
+        "pool": {
+            "min_size": env.int("DB_POOL_MIN_SIZE", default=2),
+            "max_size": env.int("DB_POOL_MAX_SIZE", default=6),
+            # Seconds a request waits for a free connection before
+            # failing with PoolTimeout.
+            "timeout": env.float("DB_POOL_TIMEOUT", default=10),
+            "max_lifetime": env.float("DB_POOL_MAX_LIFETIME", default=1800),
+            "max_idle": env.float("DB_POOL_MAX_IDLE", default=300),
+        },
+    }
+    return database
+
+
+def postgres_replicas(primary: dict) -> dict:
+    """Read replica aliases ``replica_1``, ``replica_2``, ... of
+    ``primary``, one per host in ``POSTGRES_REPLICA_HOSTS``."""
+    replicas = {}
+    hosts = env.list("POSTGRES_REPLICA_HOSTS", default=[])
+    for number, host in enumerate(hosts, start=1):
+        replica = copy.deepcopy(primary)
+        replica["HOST"] = host
+        replica["TEST"] = {"MIRROR": "default"}
+        replicas[f"replica_{number}"] = replica
+    return replicas
@@ -11,3 +11,13 @@ DATABASES = {
         "NAME": BASE_DIR / "db.sqlite3",
     }
 }
+
+if env.bool("SQLITE_REPLICA", default=False):
+    # A second SQLite file stands in for a read replica. It is updated
+    # only by sync_sqlite_replicas, which makes replication lag visible.
+    DATABASES["replica"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "db.replica.sqlite3",
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS = ["replica"]
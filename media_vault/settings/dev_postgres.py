@@ -0,0 +1,8 @@
+from .dev import *
+from .database import postgres_database
+
+# The development settings against a local PostgreSQL server, for
+# measuring the connection pool with benchmark_endpoints.
+DATABASES = {
+    "default": postgres_database()
+}
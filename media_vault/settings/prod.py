@@ -1,6 +1,7 @@
 import os
 
 from .base import *
+from .database import postgres_database, postgres_replicas
 
 DEBUG = False
 ALLOWED_HOSTS = []
@@ -18,12 +19,16 @@ CSRF_COOKIE_SECURE = True
 STATIC_ROOT = "staticfiles/"
 
 DATABASES = {
+    "default": postgres_database()
+}
+DATABASES.update(postgres_replicas(DATABASES["default"]))
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+
+# Versions, cached users and fragments are read on every request, so
+# the cache must not cost database queries.
+CACHES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
-        "NAME": os.environ["POSTGRES_DB"],
-        "USER": os.environ["POSTGRES_USER"],
-        "PASSWORD": os.environ["POSTGRES_PASSWORD"],
-        "HOST": os.environ["POSTGRES_HOST"],
-        "PORT": int(os.environ["POSTGRES_DB_PORT"])
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ.get("REDIS_URL", "redis://127.0.0.1:6379/0"),
     }
 }